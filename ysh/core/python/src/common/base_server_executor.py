@@ -43,7 +43,8 @@ from common import message_utils
 from common import watch_log
 from common.a2a_extension_utils import EXTENSION_URI
 from common.function_call_resolver import FunctionCallResolver
-from common.validation import validate_payment_mandate_signature
+from common.function_call_resolver import RoutingRule
+from common.validation import verify_payment_mandate_signature
 
 DataPartContent = dict[str, Any]
 Tool = Callable[[list[DataPartContent], TaskUpdater, Task | None], Any]
@@ -56,6 +57,7 @@ class BaseServerExecutor(AgentExecutor, abc.ABC):
       supported_extensions: list[dict[str, Any]] | None,
       tools: list[Tool],
       system_prompt: str = "You are a helpful assistant.",
+      routing_rules: list[RoutingRule] | None = None,
   ):
     """Initialization.
 
@@ -63,6 +65,8 @@ class BaseServerExecutor(AgentExecutor, abc.ABC):
       supported_extensions: Extensions the agent declares that it supports.
       tools: Tools supported by the agent.
       system_prompt: Helps steer the model when choosing tools.
+      routing_rules: Rules that pick a tool from the request's DataParts
+        without a model call.
     """
     if supported_extensions is not None:
       self._supported_extension_uris = {ext.uri for ext in supported_extensions}
@@ -71,7 +75,7 @@ class BaseServerExecutor(AgentExecutor, abc.ABC):
     self._client = genai.Client()
     self._tools = tools
     self._tool_resolver = FunctionCallResolver(
-        self._client, self._tools, system_prompt
+        self._client, self._tools, system_prompt, routing_rules
     )
     super().__init__()
 
@@ -84,19 +88,17 @@ class BaseServerExecutor(AgentExecutor, abc.ABC):
       context: The request context containing the message, task ID, etc.
       event_queue: The queue to publish events to.
     """
-    watch_log.log_a2a_request_extensions(context)
-
     text_parts, data_parts = self._parse_request(context)
-    watch_log.log_a2a_message_parts(text_parts, data_parts)
 
     self._handle_extensions(context)
+    watch_log.log_a2a_message(context, text_parts, data_parts)
 
     if EXTENSION_URI in context.call_context.activated_extensions:
       payment_mandate = message_utils.find_data_part(
           PAYMENT_MANDATE_DATA_KEY, data_parts
       )
       if payment_mandate is not None:
-        validate_payment_mandate_signature(
+        await verify_payment_mandate_signature(
             PaymentMandate.model_validate(payment_mandate)
         )
     else:
@@ -144,7 +146,9 @@ class BaseServerExecutor(AgentExecutor, abc.ABC):
     """
     try:
       prompt = (text_parts[0] if text_parts else "").strip()
-      tool_name = self._tool_resolver.determine_tool_to_use(prompt)
+      tool_name = await self._tool_resolver.determine_tool_to_use(
+          prompt, data_parts
+      )
       logging.info("Using tool: %s", tool_name)
 
       matching_tools = list(
@@ -14,12 +14,22 @@
 
 """This module provides a FunctionCallResolver class.
 
-The FunctionCallResolver uses a LLM to determine which tool to
-use based on the instructions provided.
+The FunctionCallResolver determines which tool to use for a request. Requests
+whose DataParts unambiguously match a RoutingRule are routed without a model
+call; otherwise a LLM picks the tool based on the instructions provided, and
+its decision is cached by a hash of the normalized prompt.
+
+Model calls use the async genai client so they never block the event loop.
+They are bounded by a concurrency limit and a timeout, and simultaneous
+resolutions of the same prompt share a single call.
 """
 
+import asyncio
+import collections
+import dataclasses
+import hashlib
 import logging
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
 from a2a.server.tasks.task_updater import TaskUpdater
 from a2a.types import Task
@@ -30,6 +40,40 @@ from google.genai import types
 DataPartContent = dict[str, Any]
 Tool = Callable[[list[DataPartContent], TaskUpdater, Task | None], Any]
 
+_UNKNOWN_TOOL = "Unknown"
+# Key sets come from clients, so the memoized routes are bounded too.
+_MAX_CACHED_ROUTES = 4096
+
+
+@dataclasses.dataclass(frozen=True)
+class RoutingRule:
+  """Routes requests carrying a given set of DataPart keys to a tool.
+
+  Attributes:
+    tool_name: The name of the tool the rule routes to.
+    required_keys: DataPart keys that must all be present.
+    excluded_keys: DataPart keys that must all be absent.
+  """
+
+  tool_name: str
+  required_keys: frozenset[str]
+  excluded_keys: frozenset[str] = frozenset()
+
+  @classmethod
+  def for_tool(
+      cls,
+      tool: Tool,
+      required_keys: Iterable[str],
+      excluded_keys: Iterable[str] = (),
+  ) -> "RoutingRule":
+    """Creates a rule for the given tool function."""
+    return cls(
+        tool.__name__, frozenset(required_keys), frozenset(excluded_keys)
+    )
+
+  def matches(self, keys: frozenset[str]) -> bool:
+    return self.required_keys <= keys and not self.excluded_keys & keys
+
 
 class FunctionCallResolver:
   """Resolves a natural language prompt to the name of a tool."""
@@ -39,6 +83,10 @@ class FunctionCallResolver:
       llm_client: genai.Client,
       tools: list[Tool],
       instructions: str = "You are a helpful assistant.",
+      routing_rules: list[RoutingRule] | None = None,
+      decision_cache_size: int = 1024,
+      max_concurrency: int = 8,
+      timeout_seconds: float = 30.0,
   ):
     """Initialization.
 
@@ -46,8 +94,26 @@ class FunctionCallResolver:
       llm_client: The LLM client.
       tools: The list of tools that a request can be resolved to.
       instructions: The instructions to guide the LLM.
+      routing_rules: Rules that route requests by their DataPart keys without
+        calling the LLM.
+      decision_cache_size: Maximum number of cached LLM decisions.
+      max_concurrency: Maximum number of LLM calls in flight.
+      timeout_seconds: Timeout of a single LLM call.
     """
     self._client = llm_client
+    tool_names = {tool.__name__ for tool in tools}
+    self._rules = [
+        rule for rule in routing_rules or [] if rule.tool_name in tool_names
+    ]
+    # Routing only depends on the key set, which repeats across requests.
+    self._routes: dict[frozenset[str], str | None] = {}
+    self._decisions: collections.OrderedDict[str, str] = (
+        collections.OrderedDict()
+    )
+    self._decision_cache_size = decision_cache_size
+    self._semaphore = asyncio.Semaphore(max_concurrency)
+    self._timeout_seconds = timeout_seconds
+    self._in_flight: dict[str, asyncio.Future[str]] = {}
     function_declarations = [
         types.FunctionDeclaration(
             name=tool.__name__, description=tool.__doc__
@@ -66,25 +132,96 @@ class FunctionCallResolver:
         ),
     )
 
-  def determine_tool_to_use(self, prompt: str) -> str:
+  async def determine_tool_to_use(
+      self,
+      prompt: str,
+      data_parts: list[DataPartContent] | None = None,
+  ) -> str:
     """Determines which tool to use based on a user's prompt.
 
-    Uses a LLM to analyze the user's prompt and decide which of the available
-    tools (functions) is the most appropriate to handle the request.
+    The DataPart keys of the request are first matched against the routing
+    rules. If exactly one rule matches, or one matching rule is strictly more
+    specific than all the others, its tool is used. Otherwise a LLM analyzes
+    the user's prompt and decides which of the available tools (functions) is
+    the most appropriate to handle the request.
 
     Args:
         prompt: The user's request as a string.
+        data_parts: The contents of the request's DataParts.
 
     Returns:
-        The name of the tool function that the model has determined should be
-        called. If no suitable tool is found, it returns "Unknown".
-    """
+        The name of the tool function that should be called. If no suitable
+        tool is found, it returns "Unknown".
 
-    response = self._client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt,
-        config=self._config,
-    )
+    Raises:
+        asyncio.TimeoutError: If the LLM does not answer within the timeout.
+    """
+    keys = frozenset(key for part in data_parts or [] for key in part)
+    tool_name = self._route(keys)
+    if tool_name is not None:
+      logging.debug("Routed %s to %s without the LLM", sorted(keys), tool_name)
+      return tool_name
+
+    decision_key = self._decision_key(prompt, keys)
+    tool_name = self._decisions.get(decision_key)
+    if tool_name is not None:
+      self._decisions.move_to_end(decision_key)
+      return tool_name
+
+    # Identical resolutions arriving together share one call. It runs as its
+    # own task, so a cancelled caller does not cancel it for the others.
+    in_flight = self._in_flight.get(decision_key)
+    if in_flight is None:
+      in_flight = asyncio.ensure_future(self._ask_llm(prompt))
+      self._in_flight[decision_key] = in_flight
+      in_flight.add_done_callback(
+          lambda _: self._in_flight.pop(decision_key, None)
+      )
+    tool_name = await asyncio.shield(in_flight)
+
+    if tool_name != _UNKNOWN_TOOL:
+      self._decisions[decision_key] = tool_name
+      if len(self._decisions) > self._decision_cache_size:
+        self._decisions.popitem(last=False)
+    return tool_name
+
+  def _route(self, keys: frozenset[str]) -> str | None:
+    """Returns the tool selected by the routing rules, or None if ambiguous."""
+    if keys in self._routes:
+      return self._routes[keys]
+    matching = [rule for rule in self._rules if rule.matches(keys)]
+    tool_name = None
+    for rule in matching:
+      if all(
+          other.required_keys < rule.required_keys
+          for other in matching
+          if other is not rule
+      ):
+        tool_name = rule.tool_name
+        break
+    if len(self._routes) < _MAX_CACHED_ROUTES:
+      self._routes[keys] = tool_name
+    return tool_name
+
+  def _decision_key(self, prompt: str, keys: frozenset[str]) -> str:
+    """Hashes the normalized prompt together with the DataPart key set."""
+    normalized = " ".join(prompt.casefold().split())
+    signature = "\x1f".join(sorted(keys))
+    return hashlib.sha256(
+        f"{normalized}\x1e{signature}".encode("utf-8")
+    ).hexdigest()
+
+  async def _ask_llm(self, prompt: str) -> str:
+    """Asks the LLM which tool to use for the prompt."""
+    async with self._semaphore:
+      response = await asyncio.wait_for(
+          self._client.aio.models.generate_content(
+              model="gemini-2.5-flash",
+              contents=prompt,
+              config=self._config,
+          ),
+          timeout=self._timeout_seconds,
+      )
 
     logging.debug("\nDetermine Tool Response: %s\n", response)
 
@@ -97,4 +234,4 @@ class FunctionCallResolver:
         if part.function_call:
           return part.function_call.name
 
-    return "Unknown"
+    return _UNKNOWN_TOOL
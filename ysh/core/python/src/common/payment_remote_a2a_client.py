@@ -12,10 +12,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Wrapper for the A2A client."""
+"""Wrapper for the A2A client.
 
+Connections are pooled per process: every PaymentRemoteA2aClient for the same
+base_url shares one httpx connection pool, one cached AgentCard (refreshed
+after a TTL) and one A2A Client. Extension headers are sent per request, so
+clients with different required extensions can share the pool.
+"""
+
+import asyncio
+import dataclasses
 import httpx
 import logging
+import os
+import time
+from typing import AsyncIterator
 import uuid
 
 from a2a import types as a2a_types
@@ -24,9 +35,117 @@ from a2a.client.client import Client
 from a2a.client.client import ClientConfig
 from a2a.client.client_factory import ClientFactory
 from a2a.client.client_task_manager import ClientTaskManager
+from a2a.client.middleware import ClientCallContext
 from a2a.extensions.common import HTTP_EXTENSION_HEADER
 
 DEFAULT_TIMEOUT = 600.0
+AGENT_CARD_TTL_SECONDS = float(
+    os.environ.get("A2A_AGENT_CARD_TTL_SECONDS", "300")
+)
+
+StreamEvent = (
+    a2a_types.Task
+    | a2a_types.Message
+    | a2a_types.TaskStatusUpdateEvent
+    | a2a_types.TaskArtifactUpdateEvent
+)
+
+_TERMINAL_STATES = frozenset({
+    a2a_types.TaskState.completed,
+    a2a_types.TaskState.canceled,
+    a2a_types.TaskState.failed,
+    a2a_types.TaskState.rejected,
+})
+
+# States in which the remote task waits for the caller, e.g. for an OTP. The
+# caller resumes the task with a new message, so it must not be cancelled.
+_INTERRUPTED_STATES = frozenset({
+    a2a_types.TaskState.input_required,
+    a2a_types.TaskState.auth_required,
+})
+
+
+@dataclasses.dataclass
+class _RemoteAgent:
+  """Pooled connection state for one remote agent."""
+
+  httpx_client: httpx.AsyncClient
+  client_factory: ClientFactory
+  lock: asyncio.Lock = dataclasses.field(default_factory=asyncio.Lock)
+  agent_card: a2a_types.AgentCard | None = None
+  a2a_client: Client | None = None
+  card_fetched_at: float = 0.0
+
+
+class A2aClientRegistry:
+  """Process-wide registry of pooled A2A connections, keyed by base_url."""
+
+  def __init__(self, card_ttl_seconds: float = AGENT_CARD_TTL_SECONDS):
+    """Initialization.
+
+    Args:
+      card_ttl_seconds: How long a fetched AgentCard is reused.
+    """
+    self._card_ttl_seconds = card_ttl_seconds
+    self._agents: dict[str, _RemoteAgent] = {}
+
+  def _remote_agent(self, base_url: str) -> _RemoteAgent:
+    remote_agent = self._agents.get(base_url)
+    if remote_agent is None:
+      httpx_client = httpx.AsyncClient(
+          timeout=httpx.Timeout(timeout=DEFAULT_TIMEOUT)
+      )
+      remote_agent = _RemoteAgent(
+          httpx_client=httpx_client,
+          client_factory=ClientFactory(
+              ClientConfig(httpx_client=httpx_client)
+          ),
+      )
+      self._agents[base_url] = remote_agent
+    return remote_agent
+
+  def _is_fresh(self, remote_agent: _RemoteAgent) -> bool:
+    return (
+        remote_agent.agent_card is not None
+        and time.monotonic() - remote_agent.card_fetched_at
+        < self._card_ttl_seconds
+    )
+
+  async def _refresh(self, base_url: str) -> _RemoteAgent:
+    """Returns the remote agent, fetching its AgentCard if stale."""
+    remote_agent = self._remote_agent(base_url)
+    if self._is_fresh(remote_agent):
+      return remote_agent
+    async with remote_agent.lock:
+      # Another caller may have refreshed the card while we waited.
+      if not self._is_fresh(remote_agent):
+        resolver = A2ACardResolver(
+            httpx_client=remote_agent.httpx_client, base_url=base_url
+        )
+        agent_card = await resolver.get_agent_card()
+        remote_agent.agent_card = agent_card
+        remote_agent.a2a_client = remote_agent.client_factory.create(
+            agent_card
+        )
+        remote_agent.card_fetched_at = time.monotonic()
+    return remote_agent
+
+  async def get_agent_card(self, base_url: str) -> a2a_types.AgentCard:
+    """Returns the cached AgentCard of the agent at base_url."""
+    return (await self._refresh(base_url)).agent_card
+
+  async def get_client(self, base_url: str) -> Client:
+    """Returns the shared A2A Client of the agent at base_url."""
+    return (await self._refresh(base_url)).a2a_client
+
+  async def aclose(self) -> None:
+    """Closes every pooled connection."""
+    agents, self._agents = self._agents, {}
+    for remote_agent in agents.values():
+      await remote_agent.httpx_client.aclose()
+
+
+client_registry = A2aClientRegistry()
 
 
 class PaymentRemoteA2aClient():
@@ -50,29 +169,24 @@ class PaymentRemoteA2aClient():
       base_url: The base URL where the remote agent is hosted.
       required_extensions: A set of extension URIs that the client requires.
     """
-
-    self._httpx_client = httpx.AsyncClient(
-        timeout=httpx.Timeout(timeout=DEFAULT_TIMEOUT)
-    )
-    self._a2a_client_factory = ClientFactory(
-        ClientConfig(
-            httpx_client=self._httpx_client,
-        )
-    )
     self._name = name
     self._base_url = base_url
-    self._agent_card = None
     self._client_required_extensions = required_extensions or set()
+    self._call_context = ClientCallContext(
+        state={
+            "http_kwargs": {
+                "headers": {
+                    HTTP_EXTENSION_HEADER: ", ".join(
+                        sorted(self._client_required_extensions)
+                    )
+                }
+            }
+        }
+    )
 
   async def get_agent_card(self) -> a2a_types.AgentCard:
     """Get agent card."""
-    if self._agent_card is None:
-      resolver = A2ACardResolver(
-          httpx_client=self._httpx_client,
-          base_url=self._base_url,
-      )
-      self._agent_card = await resolver.get_agent_card()
-    return self._agent_card
+    return await client_registry.get_agent_card(self._base_url)
 
   async def send_a2a_message(
       self, message: a2a_types.Message
@@ -82,7 +196,9 @@ class PaymentRemoteA2aClient():
 
     task_manager = ClientTaskManager()
 
-    async for event in my_a2a_client.send_message(message):
+    async for event in my_a2a_client.send_message(
+        message, context=self._call_context
+    ):
       # Tasks are returned in tuples (aka ClientEvent). The first element is the
       # Task, the second element is the UpdateEvent.
       if isinstance(event, tuple):
@@ -100,13 +216,78 @@ class PaymentRemoteA2aClient():
     )
     return task
 
+  async def stream_a2a_message(
+      self,
+      message: a2a_types.Message,
+      *,
+      cancel_on_close: bool = True,
+  ) -> AsyncIterator[StreamEvent]:
+    """Sends the message and yields the response events as they arrive.
+
+    The first event for a task is the Task itself; status updates and
+    artifacts follow as TaskStatusUpdateEvent and TaskArtifactUpdateEvent.
+    A remote agent may instead answer with a single Message.
+
+    Stopping the iteration early closes the stream. After aclose() or a
+    cancellation this happens at once; after a plain break it waits for the
+    async generator finalizer, so wrap the iteration in
+    contextlib.aclosing() to close the stream as soon as the loop exits.
+    If cancel_on_close is set and the task is still running, the remote
+    task is also cancelled. Tasks in a terminal state, or interrupted with
+    input_required or auth_required, are left alone so that the caller can
+    resume them, e.g. after answering an OTP challenge.
+
+    Args:
+      message: The message to send.
+      cancel_on_close: Whether to cancel a still running remote task when
+        the caller stops consuming events.
+
+    Yields:
+      The Task, update events, or Message received from the remote agent.
+    """
+    my_a2a_client: Client = await self._get_a2a_client()
+    events = my_a2a_client.send_message(message, context=self._call_context)
+    task_id = None
+    running = True
+    try:
+      async for event in events:
+        if not isinstance(event, tuple):
+          # A direct Message reply ends the exchange.
+          running = False
+          yield event
+          continue
+        # Tasks are returned in tuples (aka ClientEvent). The first element
+        # is the Task, the second element is the UpdateEvent.
+        task, update = event
+        task_id = task.id
+        running = (
+            task.status.state not in _TERMINAL_STATES
+            and task.status.state not in _INTERRUPTED_STATES
+        )
+        yield update if update is not None else task
+      running = False
+    finally:
+      # Close the HTTP stream now rather than when it is garbage collected.
+      await events.aclose()
+      if cancel_on_close and task_id is not None and running:
+        await self._cancel_task(my_a2a_client, task_id)
+
+  async def _cancel_task(self, client: Client, task_id: str) -> None:
+    """Cancels a remote task, logging rather than raising on failure."""
+    try:
+      await asyncio.shield(
+          client.cancel_task(
+              a2a_types.TaskIdParams(id=task_id), context=self._call_context
+          )
+      )
+    except Exception:  # pylint: disable=broad-exception-caught
+      logging.warning(
+          "Failed to cancel task %s on %s", task_id, self._name, exc_info=True
+      )
+
   async def _get_a2a_client(self) -> Client:
-    """Get A2A client."""
-    agent_card = await self.get_agent_card()
-    self._httpx_client.headers[HTTP_EXTENSION_HEADER] = ", ".join(
-        self._client_required_extensions
-    )
-    return self._a2a_client_factory.create(agent_card)
+    """Get the pooled A2A client."""
+    return await client_registry.get_client(self._base_url)
 
   def _create_agent_message(
       self,
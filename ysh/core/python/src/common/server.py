@@ -23,21 +23,20 @@ import json
 import logging
 import os
 import pprint
+import random
 
 from a2a.server.agent_execution.simple_request_context_builder import SimpleRequestContextBuilder
 from a2a.server.apps.jsonrpc.starlette_app import A2AStarletteApplication
 from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
-from a2a.server.tasks.inmemory_task_store import InMemoryTaskStore
 from a2a.types import AgentCard
 from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import uvicorn
 
 from . import watch_log
 from .base_server_executor import BaseServerExecutor
+from .task_store import create_task_store
 
 
 def load_local_agent_card(file_path: str) -> AgentCard:
@@ -71,9 +70,10 @@ def run_agent_blocking(
       rpc_url: The base URL path at which to mount the JSON-RPC handler.
   """
 
-  # Add a file handler to the logger for watch.log.
+  # Log to watch.log through a queue, so file writes happen off the event
+  # loop in the listener's thread.
   logger = logging.getLogger(__name__)
-  logger.addHandler(watch_log.create_file_handler())
+  logger.addHandler(watch_log.create_queue_handler())
 
   # Build the Starlette app and add middlewares.
   app = _build_starlette_app(agent_card, executor=executor, rpc_url=rpc_url)
@@ -86,83 +86,109 @@ def run_agent_blocking(
   )
 
 
-def _create_watch_log_handler() -> logging.FileHandler:
-  """Create a file handler for watch.log logger.
+class _BodyTee:
+  """Keeps the first max_bytes of a body streamed through a middleware."""
 
-  watch.log is a log file meant to be watched in parallel with running a
-  scenario.  It will contain all the requests and responses to/from the agent
-  that are sent to/from the client, so engineers can see what is happening
-  between the servers in real time.
+  def __init__(self, max_bytes: int):
+    self._max_bytes = max_bytes
+    self._chunks: list[bytes] = []
+    self._kept = 0
+    self.size = 0
+
+  def add(self, chunk: bytes) -> None:
+    self.size += len(chunk)
+    if self._kept < self._max_bytes:
+      chunk = chunk[: self._max_bytes - self._kept]
+      self._chunks.append(chunk)
+      self._kept += len(chunk)
+
+  def text(self) -> str:
+    if not self.size:
+      return "<empty>"
+    text = b"".join(self._chunks).decode("utf-8", errors="replace")
+    if self.size > self._kept:
+      text += f"... <{self.size - self._kept} more bytes>"
+    return text
 
-  Returns:
-      A logging.FileHandler instance configured for 'watch.log'.
-  """
-  file_handler = logging.FileHandler(".logs/watch.log")
-  file_handler.setLevel(logging.INFO)
-  file_handler.setFormatter(logging.Formatter("%(name)s: %(message)s"))
-  return file_handler
 
+class _LoggingMiddleware:
+  """Logs incoming request and response details without buffering them.
 
-class _LoggingMiddleware(BaseHTTPMiddleware):
-  """Intercepts and logs incoming request and response details."""
+  Request and response bodies pass through untouched, so streamed (SSE)
+  responses keep streaming. A copy of the first max_body_bytes of each body is
+  kept and logged as one structured record when the exchange ends, whether it
+  completed, the app raised or the client went away. Only a sample_rate
+  fraction of requests is logged.
+  """
 
-  def __init__(self, *args, logger: logging.Logger, **kwargs):
+  def __init__(
+      self,
+      app: ASGIApp,
+      *,
+      logger: logging.Logger,
+      max_body_bytes: int = 4096,
+      sample_rate: float = 1.0,
+  ):
+    self._app = app
     self._logger = logger
-    super().__init__(*args, **kwargs)
-
-  async def dispatch(self, request: Request, call_next) -> Response:
-    self._logger.info("\n\n\n")
-    self._logger.info("---------- New Agent Request Received---------")
-
-    # Log the request method and URL.
-    self._logger.info("%s %s", request.method, request.url)
-
-    # Log the request body if it's present.
-    content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > 0:
-      request_body = await request.json()
-    else:
-      request_body = "<empty>"
-
-    self._logger.info("\n")
-    self._logger.info("[Request Body]")
-    self._logger.info("%s", request_body)
-
-    # If the extension header is present, log a notice.
-    # TODO
-
-    response = await call_next(request)
-
-    # Ensure the response has a body to read.
-    if response.body_iterator:
-      body = b""
-
-      # Read the entire response body.
-      # All responses are UTF-8 encoded JSON, so this should always succeed.
-      async for chunk in response.body_iterator:
-        body += chunk
-
-      try:
-        response_body_json = body.decode("utf-8")
-      except UnicodeDecodeError:
-        self._logger.warning("Failed to decode response body as UTF-8.")
-        response_body_json = body
-
-      self._logger.info("\n")
-      self._logger.info("[Response Body]")
-      self._logger.info("%s", response_body_json)
-
-      return Response(
-          content=body,
-          status_code=response.status_code,
-          media_type=response.media_type,
-          headers=response.headers,
+    self._max_body_bytes = max_body_bytes
+    self._sample_rate = sample_rate
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http" or random.random() >= self._sample_rate:
+      await self._app(scope, receive, send)
+      return
+
+    request_body = _BodyTee(self._max_body_bytes)
+    response_body = _BodyTee(self._max_body_bytes)
+    status_code = None
+    completed = False
+    error = None
+
+    async def receive_and_tee() -> Message:
+      message = await receive()
+      if message["type"] == "http.request":
+        request_body.add(message.get("body", b""))
+      return message
+
+    async def send_and_tee(message: Message) -> None:
+      nonlocal status_code, completed
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+      elif message["type"] == "http.response.body":
+        response_body.add(message.get("body", b""))
+      await send(message)
+      if message["type"] == "http.response.body" and not message.get(
+          "more_body", False
+      ):
+        completed = True
+
+    try:
+      await self._app(scope, receive_and_tee, send_and_tee)
+    except BaseException as e:
+      error = type(e).__name__
+      raise
+    finally:
+      # Incomplete exchanges (app errors, client disconnects) are logged too.
+      self._logger.log(
+          logging.INFO if completed else logging.WARNING,
+          "http_exchange",
+          extra={
+              "watch": {
+                  "event": "http_exchange",
+                  "method": scope["method"],
+                  "path": scope["path"],
+                  "query": scope.get("query_string", b"").decode("latin-1"),
+                  "status": status_code,
+                  "completed": completed,
+                  "error": error,
+                  "request_body": request_body.text(),
+                  "request_bytes": request_body.size,
+                  "response_body": response_body.text(),
+                  "response_bytes": response_body.size,
+              }
+          },
       )
-    else:
-      self._logger.info("\n")
-      self._logger.info("[Response Body]")
-      self._logger.info("<empty>")
-      return response
 
 
 def _build_starlette_app(
@@ -175,6 +201,8 @@ def _build_starlette_app(
       executor: The AgentExecutor that processes A2A requests.
       rpc_url: The base URL path at which to mount the JSON-RPC handler.
 
+  The task store is selected by A2A_TASK_STORE; see task_store.py.
+
   Returns:
       An instance of A2AStarletteApplication.
 
@@ -186,7 +214,7 @@ def _build_starlette_app(
 
   handler = DefaultRequestHandler(
       agent_executor=executor,
-      task_store=InMemoryTaskStore(),
+      task_store=create_task_store(),
       request_context_builder=SimpleRequestContextBuilder(),
   )
 
@@ -223,5 +251,10 @@ def _add_middlewares(app, logger: logging.Logger) -> None:
       allow_methods=["*"],
       allow_headers=["*"],
   )
-  app.add_middleware(_LoggingMiddleware, logger=logger)
+  app.add_middleware(
+      _LoggingMiddleware,
+      logger=logger,
+      max_body_bytes=int(os.environ.get("A2A_LOG_MAX_BODY_BYTES", "4096")),
+      sample_rate=float(os.environ.get("A2A_LOG_SAMPLE_RATE", "1.0")),
+  )
   return app
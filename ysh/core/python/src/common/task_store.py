@@ -0,0 +1,273 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Persistent TaskStore implementations for the A2A servers.
+
+The default InMemoryTaskStore keeps tasks in a single process, which prevents
+running more than one replica of an agent and grows without bound. The stores
+here persist tasks outside the process:
+
+* SqliteTaskStore keeps tasks in a local SQLite file.
+* RedisTaskStore keeps tasks in Redis, so replicas can share them.
+
+Tasks are serialized as compact JSON, compressed when large. Tasks in a
+terminal state expire after a TTL, and tasks are indexed by context_id.
+
+create_task_store() picks a store from the A2A_TASK_STORE setting. Postgres
+URLs are served by the a2a-sdk DatabaseTaskStore.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from a2a.server.tasks.inmemory_task_store import InMemoryTaskStore
+from a2a.server.tasks.task_store import TaskStore
+from a2a.types import Task
+from a2a.types import TaskState
+
+try:
+  from redis import asyncio as redis_asyncio
+except ImportError:  # Redis is only needed for RedisTaskStore.
+  redis_asyncio = None
+
+
+TERMINAL_STATES = frozenset({
+    TaskState.completed,
+    TaskState.canceled,
+    TaskState.failed,
+    TaskState.rejected,
+})
+
+# Serialized tasks at least this large are zlib-compressed.
+_COMPRESSION_THRESHOLD = 1024
+_ZLIB_PREFIX = b"z"
+_JSON_PREFIX = b"j"
+
+
+def serialize_task(task: Task) -> bytes:
+  """Serializes a task to compact, possibly compressed, bytes."""
+  data = task.model_dump_json(by_alias=True, exclude_none=True).encode()
+  if len(data) >= _COMPRESSION_THRESHOLD:
+    return _ZLIB_PREFIX + zlib.compress(data)
+  return _JSON_PREFIX + data
+
+
+def deserialize_task(data: bytes) -> Task:
+  """Reverses serialize_task."""
+  if data[:1] == _ZLIB_PREFIX:
+    return Task.model_validate_json(zlib.decompress(data[1:]))
+  return Task.model_validate_json(data[1:])
+
+
+def _expires_at(task: Task, ttl_seconds: float) -> float | None:
+  """Expiry timestamp of a task, or None while it can still progress."""
+  if task.status.state in TERMINAL_STATES:
+    return time.time() + ttl_seconds
+  return None
+
+
+class SqliteTaskStore(TaskStore):
+  """A TaskStore backed by a local SQLite database."""
+
+  _SCHEMA = """
+      CREATE TABLE IF NOT EXISTS tasks (
+          id TEXT PRIMARY KEY,
+          context_id TEXT NOT NULL,
+          expires_at REAL,
+          data BLOB NOT NULL
+      );
+      CREATE INDEX IF NOT EXISTS tasks_context_idx ON tasks (context_id);
+      CREATE INDEX IF NOT EXISTS tasks_expiry_idx
+          ON tasks (expires_at) WHERE expires_at IS NOT NULL;
+  """
+
+  def __init__(
+      self,
+      path: str,
+      *,
+      ttl_seconds: float = 3600.0,
+      purge_interval_seconds: float = 60.0,
+  ):
+    """Initialization.
+
+    Args:
+      path: Path of the SQLite database file.
+      ttl_seconds: How long tasks in a terminal state are kept.
+      purge_interval_seconds: Minimum time between purges of expired tasks.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    self._conn = sqlite3.connect(
+        path, check_same_thread=False, isolation_level=None
+    )
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute("PRAGMA synchronous=NORMAL")
+    self._conn.executescript(self._SCHEMA)
+    self._lock = threading.Lock()
+    self._ttl_seconds = ttl_seconds
+    self._purge_interval_seconds = purge_interval_seconds
+    self._purged_at = 0.0
+
+  def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+    with self._lock:
+      return self._conn.execute(sql, params).fetchall()
+
+  async def _run(self, sql: str, params: tuple = ()) -> list[tuple]:
+    return await asyncio.to_thread(self._execute, sql, params)
+
+  async def save(self, task: Task, context=None) -> None:
+    """Saves or updates a task."""
+    await self._run(
+        "INSERT OR REPLACE INTO tasks (id, context_id, expires_at, data)"
+        " VALUES (?, ?, ?, ?)",
+        (
+            task.id,
+            task.context_id,
+            _expires_at(task, self._ttl_seconds),
+            serialize_task(task),
+        ),
+    )
+    await self._maybe_purge()
+
+  async def get(self, task_id: str, context=None) -> Task | None:
+    """Retrieves a task by ID, unless it has expired."""
+    rows = await self._run(
+        "SELECT data FROM tasks WHERE id = ?"
+        " AND (expires_at IS NULL OR expires_at > ?)",
+        (task_id, time.time()),
+    )
+    return deserialize_task(rows[0][0]) if rows else None
+
+  async def delete(self, task_id: str, context=None) -> None:
+    """Deletes a task by ID."""
+    await self._run("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+  async def list_by_context(self, context_id: str) -> list[Task]:
+    """Retrieves the unexpired tasks of a context."""
+    rows = await self._run(
+        "SELECT data FROM tasks WHERE context_id = ?"
+        " AND (expires_at IS NULL OR expires_at > ?)",
+        (context_id, time.time()),
+    )
+    return [deserialize_task(row[0]) for row in rows]
+
+  async def _maybe_purge(self) -> None:
+    now = time.time()
+    if now - self._purged_at < self._purge_interval_seconds:
+      return
+    self._purged_at = now
+    await self._run("DELETE FROM tasks WHERE expires_at <= ?", (now,))
+
+
+class RedisTaskStore(TaskStore):
+  """A TaskStore backed by Redis, shared by every replica of an agent."""
+
+  def __init__(
+      self,
+      url: str,
+      *,
+      ttl_seconds: float = 3600.0,
+      key_prefix: str = "a2a",
+  ):
+    """Initialization.
+
+    Args:
+      url: The Redis URL, e.g. redis://localhost:6379/0.
+      ttl_seconds: How long tasks in a terminal state are kept.
+      key_prefix: Prefix of the Redis keys, to share a database.
+    """
+    if redis_asyncio is None:
+      raise RuntimeError("The redis package is required for RedisTaskStore.")
+    self._redis = redis_asyncio.from_url(url)
+    self._ttl_seconds = int(ttl_seconds)
+    self._key_prefix = key_prefix
+
+  def _task_key(self, task_id: str) -> str:
+    return f"{self._key_prefix}:task:{task_id}"
+
+  def _context_key(self, context_id: str) -> str:
+    return f"{self._key_prefix}:context:{context_id}"
+
+  async def save(self, task: Task, context=None) -> None:
+    """Saves or updates a task; terminal tasks expire after the TTL."""
+    ttl = self._ttl_seconds if task.status.state in TERMINAL_STATES else None
+    context_key = self._context_key(task.context_id)
+    async with self._redis.pipeline(transaction=True) as pipe:
+      pipe.set(self._task_key(task.id), serialize_task(task), ex=ttl)
+      pipe.sadd(context_key, task.id)
+      # The index expires one TTL after the context's last update.
+      pipe.expire(context_key, self._ttl_seconds)
+      await pipe.execute()
+
+  async def get(self, task_id: str, context=None) -> Task | None:
+    """Retrieves a task by ID."""
+    data = await self._redis.get(self._task_key(task_id))
+    return deserialize_task(data) if data is not None else None
+
+  async def delete(self, task_id: str, context=None) -> None:
+    """Deletes a task by ID."""
+    task = await self.get(task_id)
+    async with self._redis.pipeline(transaction=True) as pipe:
+      pipe.delete(self._task_key(task_id))
+      if task is not None:
+        pipe.srem(self._context_key(task.context_id), task_id)
+      await pipe.execute()
+
+  async def list_by_context(self, context_id: str) -> list[Task]:
+    """Retrieves the unexpired tasks of a context."""
+    task_ids = await self._redis.smembers(self._context_key(context_id))
+    if not task_ids:
+      return []
+    ids = [task_id.decode("utf-8") for task_id in task_ids]
+    values = await self._redis.mget([self._task_key(i) for i in ids])
+    return [deserialize_task(value) for value in values if value is not None]
+
+
+def create_task_store(url: str | None = None) -> TaskStore:
+  """Creates the TaskStore configured by a URL.
+
+  Args:
+    url: The store URL; defaults to the A2A_TASK_STORE environment variable.
+      Supported forms are "memory" (the default), "sqlite:///path/to/file",
+      "redis://..." and SQLAlchemy async URLs such as
+      "postgresql+asyncpg://...". Terminal tasks expire after
+      A2A_TASK_TTL_SECONDS.
+
+  Returns:
+    The TaskStore instance.
+
+  Raises:
+    ValueError: If the URL scheme is not supported.
+  """
+  url = url or os.environ.get("A2A_TASK_STORE", "memory")
+  ttl_seconds = float(os.environ.get("A2A_TASK_TTL_SECONDS", "3600"))
+  if url == "memory":
+    return InMemoryTaskStore()
+  if url.startswith("sqlite:///"):
+    return SqliteTaskStore(
+        url.removeprefix("sqlite:///"), ttl_seconds=ttl_seconds
+    )
+  if url.startswith(("redis://", "rediss://")):
+    return RedisTaskStore(url, ttl_seconds=ttl_seconds)
+  if url.startswith("postgresql"):
+    from a2a.server.tasks.database_task_store import DatabaseTaskStore
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    return DatabaseTaskStore(create_async_engine(url))
+  raise ValueError(f"Unsupported A2A_TASK_STORE: {url}")
@@ -12,15 +12,446 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Validation logic for PaymentMandate."""
+"""Validation logic for PaymentMandate.
 
+A PaymentMandate's user_authorization is an SD-JWT presentation
+(issuer-signed JWT, disclosures and a key-binding JWT separated by '~'). The
+PaymentMandateVerifier checks it in these steps:
+
+1. The issuer JWT is verified against the JWKS of a trusted issuer. It must
+   carry an 'exp' claim.
+2. A key-binding JWT is required. It is verified against the issuer's 'cnf'
+   key, its sd_hash is checked, and it must be recent ('iat'), addressed to
+   this verifier ('aud') and carry a 'nonce' not used by another
+   presentation.
+3. The key-binding JWT's transaction_data must contain the hash of the
+   PaymentMandateContents, so the authorization only covers this mandate.
+
+Issuer JWKS are cached with a TTL and fetched at most once at a time per
+issuer. After a failed fetch the issuer is not refetched for a while, and
+previously fetched keys keep being used. Successful verifications are
+memoized by the hash of the authorization and the mandate contents, so
+repeated requests for the same mandate do no crypto and no network fetches.
+
+The verifier is configured from the environment:
+
+* AP2_TRUSTED_ISSUERS is a JSON object that maps issuer to JWKS URL.
+* AP2_MANDATE_VERIFICATION is "permissive" (the default) or "strict".
+  Permissive mode also accepts the opaque placeholder authorizations produced
+  by the samples.
+* AP2_MANDATE_AUDIENCE is the 'aud' expected in key-binding JWTs. When it is
+  unset, any audience is accepted.
+"""
+
+import asyncio
+import base64
+import collections
+import hashlib
+import json
 import logging
+import os
+import time
+from typing import Any
+
+import httpx
 
 from ap2.types.mandate import PaymentMandate
 
+try:
+  import jwt
+except ImportError:  # PyJWT is only needed to verify real signatures.
+  jwt = None
+
+
+_ALLOWED_ALGORITHMS = ("ES256", "ES256K", "ES384", "EdDSA", "PS256", "RS256")
+# Clock skew tolerated on exp/nbf/iat, in seconds.
+_LEEWAY_SECONDS = 30
+# How long after its 'iat' a key-binding JWT is accepted, in seconds.
+_KEY_BINDING_MAX_AGE_SECONDS = 300
+
+
+def _b64url_decode(segment: str) -> bytes:
+  return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _b64url_sha256(data: bytes) -> str:
+  digest = hashlib.sha256(data).digest()
+  return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def _looks_like_jwt(token: str) -> bool:
+  return token.split("~", 1)[0].count(".") == 2
+
+
+def payment_mandate_contents_hash(payment_mandate: PaymentMandate) -> str:
+  """Returns the base64url SHA-256 of the canonical mandate contents."""
+  canonical = json.dumps(
+      payment_mandate.payment_mandate_contents.model_dump(mode="json"),
+      sort_keys=True,
+      separators=(",", ":"),
+  )
+  return _b64url_sha256(canonical.encode("utf-8"))
+
+
+class JwksCache:
+  """Caches the signing keys of trusted issuers."""
+
+  def __init__(
+      self,
+      trusted_issuers: dict[str, str],
+      *,
+      ttl_seconds: float = 3600.0,
+      min_refresh_seconds: float = 30.0,
+      http_client: httpx.AsyncClient | None = None,
+  ):
+    """Initialization.
+
+    Args:
+      trusted_issuers: Maps each trusted issuer to its JWKS URL.
+      ttl_seconds: How long a fetched JWKS is used.
+      min_refresh_seconds: Minimum time between refetches forced by an
+        unknown key id, which bounds fetches caused by bogus tokens. It is
+        also the back-off after a failed fetch.
+      http_client: The client used to fetch JWKS.
+    """
+    self._trusted_issuers = trusted_issuers
+    self._ttl_seconds = ttl_seconds
+    self._min_refresh_seconds = min_refresh_seconds
+    self._http_client = http_client
+    self._keys: dict[str, tuple[float, dict[str, dict[str, Any]]]] = {}
+    self._failed_at: dict[str, float] = {}
+    self._locks: dict[str, asyncio.Lock] = collections.defaultdict(
+        asyncio.Lock
+    )
+
+  async def _fetch(self, issuer: str) -> dict[str, dict[str, Any]]:
+    if self._http_client is None:
+      self._http_client = httpx.AsyncClient(timeout=httpx.Timeout(5.0))
+    try:
+      response = await self._http_client.get(self._trusted_issuers[issuer])
+      response.raise_for_status()
+      return {key.get("kid", ""): key for key in response.json()["keys"]}
+    except (
+        httpx.HTTPError,
+        AttributeError,
+        KeyError,
+        TypeError,
+        ValueError,
+    ) as e:
+      raise ValueError(f"Could not fetch the JWKS of {issuer}: {e}") from e
+
+  async def get_key(self, issuer: str, kid: str | None) -> dict[str, Any]:
+    """Returns the JWK of an issuer, refreshing the JWKS when needed.
+
+    Args:
+      issuer: The 'iss' claim of the token.
+      kid: The 'kid' header of the token, if any.
+
+    Returns:
+      The issuer's JWK for the key id.
+
+    Raises:
+      ValueError: If the issuer is not trusted, its JWKS cannot be fetched
+        or the key is unknown.
+    """
+    if issuer not in self._trusted_issuers:
+      raise ValueError(f"Untrusted issuer: {issuer}")
+    now = time.monotonic()
+    fetched_at, keys = self._keys.get(issuer, (float("-inf"), {}))
+    stale = now - fetched_at >= self._ttl_seconds
+    # An unknown kid may mean the issuer rotated its keys.
+    rotated = (kid or "") not in keys and (
+        now - fetched_at >= self._min_refresh_seconds
+    )
+    failed_at = self._failed_at.get(issuer, float("-inf"))
+    backing_off = now - failed_at < self._min_refresh_seconds
+    if (stale or rotated) and not backing_off:
+      async with self._locks[issuer]:
+        fetched_at, keys = self._keys.get(issuer, (float("-inf"), {}))
+        failed_at = self._failed_at.get(issuer, float("-inf"))
+        if fetched_at < now and failed_at < now:
+          try:
+            keys = await self._fetch(issuer)
+          except ValueError:
+            self._failed_at[issuer] = time.monotonic()
+            if not keys:
+              raise
+            logging.warning("Using stale JWKS of %s", issuer, exc_info=True)
+          else:
+            self._keys[issuer] = (time.monotonic(), keys)
+            self._failed_at.pop(issuer, None)
+    if not keys and issuer in self._failed_at:
+      raise ValueError(f"The JWKS of {issuer} is unavailable.")
+    if kid is None and len(keys) == 1:
+      return next(iter(keys.values()))
+    if (kid or "") not in keys:
+      raise ValueError(f"Unknown key {kid} for issuer {issuer}")
+    return keys[kid or ""]
+
+  async def prefetch(self, issuers: set[str]) -> None:
+    """Warms the cache for several issuers concurrently."""
+    await asyncio.gather(
+        *(
+            self.get_key(issuer, None)
+            for issuer in issuers
+            if issuer in self._trusted_issuers
+        ),
+        return_exceptions=True,
+    )
+
+
+class PaymentMandateVerifier:
+  """Verifies PaymentMandate user authorizations, memoizing the results."""
+
+  def __init__(
+      self,
+      jwks: JwksCache,
+      *,
+      audience: str | None = None,
+      strict: bool = False,
+      memo_size: int = 4096,
+      memo_ttl_seconds: float = 300.0,
+  ):
+    """Initialization.
 
-def validate_payment_mandate_signature(payment_mandate: PaymentMandate) -> None:
-  """Validates the PaymentMandate signature.
+    Args:
+      jwks: The cache of trusted issuer keys.
+      audience: The 'aud' expected in key-binding JWTs; None accepts any.
+      strict: Whether authorizations that are not JWTs are rejected.
+      memo_size: Maximum number of memoized verifications.
+      memo_ttl_seconds: How long a successful verification is reused.
+    """
+    self._jwks = jwks
+    self._audience = audience
+    self._strict = strict
+    self._memo_size = memo_size
+    self._memo_ttl_seconds = memo_ttl_seconds
+    self._memo: collections.OrderedDict[str, float] = (
+        collections.OrderedDict()
+    )
+    # Key-binding nonce -> (memo key of its presentation, expiry).
+    self._nonces: collections.OrderedDict[str, tuple[str, float]] = (
+        collections.OrderedDict()
+    )
+
+  @classmethod
+  def from_env(cls) -> "PaymentMandateVerifier":
+    """Creates a verifier configured by environment variables."""
+    trusted_issuers = json.loads(os.environ.get("AP2_TRUSTED_ISSUERS", "{}"))
+    jwks = JwksCache(
+        trusted_issuers,
+        ttl_seconds=float(os.environ.get("AP2_JWKS_TTL_SECONDS", "3600")),
+    )
+    mode = os.environ.get("AP2_MANDATE_VERIFICATION", "permissive")
+    return cls(
+        jwks,
+        audience=os.environ.get("AP2_MANDATE_AUDIENCE") or None,
+        strict=mode == "strict",
+    )
+
+  def _memo_key(self, payment_mandate: PaymentMandate) -> str:
+    return hashlib.sha256(
+        (
+            payment_mandate.user_authorization
+            + "\x1e"
+            + payment_mandate_contents_hash(payment_mandate)
+        ).encode("utf-8")
+    ).hexdigest()
+
+  def _memo_hit(self, key: str) -> bool:
+    expires_at = self._memo.get(key)
+    if expires_at is None:
+      return False
+    if expires_at <= time.time():
+      del self._memo[key]
+      return False
+    self._memo.move_to_end(key)
+    return True
+
+  def _remember(self, key: str, token_exp: float) -> None:
+    self._memo[key] = min(time.time() + self._memo_ttl_seconds, token_exp)
+    if len(self._memo) > self._memo_size:
+      self._memo.popitem(last=False)
+
+  def _use_nonce(self, nonce: str, key: str, expires_at: float) -> None:
+    """Records a key-binding nonce, rejecting its reuse elsewhere."""
+    now = time.time()
+    while self._nonces:
+      oldest_expiry = next(iter(self._nonces.values()))[1]
+      if oldest_expiry > now and len(self._nonces) < self._memo_size:
+        break
+      self._nonces.popitem(last=False)
+    seen = self._nonces.get(nonce)
+    if seen is not None and seen[0] != key and seen[1] > now:
+      raise ValueError("Key-binding nonce was already used.")
+    self._nonces[nonce] = (key, expires_at)
+
+  async def verify(self, payment_mandate: PaymentMandate) -> None:
+    """Verifies the user authorization of a PaymentMandate.
+
+    Args:
+      payment_mandate: The PaymentMandate to be verified.
+
+    Raises:
+      ValueError: If the user authorization is missing or not valid.
+    """
+    authorization = payment_mandate.user_authorization
+    if authorization is None:
+      raise ValueError("User authorization not found in PaymentMandate.")
+    if not _looks_like_jwt(authorization):
+      if self._strict:
+        raise ValueError("User authorization is not a JWT or SD-JWT.")
+      logging.info("Accepted opaque user authorization (permissive mode).")
+      return
+
+    key = self._memo_key(payment_mandate)
+    if self._memo_hit(key):
+      return
+    token_exp, nonce = await self._verify_presentation(
+        authorization, payment_mandate
+    )
+    self._use_nonce(nonce, key, token_exp)
+    self._remember(key, token_exp)
+
+  async def verify_many(
+      self, payment_mandates: list[PaymentMandate]
+  ) -> list[Exception | None]:
+    """Verifies several PaymentMandates, fetching each issuer's keys once.
+
+    Args:
+      payment_mandates: The PaymentMandates to be verified.
+
+    Returns:
+      For each mandate, None if it is valid or the verification error.
+    """
+    issuers = set()
+    for payment_mandate in payment_mandates:
+      authorization = payment_mandate.user_authorization or ""
+      if _looks_like_jwt(authorization):
+        try:
+          issuers.add(self._unverified_claims(authorization).get("iss"))
+        except ValueError:
+          pass
+    await self._jwks.prefetch(issuers)
+    results = await asyncio.gather(
+        *(self.verify(payment_mandate) for payment_mandate in payment_mandates),
+        return_exceptions=True,
+    )
+    return [
+        result if isinstance(result, Exception) else None
+        for result in results
+    ]
+
+  def _unverified_claims(self, authorization: str) -> dict[str, Any]:
+    issuer_jwt = authorization.split("~", 1)[0]
+    try:
+      return json.loads(_b64url_decode(issuer_jwt.split(".")[1]))
+    except (ValueError, IndexError) as e:
+      raise ValueError("Malformed user authorization.") from e
+
+  def _decode(
+      self,
+      token: str,
+      key: dict[str, Any],
+      *,
+      require: list[str],
+      audience: str | None = None,
+  ) -> dict[str, Any]:
+    """Verifies a JWT signature, its time claims and required claims."""
+    if jwt is None:
+      raise ValueError("PyJWT is required to verify user authorizations.")
+    try:
+      algorithm = jwt.get_unverified_header(token).get("alg")
+      if algorithm not in _ALLOWED_ALGORITHMS:
+        raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+      return jwt.decode(
+          token,
+          key=jwt.PyJWK(key, algorithm).key,
+          algorithms=[algorithm],
+          audience=audience,
+          options={"verify_aud": audience is not None, "require": require},
+          leeway=_LEEWAY_SECONDS,
+      )
+    except jwt.PyJWTError as e:
+      raise ValueError(f"Invalid user authorization: {e}") from e
+
+  async def _verify_presentation(
+      self, authorization: str, payment_mandate: PaymentMandate
+  ) -> tuple[float, str]:
+    """Verifies an SD-JWT+KB presentation bound to the mandate.
+
+    Args:
+      authorization: The user authorization of the mandate.
+      payment_mandate: The PaymentMandate the authorization must cover.
+
+    Returns:
+      The time until which the presentation is valid, and the key-binding
+      nonce.
+
+    Raises:
+      ValueError: If the presentation is not valid for this mandate.
+    """
+    parts = authorization.split("~")
+    if len(parts) < 2 or not parts[-1]:
+      raise ValueError("User authorization has no key-binding JWT.")
+    issuer_jwt = parts[0]
+    unverified = self._unverified_claims(authorization)
+    header = json.loads(_b64url_decode(issuer_jwt.split(".")[0]))
+    issuer_key = await self._jwks.get_key(
+        unverified.get("iss"), header.get("kid")
+    )
+    claims = self._decode(issuer_jwt, issuer_key, require=["exp"])
+
+    # The last part is the key-binding JWT, signed by the holder key that the
+    # issuer bound in 'cnf'.
+    holder_key = claims.get("cnf", {}).get("jwk")
+    if holder_key is None:
+      raise ValueError("Issuer JWT has no cnf key for key binding.")
+    binding_claims = self._decode(
+        parts[-1],
+        holder_key,
+        require=["iat", "aud", "nonce"],
+        audience=self._audience,
+    )
+    presented = authorization[: authorization.rindex("~") + 1]
+    if binding_claims.get("sd_hash") != _b64url_sha256(
+        presented.encode("ascii")
+    ):
+      raise ValueError("Key-binding JWT sd_hash does not match.")
+    issued_at = float(binding_claims["iat"])
+    if issued_at + _KEY_BINDING_MAX_AGE_SECONDS + _LEEWAY_SECONDS < time.time():
+      raise ValueError("Key-binding JWT is too old.")
+
+    transaction_data = binding_claims.get("transaction_data")
+    if not isinstance(transaction_data, list) or (
+        payment_mandate_contents_hash(payment_mandate) not in transaction_data
+    ):
+      raise ValueError("User authorization does not cover this mandate.")
+
+    expiries = [
+        float(claims["exp"]),
+        issued_at + _KEY_BINDING_MAX_AGE_SECONDS,
+    ]
+    if binding_claims.get("exp") is not None:
+      expiries.append(float(binding_claims["exp"]))
+    return min(expiries), str(binding_claims["nonce"])
+
+
+_verifier: PaymentMandateVerifier | None = None
+
+
+def get_verifier() -> PaymentMandateVerifier:
+  """Returns the process-wide PaymentMandateVerifier."""
+  global _verifier
+  if _verifier is None:
+    _verifier = PaymentMandateVerifier.from_env()
+  return _verifier
+
+
+async def verify_payment_mandate_signature(
+    payment_mandate: PaymentMandate,
+) -> None:
+  """Verifies the PaymentMandate signature with the shared verifier.
 
   Args:
     payment_mandate: The PaymentMandate to be validated.
@@ -28,10 +459,6 @@ def validate_payment_mandate_signature(payment_mandate: PaymentMandate) -> None:
   Raises:
     ValueError: If the PaymentMandate signature is not valid.
   """
-  # In a real implementation, full validation logic would reside here. For
-  # demonstration purposes, we simply log that the authorization field is
-  # populated.
-  if payment_mandate.user_authorization is None:
-    raise ValueError("User authorization not found in PaymentMandate.")
-
+  await get_verifier().verify(payment_mandate)
   logging.info("Valid PaymentMandate found.")
+
@@ -18,9 +18,19 @@ The watch.log file is a log file meant to be watched in parallel with running a
 scenario.  It will contain all the requests and responses to/from the agent
 that are sent to/from the client, so engineers can see what is happening
 between the servers in real time.
+
+Records go through a queue and are written by a single listener thread, so
+logging never blocks the event loop on file I/O. The file rotates by size.
+Each A2A message becomes one JSON line that identifies the mandates it
+carries rather than dumping them.
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
 from typing import Any
 
 from a2a.server.agent_execution.context import RequestContext
@@ -31,85 +41,124 @@ from ap2.types.mandate import PAYMENT_MANDATE_DATA_KEY
 
 _logger = logging.getLogger(__name__)
 
+_WATCH_LOG_PATH = ".logs/watch.log"
+_MAX_BYTES = int(os.environ.get("WATCH_LOG_MAX_BYTES", str(10 * 2**20)))
+_BACKUP_COUNT = int(os.environ.get("WATCH_LOG_BACKUP_COUNT", "5"))
+# Longer request instructions are truncated.
+_MAX_TEXT_CHARS = 500
+
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_listener: logging.handlers.QueueListener | None = None
+
+
+class _JsonFormatter(logging.Formatter):
+  """Formats records carrying a `watch` payload as one JSON line."""
 
-def create_file_handler() -> logging.FileHandler:
-  """Creates a file handler to the logger for watch.log.
+  def format(self, record: logging.LogRecord) -> str:
+    payload = getattr(record, "watch", None)
+    if payload is None:
+      return super().format(record)
+    return json.dumps(
+        {"ts": record.created, "logger": record.name, **payload},
+        default=str,
+        separators=(",", ":"),
+    )
+
+
+def create_file_handler() -> logging.handlers.RotatingFileHandler:
+  """Creates a size-rotated file handler for watch.log.
 
   Returns:
-      A logging.FileHandler instance configured for 'watch.log'.
+      A logging.handlers.RotatingFileHandler configured for 'watch.log'.
   """
-  file_handler = logging.FileHandler(".logs/watch.log")
+  os.makedirs(os.path.dirname(_WATCH_LOG_PATH), exist_ok=True)
+  file_handler = logging.handlers.RotatingFileHandler(
+      _WATCH_LOG_PATH, maxBytes=_MAX_BYTES, backupCount=_BACKUP_COUNT
+  )
   file_handler.setLevel(logging.INFO)
-  file_handler.setFormatter(logging.Formatter("%(message)s"))
+  file_handler.setFormatter(_JsonFormatter("%(message)s"))
   return file_handler
 
 
-def log_a2a_message_parts(
-    text_parts: list[str], data_parts: list[dict[str, Any]]
-):
-  _load_logger()
+def create_queue_handler() -> logging.handlers.QueueHandler:
+  """Creates a handler that hands records to the watch.log writer thread.
 
-  """Logs the A2A message parts to the watch.log file."""
-  _log_request_instructions(text_parts)
-  _log_mandates(data_parts)
-  _log_extra_data(data_parts)
-
-
-def log_a2a_request_extensions(context: RequestContext) -> None:
-  """Logs the A2A extensions activated to the watch.log file."""
-
-  if not context.call_context.activated_extensions:
+  Returns:
+      A logging.handlers.QueueHandler feeding the shared watch.log listener.
+  """
+  global _listener
+  if _listener is None:
+    _listener = logging.handlers.QueueListener(_queue, create_file_handler())
+    _listener.start()
+    atexit.register(_listener.stop)
+  return logging.handlers.QueueHandler(_queue)
+
+
+def log_a2a_message(
+    context: RequestContext,
+    text_parts: list[str],
+    data_parts: list[dict[str, Any]],
+) -> None:
+  """Logs an incoming A2A message to watch.log as a single JSON line.
+
+  Args:
+    context: The A2A RequestContext.
+    text_parts: The contents of the message's TextParts.
+    data_parts: The contents of the message's DataParts.
+  """
+  _load_logger()
+  if not _logger.isEnabledFor(logging.INFO):
     return
 
-  _logger.info("\n")
-  _logger.info("[A2A Extensions Activated in the Request]")
-
-  for extension in context.call_context.requested_extensions:
-    _logger.info(extension)
+  mandates = []
+  data_keys = []
+  for data_part in data_parts:
+    for key, value in data_part.items():
+      mandate = _summarize_mandate(key, value)
+      if mandate is not None:
+        mandates.append(mandate)
+      else:
+        data_keys.append(key)
+
+  _logger.info(
+      "a2a_message",
+      extra={
+          "watch": {
+              "event": "a2a_message",
+              "context_id": context.context_id,
+              "task_id": context.task_id,
+              "extensions": sorted(context.call_context.activated_extensions),
+              "instructions": [text[:_MAX_TEXT_CHARS] for text in text_parts],
+              "mandates": mandates,
+              "data_keys": data_keys,
+          }
+      },
+  )
 
 
 def _load_logger():
   if not _logger.handlers:
-    _logger.addHandler(create_file_handler())
-
-
-def _log_request_instructions(text_parts: list[str]) -> None:
-  """Logs the request instructions from the text parts."""
-  _logger.info("\n")
-  _logger.info("[Request Instructions]")
-  _logger.info(text_parts)
-
-
-def _log_mandates(data_parts: list[dict[str, Any]]) -> None:
-  """Extracts and logs mandates from the data parts."""
-
-  for data_part in data_parts:
-    for key, value in data_part.items():
-      if key == CART_MANDATE_DATA_KEY:
-        _logger.info("\n")
-        _logger.info("[A Cart Mandate was in the request Data]")
-        _logger.info(value)
-      elif key == INTENT_MANDATE_DATA_KEY:
-        _logger.info("\n")
-        _logger.info("[An Intent Mandate was in the request Data]")
-        _logger.info(value)
-      elif key == PAYMENT_MANDATE_DATA_KEY:
-        _logger.info("\n")
-        _logger.info("[A Payment Mandate was in the request Data]")
-        _logger.info(value)
-
-
-def _log_extra_data(data_parts: list[dict[str, Any]]) -> None:
-  """Extracts and logs extra data from the data parts."""
-  for data_part in data_parts:
-    for key, value in data_part.items():
-      if (
-          key == CART_MANDATE_DATA_KEY
-          or key == INTENT_MANDATE_DATA_KEY
-          or key == PAYMENT_MANDATE_DATA_KEY
-      ):
-        continue
-
-      _logger.info("\n")
-      _logger.info("[Data Part: %s] ", key)
-      _logger.info(value)
+    _logger.addHandler(create_queue_handler())
+
+
+def _summarize_mandate(key: str, value: Any) -> dict[str, Any] | None:
+  """Identifies a mandate by type and id, or returns None for other data."""
+  if not isinstance(value, dict):
+    return None
+  if key == CART_MANDATE_DATA_KEY:
+    contents = value.get("contents") or {}
+    return {
+        "type": "cart",
+        "id": contents.get("id"),
+        "expiry": contents.get("cart_expiry"),
+    }
+  if key == INTENT_MANDATE_DATA_KEY:
+    return {"type": "intent", "expiry": value.get("intent_expiry")}
+  if key == PAYMENT_MANDATE_DATA_KEY:
+    contents = value.get("payment_mandate_contents") or {}
+    return {
+        "type": "payment",
+        "id": contents.get("payment_mandate_id"),
+        "signed": bool(value.get("user_authorization")),
+    }
+  return None
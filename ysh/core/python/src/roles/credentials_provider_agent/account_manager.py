@@ -16,8 +16,18 @@
 
 Each 'account' contains a user's payment methods and shipping address.
 For demonstration purposes, several accounts are pre-populated with sample data.
+
+Payment methods are indexed by casefolded alias, so alias lookups are O(1).
+Payment credential tokens are cryptographically random and expire after
+CREDENTIALS_TOKEN_TTL_SECONDS. They are kept in memory by default. Setting
+CREDENTIALS_TOKEN_DB to a SQLite file path shares them across workers.
 """
 
+import os
+import secrets
+import sqlite3
+import threading
+import time
 from typing import Any
 
 
@@ -96,7 +106,146 @@ _account_db = {
 }
 
 
-_token = {}
+def _build_alias_index(
+    account_db: dict[str, Any],
+) -> dict[str, dict[str, dict[str, Any]]]:
+  """Indexes each account's payment methods by their casefolded alias."""
+  index = {}
+  for email_address, account in account_db.items():
+    methods = {}
+    for payment_method in account.get("payment_methods", {}).values():
+      # Keep the first method for an alias, as the linear search did.
+      methods.setdefault(payment_method["alias"].casefold(), payment_method)
+    index[email_address] = methods
+  return index
+
+
+_alias_index = _build_alias_index(_account_db)
+
+
+class InMemoryTokenStore:
+  """Payment credential tokens held in process memory."""
+
+  _PURGE_INTERVAL_SECONDS = 60.0
+
+  def __init__(self):
+    self._tokens: dict[str, dict[str, Any]] = {}
+    self._lock = threading.Lock()
+    self._purged_at = 0.0
+
+  def put(self, token: str, record: dict[str, Any]) -> None:
+    with self._lock:
+      now = time.time()
+      if now - self._purged_at >= self._PURGE_INTERVAL_SECONDS:
+        self._purged_at = now
+        self._tokens = {
+            t: r for t, r in self._tokens.items() if r["expires_at"] > now
+        }
+      self._tokens[token] = record
+
+  def get(self, token: str) -> dict[str, Any] | None:
+    with self._lock:
+      record = self._tokens.get(token)
+    if record is None or record["expires_at"] <= time.time():
+      return None
+    return dict(record)
+
+  def bind_payment_mandate(self, token: str, payment_mandate_id: str) -> bool:
+    """Sets the payment mandate id unless one is already set."""
+    with self._lock:
+      record = self._tokens.get(token)
+      if record is None or record["expires_at"] <= time.time():
+        raise ValueError(f"Token {token} not found")
+      if record["payment_mandate_id"]:
+        return False
+      record["payment_mandate_id"] = payment_mandate_id
+      return True
+
+
+class SqliteTokenStore:
+  """Payment credential tokens in SQLite, shared by every worker."""
+
+  def __init__(self, path: str):
+    self._conn = sqlite3.connect(
+        path, check_same_thread=False, isolation_level=None
+    )
+    self._conn.execute("PRAGMA journal_mode=WAL")
+    self._conn.execute(
+        "CREATE TABLE IF NOT EXISTS tokens ("
+        " token TEXT PRIMARY KEY,"
+        " email_address TEXT NOT NULL,"
+        " payment_method_alias TEXT NOT NULL,"
+        " payment_mandate_id TEXT,"
+        " expires_at REAL NOT NULL)"
+    )
+    self._lock = threading.Lock()
+
+  def put(self, token: str, record: dict[str, Any]) -> None:
+    with self._lock:
+      self._conn.execute(
+          "DELETE FROM tokens WHERE expires_at <= ?", (time.time(),)
+      )
+      self._conn.execute(
+          "INSERT INTO tokens VALUES (?, ?, ?, ?, ?)",
+          (
+              token,
+              record["email_address"],
+              record["payment_method_alias"],
+              record["payment_mandate_id"],
+              record["expires_at"],
+          ),
+      )
+
+  def get(self, token: str) -> dict[str, Any] | None:
+    with self._lock:
+      row = self._conn.execute(
+          "SELECT email_address, payment_method_alias, payment_mandate_id,"
+          " expires_at FROM tokens WHERE token = ? AND expires_at > ?",
+          (token, time.time()),
+      ).fetchone()
+    if row is None:
+      return None
+    return dict(
+        zip(
+            (
+                "email_address",
+                "payment_method_alias",
+                "payment_mandate_id",
+                "expires_at",
+            ),
+            row,
+        )
+    )
+
+  def bind_payment_mandate(self, token: str, payment_mandate_id: str) -> bool:
+    """Sets the payment mandate id unless one is already set."""
+    now = time.time()
+    with self._lock:
+      updated = self._conn.execute(
+          "UPDATE tokens SET payment_mandate_id = ? WHERE token = ?"
+          " AND payment_mandate_id IS NULL AND expires_at > ?",
+          (payment_mandate_id, token, now),
+      ).rowcount
+      if updated:
+        return True
+      exists = self._conn.execute(
+          "SELECT 1 FROM tokens WHERE token = ? AND expires_at > ?",
+          (token, now),
+      ).fetchone()
+    if exists is None:
+      raise ValueError(f"Token {token} not found")
+    return False
+
+
+def _create_token_store() -> InMemoryTokenStore | SqliteTokenStore:
+  path = os.environ.get("CREDENTIALS_TOKEN_DB")
+  return SqliteTokenStore(path) if path else InMemoryTokenStore()
+
+
+_TOKEN_TTL_SECONDS = float(
+    os.environ.get("CREDENTIALS_TOKEN_TTL_SECONDS", "900")
+)
+_token_store = _create_token_store()
 
 
 def create_token(email_address: str, payment_method_alias: str) -> str:
@@ -109,13 +258,17 @@ def create_token(email_address: str, payment_method_alias: str) -> str:
   Returns:
     The token for the payment method.
   """
-  token = f"fake_payment_credential_token_{len(_token)}"
-
-  _token[token] = {
-      "email_address": email_address,
-      "payment_method_alias": payment_method_alias,
-      "payment_mandate_id": None,
-  }
+  token = f"payment_credential_token_{secrets.token_urlsafe(24)}"
+
+  _token_store.put(
+      token,
+      {
+          "email_address": email_address,
+          "payment_method_alias": payment_method_alias,
+          "payment_mandate_id": None,
+          "expires_at": time.time() + _TOKEN_TTL_SECONDS,
+      },
+  )
 
   return token
 
@@ -123,16 +276,17 @@ def create_token(email_address: str, payment_method_alias: str) -> str:
 def update_token(token: str, payment_mandate_id: str) -> None:
   """Updates the token with the payment mandate id.
 
+  The payment mandate id is not overwritten if it is already set.
+
   Args:
     token: The token to update.
     payment_mandate_id: The payment mandate id to associate with the token.
+
+  Raises:
+    ValueError: If the token does not exist or has expired.
   """
-  if token not in _token:
-    raise ValueError(f"Token {token} not found")
-  if _token[token].get("payment_mandate_id"):
-    # Do not overwrite the payment mandate id if it is already set.
-    return
-  _token[token]["payment_mandate_id"] = payment_mandate_id
+  _token_store.bind_payment_mandate(token, payment_mandate_id)
+
 
 def verify_token(token: str, payment_mandate_id: str) -> dict[str, Any]:
   """Look up an account by token.
@@ -142,10 +296,13 @@ def verify_token(token: str, payment_mandate_id: str) -> dict[str, Any]:
     payment_mandate_id: The payment mandate id associated with the token.
 
   Returns:
-    The account for the given token, or status:invalid_token if the token is not
-    valid.
+    The payment method for the given token.
+
+  Raises:
+    ValueError: If the token is unknown, expired, or bound to another payment
+      mandate.
   """
-  account_lookup = _token.get(token, {})
+  account_lookup = _token_store.get(token)
   if not account_lookup:
     raise ValueError("Invalid token")
   if account_lookup.get("payment_mandate_id") != payment_mandate_id:
@@ -196,13 +353,4 @@ def get_payment_method_by_alias(
     The payment method for the given account and alias, or status:not_found.
   """
 
-  payment_methods = list(
-      filter(
-          lambda payment_method: payment_method.get("alias").casefold()
-          == alias.casefold(),
-          get_account_payment_methods(email_address),
-      )
-  )
-  if not payment_methods:
-    return None
-  return payment_methods[0]
+  return _alias_index.get(email_address, {}).get(alias.casefold())
@@ -31,8 +31,11 @@ invoking it to complete a task.
 
 from typing import Any
 
+from ap2.types.payment_request import PAYMENT_METHOD_DATA_DATA_KEY
+
 from . import tools
 from common.base_server_executor import BaseServerExecutor
+from common.function_call_resolver import RoutingRule
 from common.system_utils import DEBUG_MODE_INSTRUCTIONS
 
 
@@ -66,4 +69,19 @@ class CredentialsProviderExecutor(BaseServerExecutor):
         tools.handle_search_payment_methods,
         tools.handle_signed_payment_mandate,
     ]
-    super().__init__(supported_extensions, agent_tools, self._system_prompt)
+    # Requests carrying a PaymentMandate are either a signed mandate or a
+    # processor asking for credentials; those are left to the model.
+    routing_rules = [
+        RoutingRule.for_tool(tools.handle_get_shipping_address, ["user_email"]),
+        RoutingRule.for_tool(
+            tools.handle_search_payment_methods,
+            ["user_email", PAYMENT_METHOD_DATA_DATA_KEY],
+        ),
+        RoutingRule.for_tool(
+            tools.handle_create_payment_credential_token,
+            ["user_email", "payment_method_alias"],
+        ),
+    ]
+    super().__init__(
+        supported_extensions, agent_tools, self._system_prompt, routing_rules
+    )
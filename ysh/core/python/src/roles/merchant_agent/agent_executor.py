@@ -37,10 +37,14 @@ from a2a.types import Part
 from a2a.types import Task
 from a2a.types import TextPart
 
+from ap2.types.mandate import INTENT_MANDATE_DATA_KEY
+from ap2.types.mandate import PAYMENT_MANDATE_DATA_KEY
+
 from . import tools
 from .sub_agents import catalog_agent
 from common import message_utils
 from common.base_server_executor import BaseServerExecutor
+from common.function_call_resolver import RoutingRule
 from common.system_utils import DEBUG_MODE_INSTRUCTIONS
 
 
@@ -75,7 +79,23 @@ class MerchantAgentExecutor(BaseServerExecutor):
         tools.initiate_payment,
         tools.dpc_finish,
     ]
-    super().__init__(supported_extensions, agent_tools, self._system_prompt)
+    routing_rules = [
+        RoutingRule.for_tool(
+            tools.update_cart, ["cart_id", "shipping_address"]
+        ),
+        RoutingRule.for_tool(
+            catalog_agent.find_items_workflow, [INTENT_MANDATE_DATA_KEY]
+        ),
+        RoutingRule.for_tool(
+            tools.initiate_payment,
+            [PAYMENT_MANDATE_DATA_KEY],
+            excluded_keys=["dpc_response"],
+        ),
+        RoutingRule.for_tool(tools.dpc_finish, ["dpc_response"]),
+    ]
+    super().__init__(
+        supported_extensions, agent_tools, self._system_prompt, routing_rules
+    )
 
   async def _handle_request(
       self,
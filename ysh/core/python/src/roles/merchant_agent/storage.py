@@ -12,36 +12,321 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""In-memory storage for CartMandates.
+"""Storage for CartMandates and risk data.
 
 A CartMandate may be updated multiple times during the course of a shopping
 journey. This storage system is used to persist CartMandates between
 interactions between the shopper and merchant agents.
+
+CartMandates and risk data are kept in separate namespaces. Carts are evicted
+once their cart_expiry passes, and risk data after a fixed TTL. Both
+namespaces are capped in size. By default everything lives in memory. When
+MERCHANT_STORE_REDIS_URL is set, the data lives in Redis instead, so several
+merchant replicas can share carts.
+
+The module functions are coroutines so the Redis store never blocks the
+event loop of the agent's tool handlers.
 """
 
-from typing import Optional
+from datetime import datetime
+from datetime import timezone
+import heapq
+import json
+import os
+import threading
+import time
+from typing import Any, Generic, Optional, TypeVar
 
 from ap2.types.mandate import CartMandate
 
+try:
+  from redis import asyncio as redis_asyncio
+except ImportError:  # Redis is only needed for a shared store.
+  redis_asyncio = None
+
+
+_T = TypeVar("_T")
+
+# Used when a cart_expiry is missing or cannot be parsed.
+_DEFAULT_CART_TTL_SECONDS = 30 * 60
+
+
+def _cart_expires_at(cart_mandate: CartMandate) -> float:
+  """Returns the cart_expiry of a CartMandate as a POSIX timestamp."""
+  try:
+    expiry = datetime.fromisoformat(cart_mandate.contents.cart_expiry)
+  except ValueError:
+    return time.time() + _DEFAULT_CART_TTL_SECONDS
+  if expiry.tzinfo is None:
+    expiry = expiry.replace(tzinfo=timezone.utc)
+  return expiry.timestamp()
+
+
+class _ExpiringNamespace(Generic[_T]):
+  """A size-bounded map whose entries are evicted at an expiry time.
+
+  Expiry times are kept in a min-heap, so eviction only looks at entries that
+  are due. Heap entries made stale by an update are skipped when popped.
+  """
+
+  def __init__(self, max_entries: int):
+    self._max_entries = max_entries
+    self._values: dict[str, tuple[float, _T]] = {}
+    self._heap: list[tuple[float, str]] = []
+    self.evictions = 0
+
+  def get(self, key: str, now: float) -> Optional[_T]:
+    entry = self._values.get(key)
+    if entry is None:
+      return None
+    if entry[0] <= now:
+      self._evict_expired(now)
+      return None
+    return entry[1]
+
+  def set(self, key: str, value: _T, expires_at: float, now: float) -> None:
+    self._values[key] = (expires_at, value)
+    heapq.heappush(self._heap, (expires_at, key))
+    self._evict_expired(now)
+    while len(self._values) > self._max_entries:
+      # Over capacity: drop the entries closest to expiring.
+      self._pop_earliest()
+    if len(self._heap) > 2 * len(self._values) + 64:
+      # Too many stale heap entries from updates: rebuild the heap.
+      self._heap = [(exp, k) for k, (exp, _) in self._values.items()]
+      heapq.heapify(self._heap)
+
+  def __len__(self) -> int:
+    return len(self._values)
+
+  def _pop_heap(self) -> bool:
+    """Pops the top heap entry; evicts its key unless the entry is stale."""
+    expires_at, key = heapq.heappop(self._heap)
+    entry = self._values.get(key)
+    if entry is None or entry[0] != expires_at:
+      return False
+    del self._values[key]
+    self.evictions += 1
+    return True
+
+  def _pop_earliest(self) -> None:
+    while self._heap and not self._pop_heap():
+      pass
+
+  def _evict_expired(self, now: float) -> None:
+    # Pops one heap entry at a time: skipping a stale entry must not evict
+    # the next live one before it is due.
+    while self._heap and self._heap[0][0] <= now:
+      self._pop_heap()
+
+
+class InMemoryMerchantStore:
+  """Bounded, expiring in-process storage for a single merchant replica."""
+
+  def __init__(
+      self,
+      *,
+      max_carts: int = 10_000,
+      max_risk_data: int = 10_000,
+      risk_data_ttl_seconds: float = 3600.0,
+  ):
+    """Initialization.
+
+    Args:
+      max_carts: Maximum number of CartMandates kept.
+      max_risk_data: Maximum number of risk data entries kept.
+      risk_data_ttl_seconds: How long risk data is kept after it is set.
+    """
+    self._carts: _ExpiringNamespace[CartMandate] = _ExpiringNamespace(
+        max_carts
+    )
+    self._risk_data: _ExpiringNamespace[Any] = _ExpiringNamespace(
+        max_risk_data
+    )
+    self._risk_data_ttl_seconds = risk_data_ttl_seconds
+    self._lock = threading.Lock()
+
+  async def get_cart_mandate(self, cart_id: str) -> Optional[CartMandate]:
+    with self._lock:
+      return self._carts.get(cart_id, time.time())
+
+  async def set_cart_mandate(
+      self, cart_id: str, cart_mandate: CartMandate
+  ) -> None:
+    expires_at = _cart_expires_at(cart_mandate)
+    with self._lock:
+      self._carts.set(cart_id, cart_mandate, expires_at, time.time())
+
+  async def get_risk_data(self, context_id: str) -> Optional[Any]:
+    with self._lock:
+      return self._risk_data.get(context_id, time.time())
 
-def get_cart_mandate(cart_id: str) -> Optional[CartMandate]:
-  """Get a cart mandate by cart ID."""
-  return _store.get(cart_id)
+  async def set_risk_data(self, context_id: str, risk_data: Any) -> None:
+    now = time.time()
+    with self._lock:
+      self._risk_data.set(
+          context_id, risk_data, now + self._risk_data_ttl_seconds, now
+      )
 
+  async def metrics(self) -> dict[str, int]:
+    with self._lock:
+      return {
+          "carts": len(self._carts),
+          "cart_evictions": self._carts.evictions,
+          "risk_data": len(self._risk_data),
+          "risk_data_evictions": self._risk_data.evictions,
+      }
 
-def set_cart_mandate(cart_id: str, cart_mandate: CartMandate) -> None:
-  """Set a cart mandate by cart ID."""
-  _store[cart_id] = cart_mandate
 
+class RedisMerchantStore:
+  """Storage shared by merchant replicas; Redis enforces the expiries.
 
-def set_risk_data(context_id: str, risk_data: str) -> None:
+  Each namespace also keeps a sorted set of its keys by expiry time. Pruning
+  it counts the entries Redis has expired, which gives per-namespace sizes
+  and eviction counters.
+  """
+
+  # KEYS: expiry sorted set, evictions counter. ARGV: current time.
+  _PRUNE_SCRIPT = """
+      local expired = redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+      if expired > 0 then
+        redis.call('INCRBY', KEYS[2], expired)
+      end
+      return redis.call('ZCARD', KEYS[1])
+  """
+
+  def __init__(
+      self,
+      url: str,
+      *,
+      risk_data_ttl_seconds: float = 3600.0,
+      key_prefix: str = "merchant",
+  ):
+    """Initialization.
+
+    Args:
+      url: The Redis URL, e.g. redis://localhost:6379/0.
+      risk_data_ttl_seconds: How long risk data is kept after it is set.
+      key_prefix: Prefix of the Redis keys, to share a database.
+    """
+    if redis_asyncio is None:
+      raise RuntimeError("The redis package is required for a shared store.")
+    self._redis = redis_asyncio.from_url(url)
+    self._prune = self._redis.register_script(self._PRUNE_SCRIPT)
+    self._risk_data_ttl_seconds = risk_data_ttl_seconds
+    self._key_prefix = key_prefix
+
+  def _key(self, namespace: str, key: str) -> str:
+    return f"{self._key_prefix}:{namespace}:{key}"
+
+  def _expiry_key(self, namespace: str) -> str:
+    return f"{self._key_prefix}:expiry:{namespace}"
+
+  def _evictions_key(self, namespace: str) -> str:
+    return f"{self._key_prefix}:evictions:{namespace}"
+
+  async def _set(
+      self, namespace: str, key: str, value: str, expires_at: float
+  ) -> None:
+    now = time.time()
+    ttl_ms = int((expires_at - now) * 1000)
+    async with self._redis.pipeline(transaction=True) as pipe:
+      if ttl_ms <= 0:
+        pipe.delete(self._key(namespace, key))
+        pipe.zrem(self._expiry_key(namespace), key)
+      else:
+        pipe.set(self._key(namespace, key), value, px=ttl_ms)
+        pipe.zadd(self._expiry_key(namespace), {key: expires_at})
+      await pipe.execute()
+    await self._prune_namespace(namespace, now)
+
+  async def _prune_namespace(self, namespace: str, now: float) -> int:
+    """Drops expired keys from the expiry index; returns the live size."""
+    return await self._prune(
+        keys=[self._expiry_key(namespace), self._evictions_key(namespace)],
+        args=[now],
+    )
+
+  async def get_cart_mandate(self, cart_id: str) -> Optional[CartMandate]:
+    data = await self._redis.get(self._key("cart", cart_id))
+    return CartMandate.model_validate_json(data) if data is not None else None
+
+  async def set_cart_mandate(
+      self, cart_id: str, cart_mandate: CartMandate
+  ) -> None:
+    await self._set(
+        "cart",
+        cart_id,
+        cart_mandate.model_dump_json(exclude_none=True),
+        _cart_expires_at(cart_mandate),
+    )
+
+  async def get_risk_data(self, context_id: str) -> Optional[Any]:
+    data = await self._redis.get(self._key("risk", context_id))
+    return json.loads(data) if data is not None else None
+
+  async def set_risk_data(self, context_id: str, risk_data: Any) -> None:
+    await self._set(
+        "risk",
+        context_id,
+        json.dumps(risk_data),
+        time.time() + self._risk_data_ttl_seconds,
+    )
+
+  async def metrics(self) -> dict[str, int]:
+    now = time.time()
+    carts = await self._prune_namespace("cart", now)
+    risk_data = await self._prune_namespace("risk", now)
+    cart_evictions, risk_data_evictions = await self._redis.mget(
+        [self._evictions_key("cart"), self._evictions_key("risk")]
+    )
+    return {
+        "carts": carts,
+        "cart_evictions": int(cart_evictions or 0),
+        "risk_data": risk_data,
+        "risk_data_evictions": int(risk_data_evictions or 0),
+    }
+
+
+def _create_store() -> InMemoryMerchantStore | RedisMerchantStore:
+  risk_data_ttl_seconds = float(
+      os.environ.get("MERCHANT_RISK_DATA_TTL_SECONDS", "3600")
+  )
+  redis_url = os.environ.get("MERCHANT_STORE_REDIS_URL")
+  if redis_url:
+    return RedisMerchantStore(
+        redis_url, risk_data_ttl_seconds=risk_data_ttl_seconds
+    )
+  return InMemoryMerchantStore(
+      max_carts=int(os.environ.get("MERCHANT_MAX_CARTS", "10000")),
+      max_risk_data=int(os.environ.get("MERCHANT_MAX_RISK_DATA", "10000")),
+      risk_data_ttl_seconds=risk_data_ttl_seconds,
+  )
+
+
+async def get_cart_mandate(cart_id: str) -> Optional[CartMandate]:
+  """Get a cart mandate by cart ID, unless its cart_expiry has passed."""
+  return await _store.get_cart_mandate(cart_id)
+
+
+async def set_cart_mandate(cart_id: str, cart_mandate: CartMandate) -> None:
+  """Set a cart mandate by cart ID; it is evicted at its cart_expiry."""
+  await _store.set_cart_mandate(cart_id, cart_mandate)
+
+
+async def set_risk_data(context_id: str, risk_data: Any) -> None:
   """Set risk data by context ID."""
-  _store[context_id] = risk_data
+  await _store.set_risk_data(context_id, risk_data)
 
 
-def get_risk_data(context_id: str) -> Optional[str]:
+async def get_risk_data(context_id: str) -> Optional[Any]:
   """Get risk data by context ID."""
-  return _store.get(context_id)
+  return await _store.get_risk_data(context_id)
+
+
+async def metrics() -> dict[str, int]:
+  """Size and eviction counters of each namespace of the store."""
+  return await _store.metrics()
 
 
-_store = {}
+_store = _create_store()
@@ -84,7 +84,7 @@ async def find_items_workflow(
       await _create_and_add_cart_mandate_artifact(
           item, item_count, current_time, updater
       )
-    risk_data = _collect_risk_data(updater)
+    risk_data = await _collect_risk_data(updater)
     updater.add_artifact([
         Part(root=DataPart(data={"risk_data": risk_data})),
     ])
@@ -134,7 +134,7 @@ async def _create_and_add_cart_mandate_artifact(
 
   cart_mandate = CartMandate(contents=cart_contents)
 
-  storage.set_cart_mandate(cart_mandate.contents.id, cart_mandate)
+  await storage.set_cart_mandate(cart_mandate.contents.id, cart_mandate)
   await updater.add_artifact([
       Part(
           root=DataPart(data={CART_MANDATE_DATA_KEY: cart_mandate.model_dump()})
@@ -142,9 +142,9 @@ async def _create_and_add_cart_mandate_artifact(
   ])
 
 
-def _collect_risk_data(updater: TaskUpdater) -> dict:
+async def _collect_risk_data(updater: TaskUpdater) -> dict:
   """Creates a risk_data in the tool_context."""
   # This is a fake risk data for demonstration purposes.
   risk_data = "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...fake_risk_data"
-  storage.set_risk_data(updater.context_id, risk_data)
+  await storage.set_risk_data(updater.context_id, risk_data)
   return risk_data
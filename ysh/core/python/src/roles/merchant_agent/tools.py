@@ -80,14 +80,14 @@ async def update_cart(
         await _fail_task(updater, 'Missing shipping_address.')
         return
 
-    cart_mandate = storage.get_cart_mandate(cart_id)
+    cart_mandate = await storage.get_cart_mandate(cart_id)
     if not cart_mandate:
         await _fail_task(
             updater, f'CartMandate not found for cart_id: {cart_id}'
         )
         return
 
-    risk_data = storage.get_risk_data(updater.context_id)
+    risk_data = await storage.get_risk_data(updater.context_id)
     if not risk_data:
         # Criar risk_data simulado se não existir
         risk_data = {
@@ -96,7 +96,7 @@ async def update_cart(
             'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
             'transaction_risk_score': 15,  # Baixo risco (0-100)
         }
-        storage.set_risk_data(updater.context_id, risk_data)
+        await storage.set_risk_data(updater.context_id, risk_data)
 
     # Update the CartMandate with new shipping and tax cost.
     try:
@@ -140,7 +140,7 @@ async def update_cart(
         cart_mandate.merchant_authorization = _FAKE_JWT
 
         # Atualizar o carrinho no armazenamento
-        storage.set_cart_mandate(cart_id, cart_mandate)
+        await storage.set_cart_mandate(cart_id, cart_mandate)
 
         await updater.add_artifact(
             [
@@ -201,7 +201,7 @@ async def initiate_payment(
         # Obter risk_data existente ou criar dados simulados
         risk_data = message_utils.find_data_part('risk_data', data_parts)
         if not risk_data:
-            risk_data = storage.get_risk_data(updater.context_id)
+            risk_data = await storage.get_risk_data(updater.context_id)
             if not risk_data:
                 risk_data = {
                     'device_id': 'fake_device_123',
@@ -209,7 +209,7 @@ async def initiate_payment(
                     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
                     'transaction_risk_score': 15,  # Baixo risco (0-100)
                 }
-                storage.set_risk_data(updater.context_id, risk_data)
+                await storage.set_risk_data(updater.context_id, risk_data)
 
         payment_method_type = (
             payment_mandate_contents.payment_response.method_name
@@ -29,8 +29,11 @@ invoking it to complete a task.
 
 from typing import Any
 
+from ap2.types.mandate import PAYMENT_MANDATE_DATA_KEY
+
 from . import tools
 from common.base_server_executor import BaseServerExecutor
+from common.function_call_resolver import RoutingRule
 from common.system_utils import DEBUG_MODE_INSTRUCTIONS
 
 
@@ -51,4 +54,11 @@ class PaymentProcessorExecutor(BaseServerExecutor):
     agent_tools = [
         tools.initiate_payment,
     ]
-    super().__init__(supported_extensions, agent_tools, self._system_prompt)
+    routing_rules = [
+        RoutingRule.for_tool(
+            tools.initiate_payment, [PAYMENT_MANDATE_DATA_KEY]
+        ),
+    ]
+    super().__init__(
+        supported_extensions, agent_tools, self._system_prompt, routing_rules
+    )
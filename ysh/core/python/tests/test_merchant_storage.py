@@ -0,0 +1,127 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the in-memory merchant store."""
+
+import asyncio
+from datetime import datetime
+from datetime import timezone
+
+from ap2.types.mandate import CartMandate
+from roles.merchant_agent import storage
+
+
+def _cart(cart_id: str, expires_at: float) -> CartMandate:
+  return CartMandate.model_validate({
+      "contents": {
+          "id": cart_id,
+          "user_cart_confirmation_required": True,
+          "payment_request": {
+              "method_data": [{"supported_methods": "CARD"}],
+              "details": {
+                  "id": cart_id,
+                  "display_items": [],
+                  "total": {
+                      "label": "Total",
+                      "amount": {"currency": "USD", "value": 1.0},
+                  },
+              },
+          },
+          "cart_expiry": datetime.fromtimestamp(
+              expires_at, timezone.utc
+          ).isoformat(),
+          "merchant_name": "Merchant",
+      }
+  })
+
+
+def test_get_evicts_expired_entries():
+  namespace = storage._ExpiringNamespace(max_entries=10)
+  namespace.set("a", 1, expires_at=10.0, now=0.0)
+  namespace.set("b", 2, expires_at=20.0, now=0.0)
+
+  assert namespace.get("a", now=9.0) == 1
+  assert namespace.get("a", now=10.0) is None
+  assert len(namespace) == 1
+  assert namespace.evictions == 1
+
+
+def test_updated_key_is_evicted_at_its_new_expiry():
+  namespace = storage._ExpiringNamespace(max_entries=10)
+  namespace.set("a", 1, expires_at=10.0, now=0.0)
+  namespace.set("a", 2, expires_at=30.0, now=5.0)
+
+  # The heap entry of the first value is stale and must be skipped.
+  namespace.set("b", 3, expires_at=40.0, now=15.0)
+  assert namespace.get("a", now=15.0) == 2
+  assert namespace.evictions == 0
+
+  assert namespace.get("a", now=30.0) is None
+  assert namespace.evictions == 1
+
+
+def test_stale_heap_entries_are_compacted():
+  namespace = storage._ExpiringNamespace(max_entries=10)
+  for expires_at in range(1, 200):
+    namespace.set("a", expires_at, expires_at=1000.0 + expires_at, now=0.0)
+
+  assert len(namespace._heap) <= 2 * len(namespace) + 64
+  assert namespace.get("a", now=0.0) == 199
+
+
+def test_overflow_evicts_the_entry_closest_to_expiring():
+  namespace = storage._ExpiringNamespace(max_entries=2)
+  namespace.set("late", 1, expires_at=30.0, now=0.0)
+  namespace.set("early", 2, expires_at=10.0, now=0.0)
+  namespace.set("middle", 3, expires_at=20.0, now=0.0)
+
+  assert namespace.get("early", now=0.0) is None
+  assert namespace.get("late", now=0.0) == 1
+  assert namespace.get("middle", now=0.0) == 3
+  assert namespace.evictions == 1
+
+
+def test_metrics_count_sizes_and_evictions(monkeypatch):
+  now = 1_000_000.0
+  monkeypatch.setattr(storage.time, "time", lambda: now)
+  store = storage.InMemoryMerchantStore(
+      max_carts=1, risk_data_ttl_seconds=60.0
+  )
+
+  async def run():
+    nonlocal now
+    await store.set_cart_mandate("c1", _cart("c1", now + 600))
+    await store.set_cart_mandate("c2", _cart("c2", now + 900))
+    await store.set_risk_data("ctx", {"score": 1})
+    first = await store.metrics()
+    now += 61
+    missing = await store.get_risk_data("ctx")
+    cart = await store.get_cart_mandate("c2")
+    return first, missing, await store.metrics(), cart
+
+  first, missing, second, cart = asyncio.run(run())
+  assert first == {
+      "carts": 1,
+      "cart_evictions": 1,
+      "risk_data": 1,
+      "risk_data_evictions": 0,
+  }
+  assert missing is None
+  assert second == {
+      "carts": 1,
+      "cart_evictions": 1,
+      "risk_data": 0,
+      "risk_data_evictions": 1,
+  }
+  assert cart.contents.id == "c2"
@@ -0,0 +1,216 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the PaymentMandate verifier."""
+
+import asyncio
+import base64
+import time
+
+import httpx
+import pytest
+
+jwt = pytest.importorskip("jwt")
+
+# pylint: disable=g-import-not-at-top
+from ap2.types.mandate import PaymentMandate
+from common import validation
+
+_ISSUER = "https://issuer.example"
+_JWKS_URL = "https://issuer.example/jwks"
+_AUDIENCE = "https://merchant.example"
+
+
+def _secret(name: str) -> bytes:
+  return f"{name}-secret-0123456789abcdef-0123456789".encode("ascii")
+
+
+def _jwk(name: str, kid: str | None = None) -> dict:
+  key = {
+      "kty": "oct",
+      "k": base64.urlsafe_b64encode(_secret(name)).rstrip(b"=").decode(),
+  }
+  if kid is not None:
+    key["kid"] = kid
+  return key
+
+
+def _mandate(mandate_id: str = "pm_1") -> PaymentMandate:
+  return PaymentMandate.model_validate({
+      "payment_mandate_contents": {
+          "payment_mandate_id": mandate_id,
+          "payment_details_id": "order_1",
+          "payment_details_total": {
+              "label": "Total",
+              "amount": {"currency": "USD", "value": 10.0},
+          },
+          "payment_response": {"request_id": "order_1", "method_name": "CARD"},
+          "merchant_agent": "merchant",
+      }
+  })
+
+
+def _authorize(
+    payment_mandate: PaymentMandate,
+    *,
+    kid: str = "k1",
+    nonce: str = "n1",
+    sd_hash: str | None = None,
+) -> PaymentMandate:
+  issuer_jwt = jwt.encode(
+      {"iss": _ISSUER, "cnf": {"jwk": _jwk("holder")}, "exp": time.time() + 60},
+      _secret(kid),
+      algorithm="HS256",
+      headers={"kid": kid},
+  )
+  presented = issuer_jwt + "~"
+  key_binding_jwt = jwt.encode(
+      {
+          "iat": int(time.time()),
+          "aud": _AUDIENCE,
+          "nonce": nonce,
+          "sd_hash": sd_hash or validation._b64url_sha256(presented.encode()),
+          "transaction_data": [
+              validation.payment_mandate_contents_hash(payment_mandate)
+          ],
+      },
+      _secret("holder"),
+      algorithm="HS256",
+  )
+  payment_mandate.user_authorization = presented + key_binding_jwt
+  return payment_mandate
+
+
+class _Issuer:
+  """Serves a JWKS and counts the fetches."""
+
+  def __init__(self, *kids: str):
+    self.kids = list(kids)
+    self.fetches = 0
+    self.down = False
+
+  def handle(self, request: httpx.Request) -> httpx.Response:
+    assert str(request.url) == _JWKS_URL
+    self.fetches += 1
+    if self.down:
+      return httpx.Response(503)
+    return httpx.Response(
+        200, json={"keys": [_jwk(kid, kid) for kid in self.kids]}
+    )
+
+
+@pytest.fixture(autouse=True)
+def _hmac_keys(monkeypatch):
+  # Symmetric keys keep the tests free of the cryptography package.
+  monkeypatch.setattr(validation, "_ALLOWED_ALGORITHMS", ("HS256",))
+
+
+def _verifier(issuer: _Issuer, **kwargs) -> validation.PaymentMandateVerifier:
+  jwks = validation.JwksCache(
+      {_ISSUER: _JWKS_URL},
+      http_client=httpx.AsyncClient(
+          transport=httpx.MockTransport(issuer.handle)
+      ),
+      **kwargs,
+  )
+  return validation.PaymentMandateVerifier(
+      jwks, audience=_AUDIENCE, strict=True
+  )
+
+
+def test_verification_is_memoized(monkeypatch):
+  issuer = _Issuer("k1")
+  verifier = _verifier(issuer)
+  payment_mandate = _authorize(_mandate())
+  asyncio.run(verifier.verify(payment_mandate))
+
+  def fail(*args, **kwargs):
+    raise AssertionError("memoized verification decoded a JWT")
+
+  monkeypatch.setattr(verifier, "_decode", fail)
+  asyncio.run(verifier.verify(payment_mandate))
+  assert issuer.fetches == 1
+
+
+def test_unknown_kid_refetches_rotated_keys():
+  issuer = _Issuer("k1")
+  verifier = _verifier(issuer, min_refresh_seconds=0)
+
+  async def run():
+    await verifier.verify(_authorize(_mandate("pm_1")))
+    issuer.kids = ["k2"]
+    await verifier.verify(_authorize(_mandate("pm_2"), kid="k2", nonce="n2"))
+
+  asyncio.run(run())
+  assert issuer.fetches == 2
+
+
+def test_unknown_kid_refetch_is_rate_limited():
+  issuer = _Issuer("k1")
+  verifier = _verifier(issuer, min_refresh_seconds=60)
+
+  async def run():
+    await verifier.verify(_authorize(_mandate("pm_1")))
+    issuer.kids = ["k2"]
+    await verifier.verify(_authorize(_mandate("pm_2"), kid="k2", nonce="n2"))
+
+  with pytest.raises(ValueError, match="Unknown key"):
+    asyncio.run(run())
+  assert issuer.fetches == 1
+
+
+def test_sd_hash_mismatch_is_rejected():
+  verifier = _verifier(_Issuer("k1"))
+  payment_mandate = _authorize(_mandate(), sd_hash="not-the-hash")
+  with pytest.raises(ValueError, match="sd_hash"):
+    asyncio.run(verifier.verify(payment_mandate))
+
+
+def test_authorization_is_bound_to_its_mandate():
+  verifier = _verifier(_Issuer("k1"))
+  authorization = _authorize(_mandate("pm_1")).user_authorization
+  other = _mandate("pm_2")
+  other.user_authorization = authorization
+  with pytest.raises(ValueError, match="does not cover"):
+    asyncio.run(verifier.verify(other))
+
+  # Without the key-binding JWT, the issuer JWT alone is not accepted.
+  other.user_authorization = authorization[: authorization.rindex("~") + 1]
+  with pytest.raises(ValueError, match="no key-binding JWT"):
+    asyncio.run(verifier.verify(other))
+
+
+def test_reused_nonce_is_rejected():
+  verifier = _verifier(_Issuer("k1"))
+
+  async def run():
+    await verifier.verify(_authorize(_mandate("pm_1"), nonce="n1"))
+    await verifier.verify(_authorize(_mandate("pm_2"), nonce="n1"))
+
+  with pytest.raises(ValueError, match="nonce"):
+    asyncio.run(run())
+
+
+def test_failed_jwks_fetch_raises_value_error_and_backs_off():
+  issuer = _Issuer("k1")
+  issuer.down = True
+  verifier = _verifier(issuer, min_refresh_seconds=60)
+
+  async def run():
+    for nonce in ("n1", "n2"):
+      with pytest.raises(ValueError, match="JWKS"):
+        await verifier.verify(_authorize(_mandate(), nonce=nonce))
+
+  asyncio.run(run())
+  assert issuer.fetches == 1
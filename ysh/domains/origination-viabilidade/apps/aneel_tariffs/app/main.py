@@ -1,8 +1,62 @@
-# Placeholder for aneel_tariffs main.py
-from fastapi import FastAPI
+import contextlib
+import os
+from pathlib import Path
+from typing import AsyncIterator
 
-app = FastAPI()
+from fastapi import FastAPI, HTTPException
 
-@app.get("/")
-def read_root():
-    return {"Hello": "ANEEL Tariffs Service"}
+from app.services.tariffs import (
+    ComponentsFetchIn,
+    ProfileBuildIn,
+    ProfileGetIn,
+    TariffStore,
+    build_profile,
+)
+
+SNAPSHOT_PATH = Path(
+    os.getenv(
+        "ANEEL_TARIFFS_SNAPSHOT",
+        "/data/aneel/tarifas-homologadas-distribuidoras-energia-eletrica.csv",
+    )
+)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Carrega o snapshot e pré-calcula os perfis uma vez por processo."""
+    app.state.store = TariffStore.from_snapshot(SNAPSHOT_PATH)
+    yield
+
+
+app = FastAPI(title="YSH ANEEL Tariffs Service", version="0.2.0", lifespan=lifespan)
+
+
+def _store() -> TariffStore:
+    return app.state.store
+
+
+@app.get("/health")
+async def health():
+    store = _store()
+    return {"ok": True, "source": store.source, "rows": len(store)}
+
+
+@app.post("/tools/aneel.tariffs.components.fetch")
+async def components_fetch(inp: ComponentsFetchIn):
+    store = _store()
+    return {"rows": store.components(inp), "source": store.source}
+
+
+@app.post("/tools/aneel.tariffs.profile.build")
+async def profile_build(inp: ProfileBuildIn):
+    return {"tariff_profile": build_profile(inp.rows)}
+
+
+# Busca + agregação em uma única chamada, a partir dos perfis pré-calculados.
+@app.post("/tools/aneel.tariffs.profile.get")
+async def profile_get(inp: ProfileGetIn):
+    store = _store()
+    profile = store.profile(inp)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil tarifário não encontrado")
+    return {"tariff_profile": profile, "source": store.source}
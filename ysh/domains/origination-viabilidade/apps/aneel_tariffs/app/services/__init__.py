@@ -0,0 +1,17 @@
+"""Service layer helpers for the ANEEL tariffs microservice."""
+
+from .tariffs import (  # noqa: F401
+    ComponentsFetchIn,
+    ProfileBuildIn,
+    ProfileGetIn,
+    TariffStore,
+    build_profile,
+)
+
+__all__ = [
+    "ComponentsFetchIn",
+    "ProfileBuildIn",
+    "ProfileGetIn",
+    "TariffStore",
+    "build_profile",
+]
@@ -0,0 +1,390 @@
+"""Índice em memória das tarifas homologadas ANEEL e perfis pré-calculados.
+
+O snapshot local do conjunto "Tarifas de Aplicação" (CSV ``;`` ou Parquet)
+é carregado uma única vez e indexado por ``(sig_agente, inicio_vigencia,
+subgrupo)``.  Os perfis tarifários de cada combinação de modalidade e classe
+são calculados na carga, então ``profile.get`` se resume a uma busca binária
+pela vigência em vigor e a um acesso a dicionário.
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import logging
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel, field_validator
+
+logger = logging.getLogger(__name__)
+
+# Cabeçalhos do conjunto de dados abertos da ANEEL -> nomes internos.
+ANEEL_COLUMNS = {
+    "DscREH": "reh",
+    "SigAgente": "sig_agente",
+    "NumCNPJDistribuidora": "cnpj",
+    "DatInicioVigencia": "inicio_vigencia",
+    "DatFimVigencia": "fim_vigencia",
+    "DscBaseTarifaria": "base_tarifaria",
+    "DscSubGrupo": "subgrupo",
+    "DscModalidadeTarifaria": "modalidade",
+    "DscClasse": "classe",
+    "DscSubClasse": "subclasse",
+    "DscDetalhe": "detalhe",
+    "NomPostoTarifario": "posto_tarifario",
+    "DscUnidadeTerciaria": "unidade",
+    "VlrTUSD": "vlr_tusd",
+    "VlrTE": "vlr_te",
+}
+APPLICATION_BASE = "tarifa de aplicação"
+NEUTRAL_VALUES = {"", "não se aplica", "nao se aplica"}
+DEFAULT_SUBGRUPO = "B1"
+DEFAULT_MODALIDADE = "Convencional"
+DEFAULT_CLASSE = "Residencial"
+# Posto usado como tarifa de referência quando há mais de um.
+REFERENCE_POSTOS = ("não se aplica", "fora ponta")
+
+Key = Tuple[str, str, str]  # (sig_agente, inicio_vigencia, subgrupo)
+
+
+class ComponentsFetchIn(BaseModel):
+    """Filtros de ``aneel.tariffs.components.fetch``."""
+
+    sig_agente: str
+    inicio_vigencia: str
+    fim_vigencia: Optional[str] = None
+    subgrupo: Optional[str] = None
+    modalidade: Optional[str] = None
+    classe: Optional[str] = None
+    posto_tarifario: Optional[str] = None
+    cnpj: Optional[str] = None
+
+    @field_validator("inicio_vigencia", "fim_vigencia")
+    @classmethod
+    def _iso_date(cls, value: Optional[str]) -> Optional[str]:
+        # Datas malformadas viram 422 em vez de estourar na consulta.
+        return _to_iso_date(value) if value is not None else None
+
+
+class ProfileBuildIn(BaseModel):
+    rows: List[Dict[str, Any]]
+
+
+class ProfileGetIn(BaseModel):
+    """Parâmetros de ``aneel.tariffs.profile.get``.
+
+    ``inicio_vigencia`` aceita qualquer data: vale a vigência em vigor nela.
+    Sem data, vale a vigência mais recente do snapshot.
+    """
+
+    sig_agente: str
+    inicio_vigencia: Optional[str] = None
+    subgrupo: str = DEFAULT_SUBGRUPO
+    modalidade: str = DEFAULT_MODALIDADE
+    classe: str = DEFAULT_CLASSE
+
+    @field_validator("inicio_vigencia")
+    @classmethod
+    def _iso_date(cls, value: Optional[str]) -> Optional[str]:
+        return _to_iso_date(value) if value is not None else None
+
+
+def _norm(value: Any) -> str:
+    return str(value or "").strip().casefold()
+
+
+def _agent(value: Any) -> str:
+    return str(value or "").strip().upper()
+
+
+def _to_float(value: Any) -> float:
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if "," in text:
+        # Formato brasileiro: "1.234,56".
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def _to_iso_date(value: Any) -> str:
+    """Data ISO ou ``d/m/Y`` em ISO; ``ValueError`` para qualquer outro formato."""
+
+    text = str(value or "").strip()[:10]
+    if not text:
+        return ""
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        pass
+    parts = text.split("/")
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        day, month, year = (int(part) for part in parts)
+        return date(year, month, day).isoformat()
+    raise ValueError(f"Data inválida: {value!r}")
+
+
+def normalize_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte uma linha do snapshot para os nomes e tipos internos."""
+
+    row = {ANEEL_COLUMNS.get(name, name): value for name, value in raw.items()}
+    row = {name: row.get(name, "") for name in ANEEL_COLUMNS.values()}
+    for name in ANEEL_COLUMNS.values():
+        if isinstance(row[name], str):
+            row[name] = row[name].strip()
+    row["sig_agente"] = _agent(row["sig_agente"])
+    row["subgrupo"] = _agent(row["subgrupo"])
+    row["inicio_vigencia"] = _to_iso_date(row["inicio_vigencia"])
+    row["fim_vigencia"] = _to_iso_date(row["fim_vigencia"])
+    row["vlr_tusd"] = _to_float(row["vlr_tusd"])
+    row["vlr_te"] = _to_float(row["vlr_te"])
+    return row
+
+
+def read_snapshot(path: Path) -> Iterable[Dict[str, Any]]:
+    """Lê as linhas cruas de um snapshot CSV (``;`` ou ``,``) ou Parquet."""
+
+    if path.suffix.lower() == ".parquet":
+        import pandas as pd
+
+        yield from pd.read_parquet(path).to_dict(orient="records")
+        return
+    raw = path.read_bytes()
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        # Os CSVs publicados pela ANEEL costumam vir em latin-1.
+        text = raw.decode("latin-1")
+    header = text.split("\n", 1)[0]
+    delimiter = ";" if header.count(";") >= header.count(",") else ","
+    yield from csv.DictReader(text.splitlines(), delimiter=delimiter)
+
+
+def _energy_mwh(row: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Retorna ``(te, tusd)`` em R$/MWh ou ``None`` para linhas de demanda."""
+
+    unit = _norm(row.get("unidade"))
+    if unit in ("", "mwh"):
+        factor = 1.0
+    elif unit == "kwh":
+        factor = 1000.0
+    else:
+        return None
+    return _to_float(row.get("vlr_te")) * factor, _to_float(row.get("vlr_tusd")) * factor
+
+
+def _is_standard(row: Dict[str, Any]) -> bool:
+    subclasse = _norm(row.get("subclasse"))
+    return _norm(row.get("detalhe")) in NEUTRAL_VALUES and (
+        subclasse in NEUTRAL_VALUES or subclasse == _norm(row.get("classe"))
+    )
+
+
+def build_profile(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Agrega componentes TE/TUSD em ``tariff_profile`` (centavos de R$/kWh).
+
+    Linhas de modalidades ou classes diferentes são restritas à combinação
+    padrão (ou à primeira presente) para não misturar tarifas.
+    """
+
+    rows = [normalize_row(row) for row in rows]
+    rows = [
+        row
+        for row in rows
+        if _norm(row["base_tarifaria"]) in ("", APPLICATION_BASE)
+    ]
+    scopes = {(_norm(row["modalidade"]), _norm(row["classe"])) for row in rows}
+    if len(scopes) > 1:
+        preferred = (_norm(DEFAULT_MODALIDADE), _norm(DEFAULT_CLASSE))
+        scope = preferred if preferred in scopes else sorted(scopes)[0]
+        rows = [
+            row
+            for row in rows
+            if (_norm(row["modalidade"]), _norm(row["classe"])) == scope
+        ]
+    standard = [row for row in rows if _is_standard(row)]
+    rows = standard or rows
+
+    postos: Dict[str, Dict[str, float]] = {}
+    for row in rows:
+        energy = _energy_mwh(row)
+        if energy is None:
+            continue
+        te, tusd = energy
+        name = row["posto_tarifario"] or "Não se aplica"
+        # R$/MWh -> centavos/kWh: / 1000 * 100.
+        postos.setdefault(
+            name,
+            {
+                "te_cents_per_kwh": round(te / 10, 4),
+                "tusd_cents_per_kwh": round(tusd / 10, 4),
+                "cents_per_kwh": round((te + tusd) / 10, 4),
+            },
+        )
+    if not postos:
+        return {}
+
+    by_norm = {_norm(name): values for name, values in postos.items()}
+    reference = next(
+        (by_norm[name] for name in REFERENCE_POSTOS if name in by_norm),
+        None,
+    )
+    if reference is None:
+        reference = {
+            field: round(sum(p[field] for p in postos.values()) / len(postos), 4)
+            for field in ("te_cents_per_kwh", "tusd_cents_per_kwh", "cents_per_kwh")
+        }
+    first = rows[0]
+    return {
+        **reference,
+        "sig_agente": first["sig_agente"],
+        "subgrupo": first["subgrupo"],
+        "modalidade": first["modalidade"],
+        "classe": first["classe"],
+        "inicio_vigencia": first["inicio_vigencia"],
+        "fim_vigencia": first["fim_vigencia"] or None,
+        "postos": postos,
+    }
+
+
+class TariffStore:
+    """Componentes tarifários indexados e perfis pré-calculados."""
+
+    def __init__(self, source: str = "") -> None:
+        self.source = source
+        self._rows: Dict[Key, List[Dict[str, Any]]] = defaultdict(list)
+        # (sig_agente, subgrupo) -> inícios de vigência ordenados.
+        self._vigencias: Dict[Tuple[str, str], List[str]] = {}
+        # chave -> (modalidade, classe) normalizados -> perfil.
+        self._profiles: Dict[Key, Dict[Tuple[str, str], Dict[str, Any]]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]], source: str = "") -> "TariffStore":
+        store = cls(source)
+        skipped = 0
+        for raw in rows:
+            try:
+                row = normalize_row(raw)
+            except ValueError:
+                # Uma linha com data ilegível não derruba o snapshot inteiro.
+                skipped += 1
+                continue
+            if not (row["sig_agente"] and row["inicio_vigencia"]):
+                continue
+            store._rows[(row["sig_agente"], row["inicio_vigencia"], row["subgrupo"])].append(row)
+        if skipped:
+            logger.warning("%d linhas com data inválida ignoradas em %s", skipped, source)
+        store._index()
+        return store
+
+    @classmethod
+    def from_snapshot(cls, path: Path) -> "TariffStore":
+        if not path.exists():
+            logger.warning("Snapshot de tarifas ANEEL ausente em %s", path)
+            return cls(str(path))
+        store = cls.from_rows(read_snapshot(path), source=path.name)
+        logger.info(
+            "Snapshot %s carregado: %d chaves, %d perfis",
+            path,
+            len(store._rows),
+            sum(len(scopes) for scopes in store._profiles.values()),
+        )
+        return store
+
+    def _index(self) -> None:
+        starts: Dict[Tuple[str, str], set] = defaultdict(set)
+        for key, rows in self._rows.items():
+            sig_agente, inicio, subgrupo = key
+            starts[(sig_agente, subgrupo)].add(inicio)
+            scopes: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+            for row in rows:
+                scopes[(_norm(row["modalidade"]), _norm(row["classe"]))].append(row)
+            profiles = {scope: build_profile(scoped) for scope, scoped in scopes.items()}
+            self._profiles[key] = {
+                scope: profile for scope, profile in sorted(profiles.items()) if profile
+            }
+        self._vigencias = {scope: sorted(values) for scope, values in starts.items()}
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._rows.values())
+
+    def resolve_vigencia(
+        self, sig_agente: str, subgrupo: str, on: Optional[str] = None
+    ) -> Optional[str]:
+        """Início da vigência em vigor em ``on`` (ou a mais recente).
+
+        A vigência mais recente iniciada até ``on`` continua valendo mesmo
+        depois do seu fim, para que um snapshot defasado ainda responda.
+        """
+
+        starts = self._vigencias.get((_agent(sig_agente), _agent(subgrupo)))
+        if not starts:
+            return None
+        if not on:
+            return starts[-1]
+        index = bisect.bisect_right(starts, _to_iso_date(on))
+        return starts[index - 1] if index else None
+
+    def components(self, query: ComponentsFetchIn) -> List[Dict[str, Any]]:
+        """Linhas que atendem aos filtros; o intervalo de vigência é inclusivo."""
+
+        sig_agente = _agent(query.sig_agente)
+        inicio = _to_iso_date(query.inicio_vigencia)
+        fim = _to_iso_date(query.fim_vigencia) if query.fim_vigencia else inicio
+        subgrupos = (
+            [_agent(query.subgrupo)]
+            if query.subgrupo
+            else [s for (agent, s) in self._vigencias if agent == sig_agente]
+        )
+        filters = {
+            name: _norm(getattr(query, name))
+            for name in ("modalidade", "classe", "posto_tarifario")
+            if getattr(query, name)
+        }
+        cnpj = "".join(ch for ch in query.cnpj or "" if ch.isdigit())
+
+        result: List[Dict[str, Any]] = []
+        for subgrupo in subgrupos:
+            starts = self._vigencias.get((sig_agente, subgrupo), [])
+            lo = bisect.bisect_left(starts, inicio)
+            hi = bisect.bisect_right(starts, fim)
+            for start in starts[lo:hi]:
+                for row in self._rows[(sig_agente, start, subgrupo)]:
+                    if any(_norm(row[name]) != value for name, value in filters.items()):
+                        continue
+                    if cnpj and "".join(ch for ch in str(row["cnpj"]) if ch.isdigit()) != cnpj:
+                        continue
+                    result.append(row)
+        return result
+
+    def profile(self, query: ProfileGetIn) -> Optional[Dict[str, Any]]:
+        """Perfil pré-calculado da vigência em vigor; ``None`` se não houver."""
+
+        sig_agente = _agent(query.sig_agente)
+        subgrupo = _agent(query.subgrupo)
+        inicio = self.resolve_vigencia(sig_agente, subgrupo, query.inicio_vigencia)
+        if inicio is None:
+            return None
+        scopes = self._profiles.get((sig_agente, inicio, subgrupo), {})
+        # Sem a combinação pedida não há perfil: outra modalidade ou classe
+        # teria outra tarifa.
+        return scopes.get((_norm(query.modalidade), _norm(query.classe)))
+
+
+__all__ = [
+    "ComponentsFetchIn",
+    "ProfileBuildIn",
+    "ProfileGetIn",
+    "TariffStore",
+    "build_profile",
+    "normalize_row",
+    "read_snapshot",
+]
@@ -0,0 +1,138 @@
+"""Tests for the ANEEL tariff store and precomputed profiles."""
+
+from pathlib import Path
+
+from app.services.tariffs import (
+    ComponentsFetchIn,
+    ProfileGetIn,
+    TariffStore,
+    build_profile,
+    read_snapshot,
+)
+
+HEADER = (
+    "SigAgente;DatInicioVigencia;DatFimVigencia;DscBaseTarifaria;DscSubGrupo;"
+    "DscModalidadeTarifaria;DscClasse;DscSubClasse;DscDetalhe;NomPostoTarifario;"
+    "DscUnidadeTerciaria;VlrTUSD;VlrTE"
+)
+ROWS = [
+    "ENEL RJ;2023-03-15;2024-03-14;Tarifa de Aplicação;B1;Convencional;Residencial;"
+    "Residencial;Não se aplica;Não se aplica;MWh;400,00;300,00",
+    "ENEL RJ;2024-03-15;2025-03-14;Tarifa de Aplicação;B1;Convencional;Residencial;"
+    "Residencial;Não se aplica;Não se aplica;MWh;450,00;310,00",
+    "ENEL RJ;2024-03-15;2025-03-14;Base Econômica;B1;Convencional;Residencial;"
+    "Residencial;Não se aplica;Não se aplica;MWh;1,00;1,00",
+    "ENEL RJ;2024-03-15;2025-03-14;Tarifa de Aplicação;B1;Branca;Residencial;"
+    "Residencial;Não se aplica;Ponta;MWh;1200,00;500,00",
+    "ENEL RJ;2024-03-15;2025-03-14;Tarifa de Aplicação;B1;Branca;Residencial;"
+    "Residencial;Não se aplica;Fora ponta;MWh;300,00;280,00",
+]
+
+
+def _snapshot(tmp_path: Path) -> Path:
+    path = tmp_path / "tarifas.csv"
+    path.write_bytes("\n".join([HEADER, *ROWS]).encode("latin-1"))
+    return path
+
+
+def _store(tmp_path: Path) -> TariffStore:
+    return TariffStore.from_snapshot(_snapshot(tmp_path))
+
+
+def test_read_snapshot_handles_latin1_and_semicolons(tmp_path: Path) -> None:
+    rows = list(read_snapshot(_snapshot(tmp_path)))
+
+    assert len(rows) == len(ROWS)
+    assert rows[0]["DscBaseTarifaria"] == "Tarifa de Aplicação"
+
+
+def test_profile_get_resolves_vigencia_in_force(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+
+    old = store.profile(ProfileGetIn(sig_agente="enel rj", inicio_vigencia="2023-12-01"))
+    current = store.profile(ProfileGetIn(sig_agente="ENEL RJ"))
+
+    assert old["inicio_vigencia"] == "2023-03-15"
+    assert old["cents_per_kwh"] == 70.0
+    assert current["inicio_vigencia"] == "2024-03-15"
+    assert current["cents_per_kwh"] == 76.0
+    assert current["te_cents_per_kwh"] == 31.0
+
+
+def test_profile_get_uses_off_peak_as_reference_for_time_of_use(tmp_path: Path) -> None:
+    profile = _store(tmp_path).profile(
+        ProfileGetIn(sig_agente="ENEL RJ", modalidade="branca")
+    )
+
+    assert profile["modalidade"] == "Branca"
+    assert profile["cents_per_kwh"] == 58.0
+    assert profile["postos"]["Ponta"]["cents_per_kwh"] == 170.0
+
+
+def test_profile_get_returns_none_before_first_vigencia(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+
+    assert store.profile(ProfileGetIn(sig_agente="ENEL RJ", inicio_vigencia="2020-01-01")) is None
+    assert store.profile(ProfileGetIn(sig_agente="CEMIG-D")) is None
+
+
+def test_profile_get_returns_none_for_missing_modalidade_or_classe(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+
+    assert store.profile(ProfileGetIn(sig_agente="ENEL RJ", modalidade="Azul")) is None
+    assert store.profile(ProfileGetIn(sig_agente="ENEL RJ", classe="Rural")) is None
+
+
+def test_snapshot_skips_rows_with_unparseable_dates(tmp_path: Path) -> None:
+    path = tmp_path / "tarifas.csv"
+    bad = ROWS[1].replace("2024-03-15;2025-03-14", "15.03.2024;2025-03-14")
+    path.write_bytes("\n".join([HEADER, ROWS[0], bad]).encode("latin-1"))
+
+    store = TariffStore.from_snapshot(path)
+
+    assert len(store) == 1
+    assert store.profile(ProfileGetIn(sig_agente="ENEL RJ"))["inicio_vigencia"] == "2023-03-15"
+
+
+def test_components_fetch_filters_range_and_scope(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+
+    rows = store.components(
+        ComponentsFetchIn(
+            sig_agente="ENEL RJ",
+            inicio_vigencia="2023-01-01",
+            fim_vigencia="2024-12-31",
+            modalidade="Convencional",
+        )
+    )
+
+    assert [row["inicio_vigencia"] for row in rows] == [
+        "2023-03-15",
+        "2024-03-15",
+        "2024-03-15",
+    ]
+
+
+def test_build_profile_matches_precomputed_profile(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    rows = store.components(
+        ComponentsFetchIn(sig_agente="ENEL RJ", inicio_vigencia="2024-03-15")
+    )
+
+    assert build_profile(rows) == store.profile(ProfileGetIn(sig_agente="ENEL RJ"))
+
+
+def test_malformed_vigencia_is_rejected_with_422() -> None:
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    components = "/tools/aneel.tariffs.components.fetch"
+    for path, body in [
+        (components, {"inicio_vigencia": "foo"}),
+        (components, {"inicio_vigencia": "2024-01-01", "fim_vigencia": "31/13/2024"}),
+        ("/tools/aneel.tariffs.profile.get", {"inicio_vigencia": "foo"}),
+    ]:
+        response = client.post(path, json={"sig_agente": "X", **body})
+        assert response.status_code == 422, path
@@ -1,8 +1,73 @@
-# Placeholder for aneel_utilities main.py
-from fastapi import FastAPI
+import contextlib
+import os
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
 
-app = FastAPI()
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
 
-@app.get("/")
-def read_root():
-    return {"Hello": "ANEEL Utilities Service"}
+from app.services.cep_index import CepIndex
+
+DATASET_PATH = Path(
+    os.getenv(
+        "CEP_DISTRIBUIDORAS_DATASET",
+        str(Path(__file__).resolve().parent / "data" / "cep_distribuidoras.csv"),
+    )
+)
+INDEX_PATH = Path(os.getenv("CEP_INDEX_PATH", "/tmp/aneel_utilities/cep_index.bin"))
+MAX_BATCH = 1000
+
+
+class DistributorQuery(BaseModel):
+    cep: Optional[str] = None
+    uf: Optional[str] = None
+    municipio: Optional[str] = None
+
+
+class DistributorLookupIn(BaseModel):
+    items: List[DistributorQuery] = Field(min_length=1, max_length=MAX_BATCH)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Abre (ou gera) o índice mapeado; workers compartilham o mesmo arquivo."""
+    app.state.index = CepIndex.open(DATASET_PATH, INDEX_PATH)
+    try:
+        yield
+    finally:
+        app.state.index.close()
+
+
+app = FastAPI(
+    title="YSH ANEEL Utilities Service", version="0.2.0", lifespan=lifespan
+)
+
+
+def _result(query: DistributorQuery) -> dict:
+    entry = app.state.index.lookup(query.cep, query.uf, query.municipio)
+    return {
+        "query": query.model_dump(exclude_none=True),
+        "found": entry is not None,
+        "sig_agente": entry["sig_agente"] if entry else None,
+        "uf": entry["uf"] if entry else None,
+        "municipio": entry["municipio"] if entry else None,
+        "nivel": entry["nivel"] if entry else None,
+    }
+
+
+@app.get("/health")
+async def health():
+    return {"ok": True, "segments": len(app.state.index)}
+
+
+@app.get("/distribuidoras/{cep}")
+async def get_distributor(cep: str):
+    result = _result(DistributorQuery(cep=cep))
+    if not result["found"]:
+        raise HTTPException(status_code=404, detail="CEP fora das faixas conhecidas")
+    return result
+
+
+@app.post("/tools/aneel.utilities.distributor.lookup")
+async def distributor_lookup(inp: DistributorLookupIn):
+    return {"results": [_result(query) for query in inp.items]}
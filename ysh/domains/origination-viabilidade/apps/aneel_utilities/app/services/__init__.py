@@ -0,0 +1,5 @@
+"""Service layer helpers for the ANEEL utilities microservice."""
+
+from .cep_index import CepIndex, build_index_file  # noqa: F401
+
+__all__ = ["CepIndex", "build_index_file"]
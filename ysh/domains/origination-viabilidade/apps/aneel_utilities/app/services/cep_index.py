@@ -0,0 +1,220 @@
+"""Índice CEP -> distribuidora com intervalos ordenados em arquivo mapeado.
+
+O dataset (``app/data/cep_distribuidoras.csv``) traz faixas de CEP por UF e,
+dentro delas, faixas mais específicas por município.  Na construção as faixas
+aninhadas são achatadas em segmentos disjuntos (vence a faixa mais estreita),
+então uma consulta é uma única busca binária sobre os inícios.
+
+Os vetores ``inicio``/``fim``/``entrada`` são gravados em um arquivo binário
+que cada worker do uvicorn abre com ``mmap``: as páginas ficam no cache do
+sistema operacional e são compartilhadas entre processos em vez de cada
+worker manter sua própria cópia do índice.
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import hashlib
+import heapq
+import io
+import json
+import mmap
+import os
+import struct
+import tempfile
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MAGIC = b"YSHCEP1\0"
+# magic, sha256 do dataset, número de segmentos, tamanho do JSON de entradas.
+HEADER = struct.Struct("<8s32sII")
+
+
+def normalize_cep(value: Any) -> Optional[int]:
+    digits = "".join(ch for ch in str(value or "") if ch.isdigit())
+    if len(digits) != 8:
+        return None
+    return int(digits)
+
+
+def normalize_name(value: Any) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "").strip().casefold())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _read_dataset(raw: bytes) -> List[Dict[str, Any]]:
+    entries = []
+    for row in csv.DictReader(io.StringIO(raw.decode("utf-8")), delimiter=";"):
+        start, end = normalize_cep(row["cep_inicio"]), normalize_cep(row["cep_fim"])
+        if start is None or end is None or end < start:
+            raise ValueError(f"Faixa de CEP inválida: {row}")
+        entries.append(
+            {
+                "cep_inicio": start,
+                "cep_fim": end,
+                "uf": row["uf"].strip().upper(),
+                "municipio": row["municipio"].strip() or None,
+                "sig_agente": row["sig_agente"].strip() or None,
+                "nivel": row["nivel"].strip() or "uf",
+            }
+        )
+    return entries
+
+
+def flatten_ranges(
+    ranges: Sequence[Tuple[int, int]],
+) -> List[Tuple[int, int, int]]:
+    """Achata faixas possivelmente aninhadas em ``(inicio, fim, indice)``.
+
+    Em cada ponto vale a faixa mais estreita que o contém; segmentos vizinhos
+    da mesma faixa são fundidos.
+    """
+
+    order = sorted(range(len(ranges)), key=lambda i: ranges[i][0])
+    points = sorted({p for start, end in ranges for p in (start, end + 1)})
+    active: List[Tuple[int, int, int]] = []  # (largura, índice, fim)
+    segments: List[Tuple[int, int, int]] = []
+    cursor = 0
+    for left, right in zip(points, points[1:]):
+        while cursor < len(order) and ranges[order[cursor]][0] <= left:
+            index = order[cursor]
+            start, end = ranges[index]
+            heapq.heappush(active, (end - start, index, end))
+            cursor += 1
+        while active and active[0][2] < left:
+            heapq.heappop(active)
+        if not active:
+            continue
+        index = active[0][1]
+        if segments and segments[-1][2] == index and segments[-1][1] == left - 1:
+            segments[-1] = (segments[-1][0], right - 1, index)
+        else:
+            segments.append((left, right - 1, index))
+    return segments
+
+
+def build_index_file(dataset: Path, target: Path) -> None:
+    """Grava o índice binário de ``dataset`` em ``target`` de forma atômica."""
+
+    raw = dataset.read_bytes()
+    entries = _read_dataset(raw)
+    segments = flatten_ranges([(e["cep_inicio"], e["cep_fim"]) for e in entries])
+    payload = json.dumps(entries, ensure_ascii=False).encode("utf-8")
+    count = len(segments)
+    body = b"".join(
+        (
+            HEADER.pack(MAGIC, hashlib.sha256(raw).digest(), count, len(payload)),
+            struct.pack(f"={count}I", *(s[0] for s in segments)),
+            struct.pack(f"={count}I", *(s[1] for s in segments)),
+            struct.pack(f"={count}I", *(s[2] for s in segments)),
+            payload,
+        )
+    )
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Vários workers podem construir ao mesmo tempo; ``os.replace`` garante
+    # que nenhum deles abra um arquivo pela metade.
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=target.name)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(body)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class CepIndex:
+    """Consultas por CEP e por município sobre o índice mapeado em memória."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.digest, count, payload_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Arquivo de índice inválido: {path}")
+        # Vetores em ordem nativa: o arquivo é gerado na própria máquina.
+        view = self._view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._starts = view[offset : offset + 4 * count].cast("I")
+        self._ends = view[offset + 4 * count : offset + 8 * count].cast("I")
+        self._ids = view[offset + 8 * count : offset + 12 * count].cast("I")
+        payload = view[offset + 12 * count : offset + 12 * count + payload_size]
+        self.entries: List[Dict[str, Any]] = json.loads(bytes(payload))
+        payload.release()
+        self._by_municipio = {
+            (entry["uf"], normalize_name(entry["municipio"])): entry
+            for entry in self.entries
+            if entry["municipio"]
+        }
+        self._by_uf = {
+            entry["uf"]: entry for entry in self.entries if entry["nivel"] == "uf"
+        }
+
+    @classmethod
+    def open(cls, dataset: Path, path: Path) -> "CepIndex":
+        """Abre ``path``, reconstruindo-o se estiver ausente ou desatualizado."""
+
+        digest = hashlib.sha256(dataset.read_bytes()).digest()
+        try:
+            index = cls(path)
+        except (OSError, ValueError, struct.error):
+            index = None
+        if index is None or index.digest != digest:
+            if index is not None:
+                index.close()
+            build_index_file(dataset, path)
+            index = cls(path)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def close(self) -> None:
+        for view in (self._starts, self._ends, self._ids, self._view):
+            view.release()
+        self._mmap.close()
+
+    def by_cep(self, cep: Any) -> Optional[Dict[str, Any]]:
+        value = normalize_cep(cep)
+        if value is None:
+            return None
+        position = bisect.bisect_right(self._starts, value) - 1
+        if position < 0 or value > self._ends[position]:
+            return None
+        return self.entries[self._ids[position]]
+
+    def by_municipio(self, uf: Any, municipio: Any) -> Optional[Dict[str, Any]]:
+        uf = str(uf or "").strip().upper()
+        entry = self._by_municipio.get((uf, normalize_name(municipio)))
+        return entry or self._by_uf.get(uf)
+
+    def lookup(
+        self,
+        cep: Optional[str] = None,
+        uf: Optional[str] = None,
+        municipio: Optional[str] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """CEP tem precedência; município/UF atendem quando o CEP não resolve.
+
+        Faixas de UF atendidas por mais de uma distribuidora não têm
+        ``sig_agente``; nesse caso o município, se informado, desempata.
+        """
+
+        entry = self.by_cep(cep) if cep else None
+        if entry is None or entry["sig_agente"] is None:
+            uf = uf or (entry or {}).get("uf")
+            fallback = self.by_municipio(uf, municipio) if uf else None
+            if fallback is not None and (entry is None or fallback["sig_agente"]):
+                entry = fallback
+        return entry
+
+
+__all__ = [
+    "CepIndex",
+    "build_index_file",
+    "flatten_ranges",
+    "normalize_cep",
+    "normalize_name",
+]
@@ -0,0 +1,17 @@
+"""Pytest configuration for the ANEEL utilities service tests."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+def _ensure_app_on_path() -> None:
+    root = Path(__file__).resolve().parents[1]
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+
+
+_ensure_app_on_path()
+
+__all__ = []
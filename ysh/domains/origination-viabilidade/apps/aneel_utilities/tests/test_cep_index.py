@@ -0,0 +1,70 @@
+"""Tests for the memory-mapped CEP -> distribuidora index."""
+
+from pathlib import Path
+
+from app.services.cep_index import CepIndex, build_index_file, flatten_ranges
+
+DATASET = Path(__file__).resolve().parents[1] / "app" / "data" / "cep_distribuidoras.csv"
+
+
+def _index(tmp_path: Path) -> CepIndex:
+    return CepIndex.open(DATASET, tmp_path / "cep_index.bin")
+
+
+def test_flatten_ranges_prefers_narrowest_range() -> None:
+    segments = flatten_ranges([(10, 99), (20, 29), (40, 49), (45, 46)])
+
+    assert segments == [
+        (10, 19, 0),
+        (20, 29, 1),
+        (30, 39, 0),
+        (40, 44, 2),
+        (45, 46, 3),
+        (47, 49, 2),
+        (50, 99, 0),
+    ]
+
+
+def test_lookup_by_cep_resolves_municipio_inside_uf(tmp_path: Path) -> None:
+    index = _index(tmp_path)
+
+    assert index.by_cep("01310-100")["sig_agente"] == "ENEL SP"
+    assert index.by_cep("13010-000")["sig_agente"] is None
+    assert index.by_cep("40020-000")["sig_agente"] == "COELBA"
+    assert index.by_cep("69301-000")["uf"] == "RR"
+    assert index.by_cep("00000-000") is None
+    assert index.by_cep("123") is None
+    index.close()
+
+
+def test_lookup_falls_back_to_municipio_and_uf(tmp_path: Path) -> None:
+    index = _index(tmp_path)
+
+    assert index.lookup(uf="rj", municipio="rio de janeiro")["sig_agente"] == "LIGHT SESA"
+    assert index.lookup(uf="PR", municipio="Londrina")["sig_agente"] == "COPEL-DIS"
+    assert index.lookup(cep="99999-999", uf="RS", municipio="Porto Alegre")[
+        "sig_agente"
+    ] == "CEEE EQUATORIAL"
+    assert index.lookup(cep="invalid") is None
+    index.close()
+
+
+def test_open_rebuilds_stale_index(tmp_path: Path) -> None:
+    dataset = tmp_path / "dataset.csv"
+    dataset.write_text(
+        "cep_inicio;cep_fim;uf;municipio;sig_agente;nivel\n"
+        "40000000;48999999;BA;;COELBA;uf\n",
+        encoding="utf-8",
+    )
+    target = tmp_path / "index.bin"
+    build_index_file(dataset, target)
+    dataset.write_text(
+        "cep_inicio;cep_fim;uf;municipio;sig_agente;nivel\n"
+        "40000000;48999999;BA;;NEOENERGIA COELBA;uf\n",
+        encoding="utf-8",
+    )
+
+    index = CepIndex.open(dataset, target)
+
+    assert index.by_cep("40000-000")["sig_agente"] == "NEOENERGIA COELBA"
+    index.close()
@@ -0,0 +1,470 @@
+"""Pluggable object storage for artifact blobs and attachments.
+
+``FilesystemBackend`` keeps objects under a local directory and is the
+default.  ``S3Backend`` talks to any S3-compatible endpoint (AWS, MinIO) so
+several replicas can serve the same artifacts; large objects are uploaded
+with parallel multipart requests and read back with parallel range requests.
+``CachedBackend`` puts a local write-through copy in front of a remote
+backend so hot blobs are read from disk; the copy is bounded in bytes.
+"""
+
+import asyncio
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Iterable, List, Optional, Protocol, Tuple
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - boto3 is only needed for S3.
+    boto3 = None
+
+MiB = 2**20
+
+
+class StorageBackend(Protocol):
+    """Minimal object-store interface used by the artifact repository."""
+
+    shared: bool
+
+    async def put(self, key: str, data: bytes) -> None: ...
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int: ...
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes: ...
+
+    async def size(self, key: str) -> Optional[int]: ...
+
+    async def list_keys(
+        self, prefix: str, *, start_after: Optional[str] = None, limit: int = 1000
+    ) -> List[str]: ...
+
+
+def split_ranges(size: int, part_size: int) -> List[Tuple[int, int]]:
+    """Inclusive ``(start, end)`` byte ranges covering ``size`` bytes."""
+    return [
+        (start, min(start + part_size, size) - 1)
+        for start in range(0, size, part_size)
+    ]
+
+
+async def read_stream(
+    backend: StorageBackend,
+    key: str,
+    start: int,
+    end: int,
+    *,
+    part_size: int = 8 * MiB,
+    concurrency: int = 4,
+) -> AsyncIterator[bytes]:
+    """Yield bytes ``start..end`` in order, fetching ranges ahead in parallel.
+
+    At most ``concurrency`` parts are in flight, which bounds memory while
+    hiding per-request latency on remote backends.
+    """
+    pending: List[asyncio.Task] = []
+    try:
+        for first, last in split_ranges(end - start + 1, part_size):
+            first, last = first + start, last + start
+            pending.append(asyncio.create_task(backend.get_range(key, first, last)))
+            if len(pending) >= concurrency:
+                yield await pending.pop(0)
+        while pending:
+            yield await pending.pop(0)
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+class FilesystemBackend:
+    """Objects stored as files below ``root``; keys map to relative paths."""
+
+    shared = False
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f'Invalid object key: {key}')
+        return path
+
+    def _open_temp(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        return os.fdopen(fd, 'wb'), tmp
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self.path_for(key)
+        handle, tmp = self._open_temp(path)
+        try:
+            with handle:
+                handle.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def put(self, key: str, data: bytes) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        path = self.path_for(key)
+        handle, tmp = await asyncio.to_thread(self._open_temp, path)
+        written = 0
+        try:
+            with handle:
+                async for chunk in chunks:
+                    await asyncio.to_thread(handle.write, chunk)
+                    written += len(chunk)
+            await asyncio.to_thread(os.replace, tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return written
+
+    def _read(self, key: str) -> Optional[bytes]:
+        try:
+            return self.path_for(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._read, key)
+
+    def _read_range(self, key: str, start: int, end: int) -> bytes:
+        with self.path_for(key).open('rb') as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        return await asyncio.to_thread(self._read_range, key, start, end)
+
+    def _size(self, key: str) -> Optional[int]:
+        try:
+            return self.path_for(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    async def size(self, key: str) -> Optional[int]:
+        return await asyncio.to_thread(self._size, key)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Delete objects, ignoring the ones already gone."""
+        for key in keys:
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+
+    def scan(self) -> List[Tuple[str, int]]:
+        """Every stored ``(key, size)``, least recently modified first."""
+        found = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if name.startswith('.tmp-'):
+                    continue
+                path = Path(directory) / name
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                key = path.relative_to(self.root).as_posix()
+                found.append((stat.st_mtime, key, stat.st_size))
+        return [(key, size) for _, key, size in sorted(found)]
+
+    def _list_keys(
+        self, prefix: str, start_after: Optional[str], limit: int
+    ) -> List[str]:
+        directory, _, name_prefix = prefix.rpartition('/')
+        base = self.path_for(directory) if directory else self.root
+        try:
+            names = sorted(
+                entry.name
+                for entry in os.scandir(base)
+                if entry.is_file()
+                and entry.name.startswith(name_prefix)
+                and not entry.name.startswith('.tmp-')
+            )
+        except FileNotFoundError:
+            return []
+        keys = [f'{directory}/{name}' if directory else name for name in names]
+        if start_after is not None:
+            keys = [key for key in keys if key > start_after]
+        return keys[:limit]
+
+    async def list_keys(
+        self, prefix: str, *, start_after: Optional[str] = None, limit: int = 1000
+    ) -> List[str]:
+        """Keys under ``prefix`` in lexicographic order.
+
+        Only the directory named by ``prefix`` is listed, not its children.
+        """
+        return await asyncio.to_thread(self._list_keys, prefix, start_after, limit)
+
+
+class S3Backend:
+    """S3-compatible backend; blocking boto3 calls run in worker threads."""
+
+    shared = True
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        prefix: str = '',
+        endpoint_url: Optional[str] = None,
+        part_size: int = 8 * MiB,
+        concurrency: int = 8,
+        client=None,
+    ):
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError('boto3 is required for the S3 backend')
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        # S3 rejects multipart parts below 5 MiB (except the last one).
+        self.part_size = max(part_size, 5 * MiB)
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _key(self, key: str) -> str:
+        return f'{self.prefix}/{key}' if self.prefix else key
+
+    def _is_missing(self, error: Exception) -> bool:
+        response = getattr(error, 'response', None) or {}
+        code = response.get('Error', {}).get('Code')
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    async def _call(self, method: str, **kwargs):
+        async with self._semaphore:
+            return await asyncio.to_thread(
+                getattr(self.client, method), Bucket=self.bucket, **kwargs
+            )
+
+    async def put(self, key: str, data: bytes) -> None:
+        if len(data) <= self.part_size:
+            await self._call('put_object', Key=self._key(key), Body=data)
+            return
+
+        async def chunks():
+            for start in range(0, len(data), self.part_size):
+                yield data[start : start + self.part_size]
+
+        await self.put_stream(key, chunks())
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        """Multipart upload; parts are sent concurrently as they fill up.
+
+        Once ``concurrency`` parts are pending, no more chunks are read until
+        the oldest part is uploaded, so a slow endpoint holds at most
+        ``concurrency + 1`` parts in memory.
+        """
+        upload = await self._call('create_multipart_upload', Key=self._key(key))
+        upload_id = upload['UploadId']
+        pending: List[asyncio.Task] = []
+        parts: List[dict] = []
+        buffer = bytearray()
+        written = 0
+
+        async def send(body: bytes) -> None:
+            if len(pending) >= self.concurrency:
+                parts.append(await pending.pop(0))
+            pending.append(
+                asyncio.create_task(
+                    self._call(
+                        'upload_part',
+                        Key=self._key(key),
+                        UploadId=upload_id,
+                        PartNumber=len(parts) + len(pending) + 1,
+                        Body=body,
+                    )
+                )
+            )
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                written += len(chunk)
+                while len(buffer) >= self.part_size:
+                    part = bytes(buffer[: self.part_size])
+                    del buffer[: self.part_size]
+                    await send(part)
+            if buffer or not (parts or pending):
+                await send(bytes(buffer))
+            while pending:
+                parts.append(await pending.pop(0))
+            await self._call(
+                'complete_multipart_upload',
+                Key=self._key(key),
+                UploadId=upload_id,
+                MultipartUpload={
+                    'Parts': [
+                        {'ETag': part['ETag'], 'PartNumber': number}
+                        for number, part in enumerate(parts, start=1)
+                    ]
+                },
+            )
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            await self._call(
+                'abort_multipart_upload', Key=self._key(key), UploadId=upload_id
+            )
+            raise
+        return written
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            head = await self._call('head_object', Key=self._key(key))
+        except Exception as e:  # noqa: BLE001 - botocore ClientError
+            if self._is_missing(e):
+                return None
+            raise
+        return head['ContentLength']
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = await self._call(
+            'get_object', Key=self._key(key), Range=f'bytes={start}-{end}'
+        )
+        return await asyncio.to_thread(response['Body'].read)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        size = await self.size(key)
+        if size is None:
+            return None
+        if size <= self.part_size:
+            response = await self._call('get_object', Key=self._key(key))
+            return await asyncio.to_thread(response['Body'].read)
+        parts = await asyncio.gather(
+            *(
+                self.get_range(key, start, end)
+                for start, end in split_ranges(size, self.part_size)
+            )
+        )
+        return b''.join(parts)
+
+    async def list_keys(
+        self, prefix: str, *, start_after: Optional[str] = None, limit: int = 1000
+    ) -> List[str]:
+        """Keys under ``prefix`` in lexicographic order."""
+        kwargs = {'Prefix': self._key(prefix), 'MaxKeys': limit}
+        if start_after is not None:
+            kwargs['StartAfter'] = self._key(start_after)
+        response = await self._call('list_objects_v2', **kwargs)
+        strip = len(self._key(''))
+        return [item['Key'][strip:] for item in response.get('Contents', [])]
+
+
+class CachedBackend:
+    """Write-through local copy in front of a shared remote backend.
+
+    The local copy holds at most ``max_bytes``; the least recently used
+    objects are deleted to make room.  Files left by an earlier process are
+    adopted oldest first, so a restart does not lose track of them.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        remote: StorageBackend,
+        local: FilesystemBackend,
+        *,
+        max_bytes: int = 1024 * MiB,
+    ):
+        self.remote = remote
+        self.local = local
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, int]' = OrderedDict(local.scan())
+        self._size = sum(self._entries.values())
+        self.local.remove(self._over_budget())
+
+    def _touch(self, key: str) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def _over_budget(self) -> List[str]:
+        evicted = []
+        while self._size > self.max_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._size -= size
+            evicted.append(key)
+        return evicted
+
+    async def _cache(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        await self.local.put(key, data)
+        self._size += len(data) - self._entries.pop(key, 0)
+        self._entries[key] = len(data)
+        evicted = self._over_budget()
+        if evicted:
+            await asyncio.to_thread(self.local.remove, evicted)
+
+    async def put(self, key: str, data: bytes) -> None:
+        await self.remote.put(key, data)
+        await self._cache(key, data)
+
+    async def put_stream(self, key: str, chunks: AsyncIterator[bytes]) -> int:
+        # Large uploads go straight to the remote; reads populate the cache.
+        return await self.remote.put_stream(key, chunks)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = await self.local.get(key)
+        if data is not None:
+            self._touch(key)
+            return data
+        data = await self.remote.get(key)
+        if data is not None:
+            await self._cache(key, data)
+        return data
+
+    async def get_range(self, key: str, start: int, end: int) -> bytes:
+        if await self.local.size(key) is not None:
+            try:
+                data = await self.local.get_range(key, start, end)
+            except FileNotFoundError:  # evicted meanwhile
+                pass
+            else:
+                self._touch(key)
+                return data
+        return await self.remote.get_range(key, start, end)
+
+    async def size(self, key: str) -> Optional[int]:
+        size = await self.local.size(key)
+        return size if size is not None else await self.remote.size(key)
+
+    async def list_keys(
+        self, prefix: str, *, start_after: Optional[str] = None, limit: int = 1000
+    ) -> List[str]:
+        # The local copy only holds what this replica has seen.
+        return await self.remote.list_keys(prefix, start_after=start_after, limit=limit)
+
+
+def backend_from_env(storage_dir: Path) -> StorageBackend:
+    """Build the backend selected by ``ARTIFACT_STORAGE_BACKEND``."""
+    kind = os.getenv('ARTIFACT_STORAGE_BACKEND', 'filesystem')
+    if kind == 'filesystem':
+        return FilesystemBackend(storage_dir)
+    if kind == 's3':
+        remote = S3Backend(
+            os.environ['ARTIFACT_S3_BUCKET'],
+            prefix=os.getenv('ARTIFACT_S3_PREFIX', ''),
+            endpoint_url=os.getenv('ARTIFACT_S3_ENDPOINT_URL') or None,
+            part_size=int(os.getenv('ARTIFACT_S3_PART_SIZE', str(8 * MiB))),
+            concurrency=int(os.getenv('ARTIFACT_S3_CONCURRENCY', '8')),
+        )
+        return CachedBackend(
+            remote,
+            FilesystemBackend(storage_dir / 'cache'),
+            max_bytes=int(os.getenv('ARTIFACT_LOCAL_CACHE_MAX_BYTES', str(1024 * MiB))),
+        )
+    raise ValueError(f'Unknown ARTIFACT_STORAGE_BACKEND: {kind}')
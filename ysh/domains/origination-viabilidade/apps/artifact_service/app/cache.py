@@ -0,0 +1,64 @@
+"""Size-bounded LRU cache of serialized artifacts."""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+Key = Tuple[str, str]  # (artifact type, artifact id)
+
+
+class ArtifactCache:
+    """Keeps the JSON bytes and digest of recently read artifacts.
+
+    Bounded by the total size of the cached bytes rather than by entry count,
+    since proposals vary from a few hundred bytes to several megabytes.
+    Entries larger than ``max_entry_bytes`` are never cached so one big
+    artifact cannot flush the hot set.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self._entries: 'OrderedDict[Key, Tuple[str, bytes]]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Key) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Key, digest: str, data: bytes) -> None:
+        if self.max_bytes <= 0 or len(data) > self.max_entry_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[key] = (digest, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate(self, key: Key) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
@@ -0,0 +1,216 @@
+"""Persistent artifact index backed by SQLite."""
+
+import asyncio
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    type TEXT NOT NULL,
+    id TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    swarm_id TEXT,
+    trace_id TEXT,
+    PRIMARY KEY (type, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS artifact_parents (
+    type TEXT NOT NULL,
+    parent_swarm_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (type, parent_swarm_id, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Secondary indexes on the SwarmContext fields, ordered for keyset paging.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS artifacts_swarm_idx
+    ON artifacts (type, swarm_id, created_at, id) WHERE swarm_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS artifacts_trace_idx
+    ON artifacts (type, trace_id, created_at, id) WHERE trace_id IS NOT NULL;
+"""
+
+ARTIFACT_COLUMNS = (
+    'type',
+    'id',
+    'digest',
+    'codec',
+    'size',
+    'created_at',
+    'swarm_id',
+    'trace_id',
+)
+
+
+class ArtifactIndex:
+    """Maps ``(type, id)`` to the content digest of the stored blob.
+
+    Replaces the startup directory scan: lookups hit the primary key and the
+    index survives restarts.  SQLite calls run in worker threads so they never
+    block the event loop; a single connection in WAL mode is shared behind a
+    lock, which keeps writes serialized without SQLITE_BUSY retries.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use; callers hold ``self._lock``."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), check_same_thread=False, isolation_level=None
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(artifacts)')}
+            for column in ('swarm_id', 'trace_id'):
+                if column not in columns:
+                    # Index files created before SwarmContext was indexed.
+                    conn.execute(f'ALTER TABLE artifacts ADD COLUMN {column} TEXT')
+            conn.executescript(INDEXES)
+            self._conn = conn
+        return self._conn
+
+    def _run(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._connection().execute(sql, tuple(params)).fetchall()
+
+    def _run_many(self, statements: List[Tuple[str, List[Tuple]]]) -> None:
+        """Run ``(sql, rows)`` pairs with ``executemany`` in one transaction."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN')
+            try:
+                for sql, rows in statements:
+                    conn.executemany(sql, rows)
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    async def get(self, artifact_type: str, artifact_id: str) -> Optional[Dict]:
+        rows = await asyncio.to_thread(
+            self._run,
+            'SELECT * FROM artifacts WHERE type = ? AND id = ?',
+            (artifact_type, artifact_id),
+        )
+        return dict(rows[0]) if rows else None
+
+    async def get_many(
+        self, artifact_type: str, artifact_ids: List[str]
+    ) -> Dict[str, Dict]:
+        """Records of ``artifact_ids`` that exist, keyed by id."""
+        found: Dict[str, Dict] = {}
+        # Stay below SQLite's default bound-parameter limit.
+        for start in range(0, len(artifact_ids), 500):
+            chunk = artifact_ids[start : start + 500]
+            rows = await asyncio.to_thread(
+                self._run,
+                'SELECT * FROM artifacts WHERE type = ? AND id IN '
+                f'({", ".join("?" * len(chunk))})',
+                (artifact_type, *chunk),
+            )
+            found.update((row['id'], dict(row)) for row in rows)
+        return found
+
+    async def put_many(self, records: List[Dict[str, Any]]) -> None:
+        """Insert or replace index records in one transaction."""
+        placeholders = ', '.join('?' * len(ARTIFACT_COLUMNS))
+        statements = [
+            (
+                f'INSERT OR REPLACE INTO artifacts ({", ".join(ARTIFACT_COLUMNS)}) '
+                f'VALUES ({placeholders})',
+                [tuple(r.get(c) for c in ARTIFACT_COLUMNS) for r in records],
+            ),
+            (
+                'DELETE FROM artifact_parents WHERE type = ? AND id = ?',
+                [(r['type'], r['id']) for r in records],
+            ),
+            (
+                'INSERT OR IGNORE INTO artifact_parents '
+                '(type, parent_swarm_id, id) VALUES (?, ?, ?)',
+                [
+                    (r['type'], parent, r['id'])
+                    for r in records
+                    for parent in r.get('parent_swarm_ids') or ()
+                ],
+            ),
+        ]
+        await asyncio.to_thread(self._run_many, statements)
+
+    async def list(
+        self,
+        artifact_type: str,
+        *,
+        swarm_id: Optional[str] = None,
+        trace_id: Optional[str] = None,
+        parent_swarm_id: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """Records matching the SwarmContext filters, oldest first.
+
+        ``after`` is the ``(created_at, id)`` of the last record of the
+        previous page; paging uses the composite indexes instead of OFFSET.
+        """
+        sql = 'SELECT a.* FROM artifacts AS a'
+        clauses = ['a.type = ?']
+        params: List[Any] = [artifact_type]
+        if parent_swarm_id is not None:
+            sql += (
+                ' JOIN artifact_parents AS p'
+                ' ON p.type = a.type AND p.id = a.id'
+            )
+            clauses.append('p.parent_swarm_id = ?')
+            params.append(parent_swarm_id)
+        if swarm_id is not None:
+            clauses.append('a.swarm_id = ?')
+            params.append(swarm_id)
+        if trace_id is not None:
+            clauses.append('a.trace_id = ?')
+            params.append(trace_id)
+        if after is not None:
+            clauses.append('(a.created_at, a.id) > (?, ?)')
+            params.extend(after)
+        sql += f' WHERE {" AND ".join(clauses)} ORDER BY a.created_at, a.id LIMIT ?'
+        params.append(limit)
+        return [dict(row) for row in await asyncio.to_thread(self._run, sql, params)]
+
+    async def put(self, record: Dict[str, Any]) -> None:
+        await self.put_many([record])
+
+    async def count(self) -> int:
+        rows = await asyncio.to_thread(self._run, 'SELECT COUNT(*) FROM artifacts')
+        return rows[0][0]
+
+    async def get_meta(self, key: str) -> Optional[str]:
+        rows = await asyncio.to_thread(
+            self._run, 'SELECT value FROM meta WHERE key = ?', (key,)
+        )
+        return rows[0][0] if rows else None
+
+    async def set_meta(self, key: str, value: str) -> None:
+        await asyncio.to_thread(
+            self._run,
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            (key, value),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,21 +1,41 @@
-import json
+"""Artifact Service: contracts and proposals for agent swarms.
+
+Run with ``uvicorn app.main:app --port 8005`` from this directory.
+"""
+
+import base64
+import mimetypes
 import os
+import re
 import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Annotated, Any, List, Dict, Optional, Union
 
-from fastapi import Body, FastAPI, HTTPException, Query
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, validator
 
+from app.backends import backend_from_env, read_stream
+from app.cache import ArtifactCache
+from app.index import ArtifactIndex
+from app.storage import (
+    ArtifactRepository,
+    BlobStore,
+    Codec,
+    CodecUnavailableError,
+    dumps,
+    loads,
+)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001
     """Handle application startup and shutdown events."""
-    load_index()
+    await repository.migrate_legacy(STORAGE_DIR, ARTIFACT_TYPES)
     yield
-    artifact_index.clear()
+    repository.index.close()
 
 
 app = FastAPI(
@@ -27,19 +47,33 @@ app = FastAPI(
 
 STORAGE_DIR = Path(os.getenv('ARTIFACT_STORAGE_DIR', './data'))
 STORAGE_DIR.mkdir(exist_ok=True)
+ARTIFACT_TYPES = ['contracts', 'proposals']
+MAX_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 1000
+# Blobs read per chunk while streaming a listing page.
+STREAM_CHUNK_SIZE = 50
+ATTACHMENT_MAX_BYTES = int(os.getenv('ARTIFACT_ATTACHMENT_MAX_BYTES', str(100 * 2**20)))
+ATTACHMENT_NAME = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$')
+
+repository = ArtifactRepository(
+    BlobStore(backend_from_env(STORAGE_DIR)),
+    ArtifactIndex(STORAGE_DIR / 'index.sqlite3'),
+    Codec(
+        # zstd blobs can only be read by replicas with zstandard installed.
+        compression=os.getenv('ARTIFACT_COMPRESSION', 'none'),
+        threshold=int(os.getenv('ARTIFACT_COMPRESSION_THRESHOLD', '4096')),
+    ),
+    ArtifactCache(
+        max_bytes=int(os.getenv('ARTIFACT_CACHE_MAX_BYTES', str(64 * 2**20)))
+    ),
+)
 
-artifact_index: Dict[str, Path] = {}
+@app.exception_handler(CodecUnavailableError)
+async def codec_unavailable(request: Request, exc: CodecUnavailableError):
+    """A peer wrote a blob this replica cannot decode: retry elsewhere."""
+    return JSONResponse(status_code=503, content={'detail': str(exc)})
 
 
-def load_index():
-    """Load existing artifacts from the storage directory."""
-    for artifact_type in ['contracts', 'proposals']:
-        type_dir = STORAGE_DIR / artifact_type
-        type_dir.mkdir(exist_ok=True)
-        for file_path in type_dir.glob('*.json'):
-            artifact_id = file_path.stem
-            artifact_index[artifact_id] = file_path
-            
 # Modelos comuns
 class SwarmContext(BaseModel):
     """Contexto para coordenação de swarms."""
@@ -58,32 +92,203 @@ class Artifact(BaseModel):
     content: dict[str, Any] = Field(..., description="The artifact's content.")
 
 
+class BatchCreateItem(BaseModel):
+    """One artifact of a batch create request."""
+
+    content: dict[str, Any]
+    swarm_context: Optional[SwarmContext] = None
+
+
+class BatchCreateRequest(BaseModel):
+    items: List[BatchCreateItem] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_SIZE
+    )
+
+
+class BatchCreateResponse(BaseModel):
+    artifacts: List[Artifact]
+
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchGetResponse(BaseModel):
+    artifacts: List[Artifact]
+    missing: List[str]
+
+
+def _check_type(artifact_type: str) -> None:
+    if artifact_type not in ARTIFACT_TYPES:
+        raise HTTPException(status_code=400, detail='Invalid artifact type.')
+
+
+def _etag(digest: str) -> str:
+    return f'"{digest}"'
+
+
+def _client_digests(request: Request) -> tuple:
+    """Digests named by ``If-None-Match`` (weak validators compare equal)."""
+    header = request.headers.get('if-none-match', '')
+    tags = (tag.strip() for tag in header.split(',') if tag.strip())
+    return tuple(tag.removeprefix('W/').strip('"') for tag in tags)
+
+
+def _encode_cursor(record: Dict[str, Any]) -> str:
+    raw = dumps([record['created_at'], record['id']])
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, artifact_id = loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), str(artifact_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail='Invalid cursor.') from e
+
+
+# Rotas ``:batchGet``/``:batchCreate`` antes de ``/artifacts/{artifact_type}``,
+# cujo parâmetro também casaria com ``proposals:batchGet``.
+@app.post(
+    '/artifacts/{artifact_type}:batchGet', response_model=BatchGetResponse
+)
+async def batch_get_artifacts(artifact_type: str, request: BatchGetRequest):
+    """Retrieve several artifacts of one type in a single round trip."""
+    _check_type(artifact_type)
+    ids = list(dict.fromkeys(request.ids))
+    try:
+        contents = await repository.load_many(artifact_type, ids)
+    except (OSError, ValueError) as e:
+        raise HTTPException(
+            status_code=500, detail=f'Failed to read artifact: {e}'
+        ) from e
+    return {
+        'artifacts': [
+            {
+                'id': artifact_id,
+                'type': artifact_type,
+                'content': contents[artifact_id],
+            }
+            for artifact_id in ids
+            if artifact_id in contents
+        ],
+        'missing': [artifact_id for artifact_id in ids if artifact_id not in contents],
+    }
+
+
+@app.post(
+    '/artifacts/{artifact_type}:batchCreate',
+    status_code=201,
+    response_model=BatchCreateResponse,
+)
+async def batch_create_artifacts(artifact_type: str, request: BatchCreateRequest):
+    """Create several artifacts with one index transaction."""
+    _check_type(artifact_type)
+    items = []
+    for item in request.items:
+        artifact_id = str(uuid.uuid4())
+        item.content[f'{artifact_type[:-1]}Id'] = artifact_id
+        context = item.swarm_context.model_dump() if item.swarm_context else None
+        items.append((artifact_id, item.content, context))
+    try:
+        await repository.save_many(artifact_type, items)
+    except OSError as e:
+        raise HTTPException(
+            status_code=500, detail=f'Failed to write artifact: {e}'
+        ) from e
+    return {
+        'artifacts': [
+            {'id': artifact_id, 'type': artifact_type, 'content': content}
+            for artifact_id, content, _ in items
+        ]
+    }
+
+
+@app.get('/artifacts/{artifact_type}')
+async def list_artifacts(
+    artifact_type: str,
+    swarm_id: Optional[str] = None,
+    trace_id: Optional[str] = None,
+    parent_swarm_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Stream one page of artifacts filtered by SwarmContext fields.
+
+    The body is ``{"items": [...], "next_cursor": ...}``; items are written
+    as their blobs are read so large pages never sit fully in memory.
+    """
+    _check_type(artifact_type)
+    if swarm_id is None and trace_id is None and parent_swarm_id is None:
+        raise HTTPException(
+            status_code=400,
+            detail='One of swarm_id, trace_id or parent_swarm_id is required.',
+        )
+    records = await repository.list(
+        artifact_type,
+        swarm_id=swarm_id,
+        trace_id=trace_id,
+        parent_swarm_id=parent_swarm_id,
+        after=_decode_cursor(cursor) if cursor else None,
+        limit=limit + 1,
+    )
+    next_cursor = _encode_cursor(records[limit - 1]) if len(records) > limit else None
+    records = records[:limit]
+    for record in records:
+        # Fail before streaming starts; the status cannot change afterwards.
+        repository.codec.require(record['codec'])
+
+    async def body():
+        yield b'{"items":['
+        for start in range(0, len(records), STREAM_CHUNK_SIZE):
+            chunk = records[start : start + STREAM_CHUNK_SIZE]
+            blobs = await repository.read_records(chunk)
+            for position, (record, data) in enumerate(zip(chunk, blobs)):
+                prefix = b',' if start + position else b''
+                yield (
+                    prefix
+                    + b'{"id":'
+                    + dumps(record['id'])
+                    + b',"type":'
+                    + dumps(artifact_type)
+                    + b',"content":'
+                    + data
+                    + b'}'
+                )
+        yield b'],"next_cursor":' + dumps(next_cursor) + b'}'
+
+    return StreamingResponse(body(), media_type='application/json')
+
+
 @app.post(
     '/artifacts/{artifact_type}', status_code=201, response_model=Artifact
 )
 async def create_artifact(
     artifact_type: str,
     content: Annotated[dict[str, Any], Body()],
+    swarm_id: Optional[str] = None,
+    trace_id: Optional[str] = None,
+    parent_swarm_ids: Annotated[Optional[List[str]], Query()] = None,
 ):
     """Create a new artifact (contract or proposal)."""
-    if artifact_type not in ['contracts', 'proposals']:
-        raise HTTPException(status_code=400, detail='Invalid artifact type.')
+    _check_type(artifact_type)
 
     artifact_id = str(uuid.uuid4())
     content[f'{artifact_type[:-1]}Id'] = artifact_id
-
-    type_dir = STORAGE_DIR / artifact_type
-    file_path = type_dir / f'{artifact_id}.json'
+    swarm_context = SwarmContext(
+        swarm_id=swarm_id, trace_id=trace_id, parent_swarm_ids=parent_swarm_ids
+    )
 
     try:
-        with file_path.open('w') as f:
-            json.dump(content, f, indent=2)
+        await repository.save(
+            artifact_type, artifact_id, content, swarm_context.model_dump()
+        )
     except OSError as e:
         raise HTTPException(
             status_code=500, detail=f'Failed to write artifact: {e}'
         ) from e
 
-    artifact_index[artifact_id] = file_path
     return {'id': artifact_id, 'type': artifact_type, 'content': content}
 
 
@@ -91,29 +296,129 @@ async def create_artifact(
     '/artifacts/{artifact_type}/{artifact_id}',
     response_model=Artifact,
 )
-async def get_artifact(artifact_type: str, artifact_id: str):
-    """Retrieve an artifact by its type and ID."""
-    if artifact_type not in ['contracts', 'proposals']:
-        raise HTTPException(status_code=400, detail='Invalid artifact type.')
+async def get_artifact(artifact_type: str, artifact_id: str, request: Request):
+    """Retrieve an artifact by its type and ID.
+
+    The ETag is the digest of the stored blob; a matching ``If-None-Match``
+    yields ``304`` without reading the blob.
+    """
+    _check_type(artifact_type)
+
+    known = _client_digests(request)
+    try:
+        entry = await repository.get_cached(artifact_type, artifact_id, known)
+    except (OSError, ValueError) as e:
+        raise HTTPException(
+            status_code=500, detail=f'Failed to read artifact: {e}'
+        ) from e
+
+    if entry is None:
+        raise HTTPException(status_code=404, detail='Artifact not found.')
+
+    digest, data = entry
+    headers = {'ETag': _etag(digest)}
+    if digest in known or '*' in known:
+        return Response(status_code=304, headers=headers)
+    body = (
+        b'{"id":' + dumps(artifact_id)
+        + b',"type":' + dumps(artifact_type)
+        + b',"content":' + data + b'}'
+    )
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+def _attachment_key(artifact_type: str, artifact_id: str, name: str) -> str:
+    if not ATTACHMENT_NAME.match(name):
+        raise HTTPException(status_code=400, detail='Invalid attachment name.')
+    return f'attachments/{artifact_type}/{artifact_id}/{name}'
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple]:
+    """Inclusive ``(start, end)`` of a single ``bytes=`` range, if any."""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416, headers={'Content-Range': f'bytes */{size}'}
+        )
+    return start, end
 
-    file_path = artifact_index.get(artifact_id)
 
-    expected_path_part = (STORAGE_DIR / artifact_type).name
-    if not file_path or expected_path_part not in str(file_path):
+@app.put(
+    '/artifacts/{artifact_type}/{artifact_id}/attachments/{name}',
+    status_code=201,
+)
+async def put_attachment(
+    artifact_type: str, artifact_id: str, name: str, request: Request
+):
+    """Upload a binary attachment (e.g. a proposal PDF) for an artifact.
+
+    The request body is streamed to the storage backend; on S3 it becomes a
+    multipart upload whose parts are sent in parallel.
+    """
+    _check_type(artifact_type)
+    key = _attachment_key(artifact_type, artifact_id, name)
+    if await repository.lookup(artifact_type, artifact_id) is None:
         raise HTTPException(status_code=404, detail='Artifact not found.')
 
+    async def chunks():
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > ATTACHMENT_MAX_BYTES:
+                raise HTTPException(status_code=413, detail='Attachment too large.')
+            yield chunk
+
     try:
-        with file_path.open() as f:
-            read_content: dict[str, Any] = json.load(f)
-    except (OSError, json.JSONDecodeError) as e:
+        size = await repository.blobs.backend.put_stream(key, chunks())
+    except OSError as e:
         raise HTTPException(
-            status_code=500, detail=f'Failed to read artifact: {e}'
+            status_code=500, detail=f'Failed to write attachment: {e}'
         ) from e
+    return {'name': name, 'size': size}
+
 
-    return {'id': artifact_id, 'type': artifact_type, 'content': read_content}
+@app.get('/artifacts/{artifact_type}/{artifact_id}/attachments/{name}')
+async def get_attachment(
+    artifact_type: str, artifact_id: str, name: str, request: Request
+):
+    """Download an attachment; a single ``Range`` yields ``206``.
 
+    Bodies are streamed from parallel range reads of the backend object.
+    """
+    _check_type(artifact_type)
+    key = _attachment_key(artifact_type, artifact_id, name)
+    backend = repository.blobs.backend
+    size = await backend.size(key)
+    if size is None:
+        raise HTTPException(status_code=404, detail='Attachment not found.')
+
+    headers = {'Accept-Ranges': 'bytes'}
+    media_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    byte_range = _parse_range(request.headers.get('range', ''), size)
+    if size == 0:
+        return Response(content=b'', media_type=media_type, headers=headers)
+    start, end = byte_range or (0, size - 1)
+    headers['Content-Length'] = str(end - start + 1)
+    status_code = 200
+    if byte_range is not None:
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return StreamingResponse(
+        read_stream(backend, key, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
 
-if __name__ == '__main__':
-    import uvicorn
 
-    uvicorn.run(app, host='0.0.0.0', port=8005)
+@app.get('/metrics/cache')
+async def cache_metrics():
+    """Hit/miss counters and occupancy of the artifact read cache."""
+    return repository.cache.stats()
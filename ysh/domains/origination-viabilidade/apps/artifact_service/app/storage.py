@@ -0,0 +1,386 @@
+"""Content-addressed blob storage for artifacts.
+
+Blobs are named by the SHA-256 of their stored bytes and sharded into
+``blobs/ab/cd/<digest>`` so no directory grows past a few thousand entries.
+Content is serialized compactly with orjson (stdlib json as a fallback) and,
+when ``zstandard`` is installed and enabled, compressed above a size
+threshold.  Bytes live in a pluggable :mod:`app.backends` backend; with a
+shared backend each artifact also gets a small ``refs/<type>/<id>`` object so
+replicas can resolve artifacts written by their peers, plus an empty
+``listings/<type>/<field>/<value hash>/<created_at>_<id>`` marker per
+SwarmContext value.  Listing those prefixes in key order gives every replica
+the same keyset-paged SwarmContext listings.
+"""
+
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.backends import StorageBackend
+from app.cache import ArtifactCache
+from app.index import ArtifactIndex
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional.
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstd is optional.
+    zstandard = None
+
+CODEC_JSON = 'json'
+CODEC_ZSTD = 'json+zstd'
+# Blob reads/writes in flight per batch request.
+IO_CONCURRENCY = 32
+# Listing filters, most selective first; the first one given is scanned.
+LISTING_FIELDS = ('parent_swarm_id', 'swarm_id', 'trace_id')
+LISTING_PAGE_SIZE = 200
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize ``content`` to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, separators=(',', ':'), ensure_ascii=False
+    ).encode('utf-8')
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CodecUnavailableError(RuntimeError):
+    """A blob was written with a codec this replica cannot decode."""
+
+
+class Codec:
+    """Encodes artifact content, compressing large payloads with zstd."""
+
+    def __init__(self, compression: str = 'none', threshold: int = 4096):
+        self.compress = compression == 'zstd' and zstandard is not None
+        self.threshold = threshold
+
+    def encode(self, content: Any) -> Tuple[bytes, str]:
+        data = dumps(content)
+        if self.compress and len(data) >= self.threshold:
+            return zstandard.ZstdCompressor(level=3).compress(data), CODEC_ZSTD
+        return data, CODEC_JSON
+
+    def require(self, codec: str) -> None:
+        """Raise ``CodecUnavailableError`` if ``codec`` cannot be decoded."""
+        if codec == CODEC_ZSTD and zstandard is None:
+            raise CodecUnavailableError(
+                f'zstandard is required to read {codec} artifacts'
+            )
+
+    def decode_bytes(self, data: bytes, codec: str) -> bytes:
+        """Return the JSON bytes of a stored blob."""
+        self.require(codec)
+        if codec == CODEC_ZSTD:
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+
+class BlobStore:
+    """Sharded, content-addressed objects under ``blobs/`` in a backend."""
+
+    def __init__(self, backend: StorageBackend):
+        self.backend = backend
+
+    def key_for(self, digest: str) -> str:
+        return f'blobs/{digest[:2]}/{digest[2:4]}/{digest}'
+
+    async def put(self, data: bytes) -> str:
+        """Store ``data`` and return its digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        key = self.key_for(digest)
+        # Same digest, same bytes: nothing to do.
+        if await self.backend.size(key) is None:
+            await self.backend.put(key, data)
+        return digest
+
+    async def get(self, digest: str) -> bytes:
+        data = await self.backend.get(self.key_for(digest))
+        if data is None:
+            raise FileNotFoundError(f'Missing blob {digest}')
+        return data
+
+
+class ArtifactRepository:
+    """Blob store plus persistent index: the artifact read/write path."""
+
+    def __init__(
+        self,
+        blobs: BlobStore,
+        index: ArtifactIndex,
+        codec: Codec,
+        cache: Optional[ArtifactCache] = None,
+    ):
+        self.blobs = blobs
+        self.index = index
+        self.codec = codec
+        self.cache = cache or ArtifactCache(max_bytes=0)
+
+    def _record(
+        self,
+        artifact_type: str,
+        artifact_id: str,
+        content: Any,
+        swarm_context: Optional[Dict[str, Any]],
+    ) -> Tuple[Dict, bytes]:
+        data, codec = self.codec.encode(content)
+        context = swarm_context or {}
+        record = {
+            'type': artifact_type,
+            'id': artifact_id,
+            'codec': codec,
+            'size': len(data),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'swarm_id': context.get('swarm_id'),
+            'trace_id': context.get('trace_id'),
+            'parent_swarm_ids': context.get('parent_swarm_ids') or [],
+        }
+        return record, data
+
+    async def save_many(
+        self,
+        artifact_type: str,
+        items: List[Tuple[str, Any, Optional[Dict[str, Any]]]],
+    ) -> List[Dict]:
+        """Persist ``(id, content, swarm_context)`` items; one index commit."""
+        encoded = [self._record(artifact_type, *item) for item in items]
+        semaphore = asyncio.Semaphore(IO_CONCURRENCY)
+
+        async def put(data: bytes) -> str:
+            async with semaphore:
+                return await self.blobs.put(data)
+
+        digests = await asyncio.gather(*(put(data) for _, data in encoded))
+        records = [
+            {**record, 'digest': digest}
+            for (record, _), digest in zip(encoded, digests)
+        ]
+        await self.index.put_many(records)
+        if self.blobs.backend.shared:
+            await asyncio.gather(
+                *(self._put_ref(record) for record in records),
+                *(
+                    self.blobs.backend.put(key, b'')
+                    for record in records
+                    for key in self._listing_keys(record)
+                ),
+            )
+        for record in records:
+            self.cache.invalidate((artifact_type, record['id']))
+        return records
+
+    def _ref_key(self, artifact_type: str, artifact_id: str) -> str:
+        return f'refs/{artifact_type}/{artifact_id}'
+
+    async def _put_ref(self, record: Dict) -> None:
+        await self.blobs.backend.put(
+            self._ref_key(record['type'], record['id']), dumps(record)
+        )
+
+    def _listing_prefix(self, artifact_type: str, field: str, value: str) -> str:
+        # Hashed so any value is a safe, fixed-length key segment.
+        digest = hashlib.sha256(value.encode('utf-8')).hexdigest()
+        return f'listings/{artifact_type}/{field}/{digest}/'
+
+    def _listing_keys(self, record: Dict) -> List[str]:
+        values = {
+            'swarm_id': [record.get('swarm_id')],
+            'trace_id': [record.get('trace_id')],
+            'parent_swarm_id': record.get('parent_swarm_ids') or [],
+        }
+        marker = f"{record['created_at']}_{record['id']}"
+        return [
+            self._listing_prefix(record['type'], field, value) + marker
+            for field, field_values in values.items()
+            for value in field_values
+            if value is not None
+        ]
+
+    async def list(
+        self,
+        artifact_type: str,
+        *,
+        swarm_id: Optional[str] = None,
+        trace_id: Optional[str] = None,
+        parent_swarm_id: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: int = 100,
+    ) -> List[Dict]:
+        """Records matching the SwarmContext filters, oldest first.
+
+        With a shared backend the listing markers are scanned, so every
+        replica sees the artifacts written by its peers; otherwise the local
+        index answers.  ``after`` is the ``(created_at, id)`` keyset cursor.
+        """
+        filters = {
+            'swarm_id': swarm_id,
+            'trace_id': trace_id,
+            'parent_swarm_id': parent_swarm_id,
+        }
+        if not self.blobs.backend.shared:
+            return await self.index.list(
+                artifact_type, after=after, limit=limit, **filters
+            )
+        field = next(name for name in LISTING_FIELDS if filters[name] is not None)
+        prefix = self._listing_prefix(artifact_type, field, filters[field])
+        start_after = prefix + '_'.join(after) if after else None
+        records: List[Dict] = []
+        while len(records) < limit:
+            keys = await self.blobs.backend.list_keys(
+                prefix, start_after=start_after, limit=LISTING_PAGE_SIZE
+            )
+            if not keys:
+                break
+            start_after = keys[-1]
+            markers = [key[len(prefix) :].split('_', 1) for key in keys]
+            found = await self._lookup_many(
+                artifact_type, [artifact_id for _, artifact_id in markers]
+            )
+            for created_at, artifact_id in markers:
+                record = found.get(artifact_id)
+                # Markers outlive overwrites; only the current one counts.
+                if record is None or record['created_at'] != created_at:
+                    continue
+                if all(
+                    record.get(name) == value
+                    for name, value in filters.items()
+                    if name != 'parent_swarm_id' and value is not None
+                ):
+                    records.append(record)
+            if len(keys) < LISTING_PAGE_SIZE:
+                break
+        return records[:limit]
+
+    async def _lookup_many(
+        self, artifact_type: str, artifact_ids: List[str]
+    ) -> Dict[str, Dict]:
+        """Index records of ``artifact_ids``, resolving peers' refs if shared."""
+        records = await self.index.get_many(artifact_type, artifact_ids)
+        missing = [i for i in artifact_ids if i not in records]
+        if self.blobs.backend.shared and missing:
+            semaphore = asyncio.Semaphore(IO_CONCURRENCY)
+
+            async def lookup(artifact_id: str) -> Optional[Dict]:
+                async with semaphore:
+                    return await self.lookup(artifact_type, artifact_id)
+
+            found = await asyncio.gather(*(lookup(i) for i in missing))
+            records.update(
+                (record['id'], record) for record in found if record is not None
+            )
+        return records
+
+    async def lookup(self, artifact_type: str, artifact_id: str) -> Optional[Dict]:
+        """Index record, falling back to the shared ref written by a peer."""
+        record = await self.index.get(artifact_type, artifact_id)
+        if record is not None or not self.blobs.backend.shared:
+            return record
+        ref = await self.blobs.backend.get(self._ref_key(artifact_type, artifact_id))
+        if ref is None:
+            return None
+        record = loads(ref)
+        await self.index.put(record)
+        return record
+
+    async def save(
+        self,
+        artifact_type: str,
+        artifact_id: str,
+        content: Any,
+        swarm_context: Optional[Dict[str, Any]] = None,
+    ) -> Dict:
+        """Persist ``content`` and return its index record."""
+        records = await self.save_many(
+            artifact_type, [(artifact_id, content, swarm_context)]
+        )
+        return records[0]
+
+    async def read_record(self, record: Dict) -> bytes:
+        """JSON bytes of the blob referenced by an index ``record``."""
+        data = await self.blobs.get(record['digest'])
+        return self.codec.decode_bytes(data, record['codec'])
+
+    async def read_records(self, records: List[Dict]) -> List[bytes]:
+        semaphore = asyncio.Semaphore(IO_CONCURRENCY)
+
+        async def read(record: Dict) -> bytes:
+            async with semaphore:
+                return await self.read_record(record)
+
+        return await asyncio.gather(*(read(record) for record in records))
+
+    async def get_cached(
+        self,
+        artifact_type: str,
+        artifact_id: str,
+        known_digests: Tuple[str, ...] = (),
+    ) -> Optional[Tuple[str, Optional[bytes]]]:
+        """Return ``(digest, json_bytes)`` through the LRU cache.
+
+        When the digest is in ``known_digests`` (the client's ETags) the blob
+        is not read and ``json_bytes`` is ``None``.  ``None`` means unknown.
+        """
+        key = (artifact_type, artifact_id)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        record = await self.lookup(artifact_type, artifact_id)
+        if record is None:
+            return None
+        if record['digest'] in known_digests:
+            return record['digest'], None
+        data = await self.read_record(record)
+        self.cache.put(key, record['digest'], data)
+        return record['digest'], data
+
+    async def load_many(
+        self, artifact_type: str, artifact_ids: List[str]
+    ) -> Dict[str, Any]:
+        """Contents of the existing ``artifact_ids``, keyed by id."""
+        found: Dict[str, bytes] = {}
+        for artifact_id in artifact_ids:
+            cached = self.cache.get((artifact_type, artifact_id))
+            if cached is not None:
+                found[artifact_id] = cached[1]
+        missing = [i for i in artifact_ids if i not in found]
+        records = await self._lookup_many(artifact_type, missing)
+        blobs = await self.read_records(list(records.values()))
+        for record, data in zip(records.values(), blobs):
+            self.cache.put((artifact_type, record['id']), record['digest'], data)
+            found[record['id']] = data
+        return {artifact_id: loads(data) for artifact_id, data in found.items()}
+
+    def _legacy_files(self, root: Path, artifact_types: List[str]):
+        for artifact_type in artifact_types:
+            type_dir = root / artifact_type
+            if type_dir.is_dir():
+                for file_path in type_dir.glob('*.json'):
+                    yield artifact_type, file_path
+
+    async def migrate_legacy(self, root: Path, artifact_types: List[str]) -> int:
+        """Import ``<type>/<id>.json`` files from the flat layout, once."""
+        if await self.index.get_meta('legacy_migrated'):
+            return 0
+        migrated = 0
+        files = await asyncio.to_thread(
+            lambda: list(self._legacy_files(root, artifact_types))
+        )
+        for artifact_type, file_path in files:
+            content = loads(await asyncio.to_thread(file_path.read_bytes))
+            await self.save(artifact_type, file_path.stem, content)
+            migrated += 1
+        await self.index.set_meta('legacy_migrated', str(migrated))
+        return migrated
@@ -0,0 +1,56 @@
+"""Pytest configuration for the artifact service tests."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _ensure_app_on_path() -> None:
+    root = Path(__file__).resolve().parents[1]
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+
+
+_ensure_app_on_path()
+# app.main creates its storage directory at import time.
+os.environ.setdefault('ARTIFACT_STORAGE_DIR', tempfile.mkdtemp(prefix='artifacts-'))
+
+from app import main  # noqa: E402
+from app.backends import FilesystemBackend  # noqa: E402
+from app.cache import ArtifactCache  # noqa: E402
+from app.index import ArtifactIndex  # noqa: E402
+from app.storage import ArtifactRepository, BlobStore, Codec  # noqa: E402
+
+
+def make_repository(root: Path, backend=None, cache_bytes: int = 2**20):
+    return ArtifactRepository(
+        BlobStore(backend or FilesystemBackend(root / 'objects')),
+        ArtifactIndex(root / 'index.sqlite3'),
+        Codec(),
+        ArtifactCache(max_bytes=cache_bytes),
+    )
+
+
+@pytest.fixture
+def repository(tmp_path: Path) -> ArtifactRepository:
+    repository = make_repository(tmp_path)
+    yield repository
+    repository.index.close()
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch, repository) -> TestClient:
+    """The service wired to a ``FilesystemBackend`` under ``tmp_path``."""
+    monkeypatch.setattr(main, 'repository', repository)
+    monkeypatch.setattr(main, 'STORAGE_DIR', tmp_path)
+    with TestClient(main.app) as client:
+        yield client
+
+
+__all__ = ['make_repository']
@@ -0,0 +1,217 @@
+"""Tests for the storage backends, attachments and shared listings."""
+
+import asyncio
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.backends import (
+    MiB,
+    CachedBackend,
+    FilesystemBackend,
+    S3Backend,
+    read_stream,
+    split_ranges,
+)
+from conftest import make_repository
+
+
+def test_filesystem_backend_round_trip_and_listing(tmp_path: Path) -> None:
+    backend = FilesystemBackend(tmp_path)
+
+    async def run():
+        await backend.put('a/x2', b'2')
+        await backend.put('a/x1', b'1')
+        await backend.put('a/y', b'y')
+        return (
+            await backend.get('a/x1'),
+            await backend.get('a/missing'),
+            await backend.get_range('a/y', 0, 0),
+            await backend.size('a/x2'),
+            await backend.list_keys('a/x'),
+            await backend.list_keys('a/', start_after='a/x1', limit=1),
+            await backend.list_keys('none/'),
+        )
+
+    assert asyncio.run(run()) == (
+        b'1', None, b'y', 1, ['a/x1', 'a/x2'], ['a/x2'], []
+    )
+    with pytest.raises(ValueError):
+        backend.path_for('../escape')
+
+
+def test_read_stream_reassembles_ranges_in_order(tmp_path: Path) -> None:
+    backend = FilesystemBackend(tmp_path)
+    data = bytes(range(256)) * 4
+
+    async def run():
+        await backend.put('blob', data)
+        return [
+            chunk
+            async for chunk in read_stream(
+                backend, 'blob', 10, 1000, part_size=100, concurrency=3
+            )
+        ]
+
+    chunks = asyncio.run(run())
+    assert b''.join(chunks) == data[10:1001]
+    assert split_ranges(250, 100) == [(0, 99), (100, 199), (200, 249)]
+
+
+def test_cached_backend_writes_through_and_fills_on_read(tmp_path: Path) -> None:
+    remote = FilesystemBackend(tmp_path / 'remote')
+    local = FilesystemBackend(tmp_path / 'local')
+    backend = CachedBackend(remote, local)
+
+    async def run():
+        await backend.put('k1', b'one')
+        await remote.put('k2', b'two')  # written by a peer
+        before = await local.get('k2')
+        data = await backend.get('k2')
+        return before, data, await local.get('k1'), await local.get('k2')
+
+    assert asyncio.run(run()) == (None, b'two', b'one', b'two')
+
+
+def test_cached_backend_evicts_least_recently_used_over_budget(tmp_path: Path) -> None:
+    remote = FilesystemBackend(tmp_path / 'remote')
+    local = FilesystemBackend(tmp_path / 'local')
+    backend = CachedBackend(remote, local, max_bytes=10)
+
+    async def run():
+        await backend.put('a', b'aaaa')
+        await backend.put('b', b'bbbb')
+        await backend.get('a')  # 'b' is now the least recently used
+        await backend.put('c', b'cccc')
+        await backend.put('big', b'x' * 11)  # larger than the whole budget
+        return [key for key in ('a', 'b', 'c', 'big') if await local.size(key)]
+
+    assert asyncio.run(run()) == ['a', 'c']
+    assert asyncio.run(backend.get('b')) == b'bbbb'  # still served remotely
+
+    # A restarted replica adopts the files on disk, oldest first, and
+    # enforces the budget.
+    os.utime(local.path_for('c'), (1, 1))
+    restarted = CachedBackend(remote, local, max_bytes=4)
+    assert [key for key, _ in local.scan()] == ['b']
+    assert restarted._size == 4
+
+
+class _SlowS3Client:
+    """Just enough of a boto3 S3 client for multipart uploads."""
+
+    def __init__(self):
+        self.uploaded: dict = {}
+        self.completed = 0
+        self.lock = threading.Lock()
+
+    def create_multipart_upload(self, Bucket, Key):
+        return {'UploadId': 'u1'}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        time.sleep(0.02)
+        with self.lock:
+            self.uploaded[PartNumber] = Body
+            self.completed += 1
+        return {'ETag': f'etag-{PartNumber}'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.parts = MultipartUpload['Parts']
+
+
+def test_s3_put_stream_reads_ahead_at_most_concurrency_parts() -> None:
+    client = _SlowS3Client()
+    backend = S3Backend('bucket', part_size=5 * MiB, concurrency=2, client=client)
+    ahead = []
+
+    async def chunks():
+        for index in range(8):
+            ahead.append(index - client.completed)
+            yield bytes([index]) * (5 * MiB)
+
+    written = asyncio.run(backend.put_stream('blob', chunks()))
+    assert written == 8 * 5 * MiB
+    assert max(ahead) <= 3
+    assert [part['PartNumber'] for part in client.parts] == list(range(1, 9))
+    assert [client.uploaded[n][0] for n in range(1, 9)] == list(range(8))
+
+
+def test_attachment_upload_and_range_download(client) -> None:
+    artifact_id = client.post('/artifacts/proposals', json={}).json()['id']
+    url = f'/artifacts/proposals/{artifact_id}/attachments/proposal.pdf'
+    body = b'%PDF-' + bytes(range(200))
+
+    put = client.put(url, content=body)
+    full = client.get(url)
+    partial = client.get(url, headers={'Range': 'bytes=5-9'})
+    suffix = client.get(url, headers={'Range': 'bytes=-3'})
+    unsatisfiable = client.get(url, headers={'Range': 'bytes=999-'})
+
+    assert put.status_code == 201
+    assert put.json() == {'name': 'proposal.pdf', 'size': len(body)}
+    assert full.status_code == 200
+    assert full.content == body
+    assert full.headers['content-type'] == 'application/pdf'
+    assert partial.status_code == 206
+    assert partial.content == body[5:10]
+    assert partial.headers['content-range'] == f'bytes 5-9/{len(body)}'
+    assert suffix.content == body[-3:]
+    assert unsatisfiable.status_code == 416
+
+
+def test_attachment_requires_artifact_and_valid_name(client, monkeypatch) -> None:
+    url = '/artifacts/proposals/unknown/attachments/a.pdf'
+    assert client.put(url, content=b'x').status_code == 404
+    assert client.get(url).status_code == 404
+
+    artifact_id = client.post('/artifacts/proposals', json={}).json()['id']
+    base = f'/artifacts/proposals/{artifact_id}/attachments'
+    assert client.put(f'{base}/.hidden', content=b'x').status_code == 400
+    monkeypatch.setattr(main, 'ATTACHMENT_MAX_BYTES', 4)
+    assert client.put(f'{base}/big.bin', content=b'12345').status_code == 413
+
+
+def test_shared_backend_listings_match_across_replicas(
+    tmp_path: Path, monkeypatch
+) -> None:
+    def replica(name: str):
+        backend = CachedBackend(
+            FilesystemBackend(tmp_path / 'shared'),
+            FilesystemBackend(tmp_path / name / 'cache'),
+        )
+        return make_repository(tmp_path / name, backend=backend)
+
+    writer, reader = replica('a'), replica('b')
+    items = [
+        (f'id{n}', {'n': n}, {'swarm_id': 's1', 'parent_swarm_ids': ['p1']})
+        for n in range(5)
+    ]
+    asyncio.run(writer.save_many('contracts', items))
+    asyncio.run(writer.save('contracts', 'other', {}, {'swarm_id': 's2'}))
+
+    monkeypatch.setattr(main, 'repository', reader)
+    monkeypatch.setattr(main, 'STORAGE_DIR', tmp_path / 'b')
+    pages = []
+    with TestClient(main.app) as client:
+        params = {'swarm_id': 's1', 'limit': 2}
+        while True:
+            body = client.get('/artifacts/contracts', params=params).json()
+            pages.append([item['id'] for item in body['items']])
+            if body['next_cursor'] is None:
+                break
+            params['cursor'] = body['next_cursor']
+        by_parent = client.get(
+            '/artifacts/contracts', params={'parent_swarm_id': 'p1', 'swarm_id': 's2'}
+        ).json()
+
+    local = asyncio.run(writer.index.list('contracts', swarm_id='s1', limit=10))
+    assert [item for page in pages for item in page] == [r['id'] for r in local]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert by_parent['items'] == []
+    writer.index.close()
+    reader.index.close()
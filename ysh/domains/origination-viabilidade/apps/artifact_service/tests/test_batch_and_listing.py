@@ -0,0 +1,82 @@
+"""Tests for the batch endpoints and SwarmContext keyset listings."""
+
+
+def _create(client, items):
+    response = client.post('/artifacts/proposals:batchCreate', json={'items': items})
+    assert response.status_code == 201
+    return [artifact['id'] for artifact in response.json()['artifacts']]
+
+
+def test_batch_create_assigns_ids_in_request_order(client) -> None:
+    response = client.post(
+        '/artifacts/proposals:batchCreate',
+        json={'items': [{'content': {'n': 0}}, {'content': {'n': 1}}]},
+    )
+    assert response.status_code == 201
+    artifacts = response.json()['artifacts']
+    assert [artifact['content']['n'] for artifact in artifacts] == [0, 1]
+    for artifact in artifacts:
+        assert artifact['content']['proposalId'] == artifact['id']
+    assert client.post(
+        '/artifacts/proposals:batchCreate', json={'items': []}
+    ).status_code == 422
+
+
+def test_batch_get_keeps_request_order_and_reports_missing(client) -> None:
+    first, second = _create(client, [{'content': {'n': 0}}, {'content': {'n': 1}}])
+
+    response = client.post(
+        '/artifacts/proposals:batchGet',
+        json={'ids': [second, 'missing', first, second]},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [artifact['id'] for artifact in body['artifacts']] == [second, first]
+    assert body['artifacts'][0]['content']['n'] == 1
+    assert body['missing'] == ['missing']
+
+
+def _pages(client, **params):
+    ids, cursor = [], None
+    while True:
+        query = {**params, 'limit': 2, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/artifacts/proposals', params=query)
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body['items']) <= 2
+        ids.extend(item['id'] for item in body['items'])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return ids
+
+
+def test_listing_pages_by_swarm_trace_and_parent(client) -> None:
+    ids = _create(
+        client,
+        [
+            {
+                'content': {'n': n},
+                'swarm_context': {
+                    'swarm_id': 's1' if n < 5 else 's2',
+                    'trace_id': 't1' if n % 2 else 't2',
+                    'parent_swarm_ids': ['p1'] if n in (1, 6) else [],
+                },
+            }
+            for n in range(7)
+        ],
+    )
+
+    assert sorted(_pages(client, swarm_id='s1')) == sorted(ids[:5])
+    assert sorted(_pages(client, trace_id='t1')) == sorted(ids[1::2])
+    assert sorted(_pages(client, parent_swarm_id='p1')) == sorted([ids[1], ids[6]])
+    assert sorted(_pages(client, swarm_id='s1', trace_id='t2')) == sorted(
+        [ids[0], ids[2], ids[4]]
+    )
+
+
+def test_listing_requires_a_filter_and_a_valid_cursor(client) -> None:
+    assert client.get('/artifacts/proposals').status_code == 400
+    response = client.get(
+        '/artifacts/proposals', params={'swarm_id': 's1', 'cursor': '!!'}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+"""Tests for the byte-bounded artifact cache and conditional GETs."""
+
+import asyncio
+
+from app.cache import ArtifactCache
+
+
+def test_cache_evicts_least_recently_used_by_bytes() -> None:
+    cache = ArtifactCache(max_bytes=10, max_entry_bytes=10)
+    cache.put(('contracts', 'a'), 'da', b'aaaa')
+    cache.put(('contracts', 'b'), 'db', b'bbbb')
+    assert cache.get(('contracts', 'a')) == ('da', b'aaaa')  # a is now recent
+
+    cache.put(('contracts', 'c'), 'dc', b'cccc')
+
+    assert cache.get(('contracts', 'b')) is None
+    assert cache.get(('contracts', 'a')) is not None
+    assert cache.stats()['bytes'] == 8
+
+
+def test_cache_skips_oversized_entries_and_invalidates() -> None:
+    cache = ArtifactCache(max_bytes=80)  # entries up to 10 bytes
+    cache.put(('contracts', 'big'), 'd', b'x' * 11)
+    cache.put(('contracts', 'a'), 'd', b'aaaa')
+    cache.invalidate(('contracts', 'a'))
+
+    assert cache.stats() == {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0}
+
+
+def test_etag_round_trip_yields_304(client) -> None:
+    artifact_id = client.post('/artifacts/contracts', json={'a': 1}).json()['id']
+    first = client.get(f'/artifacts/contracts/{artifact_id}')
+    etag = first.headers['etag']
+
+    cached = client.get(
+        f'/artifacts/contracts/{artifact_id}', headers={'If-None-Match': etag}
+    )
+    weak = client.get(
+        f'/artifacts/contracts/{artifact_id}', headers={'If-None-Match': f'W/{etag}'}
+    )
+    stale = client.get(
+        f'/artifacts/contracts/{artifact_id}', headers={'If-None-Match': '"other"'}
+    )
+
+    assert cached.status_code == 304
+    assert cached.headers['etag'] == etag
+    assert weak.status_code == 304
+    assert stale.status_code == 200
+
+
+def test_writes_invalidate_cached_reads_and_metrics_count(client, repository) -> None:
+    asyncio.run(repository.save('contracts', 'c1', {'v': 1}))
+    assert client.get('/artifacts/contracts/c1').json()['content'] == {'v': 1}
+    assert client.get('/artifacts/contracts/c1').json()['content'] == {'v': 1}
+
+    asyncio.run(repository.save('contracts', 'c1', {'v': 2}))
+    assert client.get('/artifacts/contracts/c1').json()['content'] == {'v': 2}
+
+    stats = client.get('/metrics/cache').json()
+    assert stats['entries'] == 1
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
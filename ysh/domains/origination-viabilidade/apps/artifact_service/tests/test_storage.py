@@ -0,0 +1,133 @@
+"""Tests for the content-addressed blob store, index and codec."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from app import storage
+from app.backends import FilesystemBackend
+from app.index import ArtifactIndex
+from app.storage import CODEC_JSON, CODEC_ZSTD, BlobStore, Codec
+
+
+def test_codec_round_trips_json_below_and_above_threshold() -> None:
+    codec = Codec(compression='zstd', threshold=64)
+    for content in ({'a': 1}, {'text': 'ç' * 500}):
+        data, name = codec.encode(content)
+        assert json.loads(codec.decode_bytes(data, name)) == content
+    assert codec.encode({'a': 1})[1] == CODEC_JSON
+
+
+@pytest.mark.skipif(storage.zstandard is None, reason='zstandard not installed')
+def test_codec_compresses_large_payloads_with_zstd() -> None:
+    data, name = Codec(compression='zstd', threshold=64).encode({'x': 'y' * 1000})
+    assert name == CODEC_ZSTD
+    assert len(data) < 1000
+
+
+def test_codec_reports_missing_zstandard(monkeypatch) -> None:
+    monkeypatch.setattr(storage, 'zstandard', None)
+    with pytest.raises(storage.CodecUnavailableError):
+        Codec().decode_bytes(b'...', CODEC_ZSTD)
+
+
+def test_blob_store_shards_by_digest_and_deduplicates(tmp_path: Path) -> None:
+    blobs = BlobStore(FilesystemBackend(tmp_path))
+
+    async def run():
+        first = await blobs.put(b'{"a":1}')
+        second = await blobs.put(b'{"a":1}')
+        return first, second, await blobs.get(first)
+
+    first, second, data = asyncio.run(run())
+    assert first == second
+    assert data == b'{"a":1}'
+    path = tmp_path / 'blobs' / first[:2] / first[2:4] / first
+    assert path.read_bytes() == b'{"a":1}'
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(blobs.get('0' * 64))
+
+
+def test_index_persists_records_and_meta(tmp_path: Path) -> None:
+    record = {
+        'type': 'contracts',
+        'id': 'c1',
+        'digest': 'd' * 64,
+        'codec': CODEC_JSON,
+        'size': 7,
+        'created_at': '2025-01-01T00:00:00+00:00',
+        'swarm_id': 's1',
+        'trace_id': None,
+        'parent_swarm_ids': ['p1'],
+    }
+
+    async def write():
+        index = ArtifactIndex(tmp_path / 'index.sqlite3')
+        await index.put(record)
+        await index.set_meta('k', 'v')
+        index.close()
+
+    async def read():
+        index = ArtifactIndex(tmp_path / 'index.sqlite3')
+        try:
+            return (
+                await index.get('contracts', 'c1'),
+                await index.get_many('contracts', ['c1', 'missing']),
+                await index.get_meta('k'),
+                await index.count(),
+            )
+        finally:
+            index.close()
+
+    asyncio.run(write())
+    stored, many, meta, count = asyncio.run(read())
+    assert stored['digest'] == 'd' * 64
+    assert stored['swarm_id'] == 's1'
+    assert list(many) == ['c1']
+    assert meta == 'v'
+    assert count == 1
+
+
+def test_migrate_legacy_imports_flat_files_once(tmp_path: Path, repository) -> None:
+    legacy = tmp_path / 'legacy'
+    (legacy / 'contracts').mkdir(parents=True)
+    (legacy / 'contracts' / 'c1.json').write_text('{"contractId": "c1"}')
+
+    async def run():
+        first = await repository.migrate_legacy(legacy, ['contracts', 'proposals'])
+        second = await repository.migrate_legacy(legacy, ['contracts', 'proposals'])
+        return first, second, await repository.load_many('contracts', ['c1'])
+
+    first, second, contents = asyncio.run(run())
+    assert (first, second) == (1, 0)
+    assert contents == {'c1': {'contractId': 'c1'}}
+
+
+def test_create_then_get_artifact(client) -> None:
+    created = client.post(
+        '/artifacts/contracts', params={'swarm_id': 's1'}, json={'total': 10}
+    )
+    assert created.status_code == 201
+    artifact_id = created.json()['id']
+
+    response = client.get(f'/artifacts/contracts/{artifact_id}')
+    assert response.status_code == 200
+    assert response.json()['content'] == {'total': 10, 'contractId': artifact_id}
+    assert client.get('/artifacts/contracts/unknown').status_code == 404
+    assert client.get('/artifacts/invoices/unknown').status_code == 400
+
+
+def test_unreadable_zstd_blob_is_a_503(client, repository, monkeypatch) -> None:
+    record = asyncio.run(
+        repository.save('contracts', 'c1', {'a': 1}, {'swarm_id': 's1'})
+    )
+    asyncio.run(repository.index.put({**record, 'codec': CODEC_ZSTD}))
+    monkeypatch.setattr(storage, 'zstandard', None)
+
+    response = client.get('/artifacts/contracts/c1')
+    assert response.status_code == 503
+    assert 'zstandard' in response.json()['detail']
+    listing = client.get('/artifacts/contracts', params={'swarm_id': 's1'})
+    assert listing.status_code == 503
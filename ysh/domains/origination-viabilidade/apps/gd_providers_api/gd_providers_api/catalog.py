@@ -0,0 +1,165 @@
+"""Read-optimised view of the providers dataset.
+
+The dataset is immutable once loaded, so everything a request needs is
+computed up front: inverted indexes for the ``/providers`` filters and the
+JSON body (plus its ETag) of every provider.  Filtering becomes a set
+intersection and responses are assembled from pre-serialised fragments
+without touching the Pydantic models.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .schemas import DatasetMetadata, Provider, ProvidersDataset
+
+
+def _to_jsonable(model: BaseModel) -> Dict:
+    """Return the JSON-compatible dict of ``model`` on Pydantic v1 and v2."""
+
+    if hasattr(model, "model_dump"):
+        return model.model_dump(mode="json")  # type: ignore[attr-defined]
+    return json.loads(model.json())  # pragma: no cover
+
+
+def _serialize(payload: object) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+class CachedBody:
+    """Pre-serialised JSON payload and its strong ETag."""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.etag = _etag(body)
+
+    @classmethod
+    def of(cls, payload: object) -> "CachedBody":
+        return cls(_serialize(payload))
+
+
+class ProviderCatalog:
+    """Inverted indexes and cached JSON bodies for one dataset snapshot."""
+
+    def __init__(self, dataset: ProvidersDataset, max_cached_queries: int = 1024):
+        self.dataset = dataset
+        self.providers: List[Provider] = list(dataset.providers)
+        self.by_id: Dict[str, int] = {
+            provider.id: position for position, provider in enumerate(self.providers)
+        }
+        self.by_state = self._invert(
+            (position, state.upper())
+            for position, provider in enumerate(self.providers)
+            for state in provider.states
+        )
+        self.by_group = self._invert(
+            (position, provider.group.lower())
+            for position, provider in enumerate(self.providers)
+        )
+        self.by_submission_type = self._invert(
+            (position, provider.submission.type.lower())
+            for position, provider in enumerate(self.providers)
+        )
+
+        self._fragments = [_serialize(_to_jsonable(p)) for p in self.providers]
+        self._provider_bodies = [CachedBody(body) for body in self._fragments]
+        self._submission_bodies = [
+            CachedBody.of(_to_jsonable(provider.submission))
+            for provider in self.providers
+        ]
+        self.metadata = CachedBody.of(
+            _to_jsonable(
+                DatasetMetadata(
+                    api=dataset.api,
+                    version=dataset.version,
+                    updated_at=dataset.updated_at,
+                    provider_count=len(self.providers),
+                )
+            )
+        )
+        self.global_info = CachedBody.of(_to_jsonable(dataset.global_))
+        self._max_cached_queries = max_cached_queries
+        self._queries: Dict[Tuple[Optional[str], ...], CachedBody] = {}
+
+    @staticmethod
+    def _invert(pairs: Iterable[Tuple[int, str]]) -> Dict[str, FrozenSet[int]]:
+        index: Dict[str, set] = {}
+        for position, key in pairs:
+            index.setdefault(key, set()).add(position)
+        return {key: frozenset(positions) for key, positions in index.items()}
+
+    def filter_positions(
+        self,
+        state: Optional[str] = None,
+        group: Optional[str] = None,
+        submission_type: Optional[str] = None,
+    ) -> List[int]:
+        """Dataset positions matching every given filter, in dataset order."""
+
+        selected: Optional[FrozenSet[int]] = None
+        for index, value in (
+            (self.by_state, state.upper() if state else None),
+            (self.by_group, group.lower() if group else None),
+            (
+                self.by_submission_type,
+                submission_type.lower() if submission_type else None,
+            ),
+        ):
+            if value is None:
+                continue
+            matches = index.get(value, frozenset())
+            selected = matches if selected is None else selected & matches
+        if selected is None:
+            return list(range(len(self.providers)))
+        return sorted(selected)
+
+    def list_body(
+        self,
+        state: Optional[str] = None,
+        group: Optional[str] = None,
+        submission_type: Optional[str] = None,
+    ) -> CachedBody:
+        """JSON array of the matching providers, memoised per normalised query."""
+
+        key = (
+            state.upper() if state else None,
+            group.lower() if group else None,
+            submission_type.lower() if submission_type else None,
+        )
+        cached = self._queries.get(key)
+        if cached is None:
+            positions = self.filter_positions(*key)
+            cached = CachedBody(
+                b"[" + b",".join(self._fragments[p] for p in positions) + b"]"
+            )
+            if len(self._queries) >= self._max_cached_queries:
+                self._queries.clear()
+            self._queries[key] = cached
+        return cached
+
+    def provider(self, provider_id: str) -> Optional[Provider]:
+        position = self.by_id.get(provider_id)
+        return None if position is None else self.providers[position]
+
+    def provider_body(self, provider_id: str) -> Optional[CachedBody]:
+        position = self.by_id.get(provider_id)
+        return None if position is None else self._provider_bodies[position]
+
+    def submission_body(self, provider_id: str) -> Optional[CachedBody]:
+        position = self.by_id.get(provider_id)
+        return None if position is None else self._submission_bodies[position]
+
+
+__all__ = ["CachedBody", "ProviderCatalog"]
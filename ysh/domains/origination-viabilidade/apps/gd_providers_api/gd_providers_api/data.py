@@ -1,329 +1,186 @@
-"""Static dataset describing MMGD provider submission portals."""
+"""Versioned dataset describing MMGD provider submission portals.
+
+The dataset lives in a JSON (or YAML) artifact, ``datasets/providers.json``
+by default or the file named by ``GD_PROVIDERS_DATASET``, so portal changes
+ship without a code release.  :class:`DatasetStore` loads it on first use,
+validates it with a validator compiled once per process and keeps the
+resulting :class:`~.catalog.ProviderCatalog` keyed by the file's SHA-256.
+
+The file is re-checked at most every ``check_interval`` seconds.  A changed
+checksum triggers validation of the new snapshot and a single reference swap,
+so in-flight requests keep the catalog they started with and a broken file
+never replaces a good one.  Validated snapshots are also cached on disk by
+checksum, letting the other workers skip validation at boot.
+"""
 
 from __future__ import annotations
 
-from typing import Dict
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .catalog import ProviderCatalog
+from .schemas import Provider, ProvidersDataset
+
+try:  # pragma: no cover - Pydantic v2 compiles the validator once.
+    from pydantic import TypeAdapter
+except ImportError:  # pragma: no cover
+    TypeAdapter = None  # type: ignore[misc,assignment]
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET_PATH = Path(__file__).resolve().parent / "datasets" / "providers.json"
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "gd_providers_api"
+
+_VALIDATOR = TypeAdapter(ProvidersDataset) if TypeAdapter is not None else None
+
+
+def _validate_dataset(raw: bytes, suffix: str) -> ProvidersDataset:
+    """Validate the raw artifact, supporting JSON/YAML and Pydantic v1/v2."""
+
+    if suffix in (".yaml", ".yml"):
+        import yaml
+
+        data: Any = yaml.safe_load(raw)
+        if _VALIDATOR is not None:
+            return _VALIDATOR.validate_python(data)
+        return ProvidersDataset.parse_obj(data)  # pragma: no cover
+    if _VALIDATOR is not None:
+        return _VALIDATOR.validate_json(raw)
+    return ProvidersDataset.parse_raw(raw)  # pragma: no cover
+
+
+class DatasetStore:
+    """Lazily loaded, checksum-cached and hot-reloadable dataset snapshot."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        check_interval: float = 5.0,
+        cache_dir: Optional[Path] = None,
+    ) -> None:
+        self.path = path
+        self.check_interval = check_interval
+        self.cache_dir = cache_dir
+        self.digest: Optional[str] = None
+        self._catalog: Optional[ProviderCatalog] = None
+        self._stat: Optional[tuple] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> tuple:
+        stat = self.path.stat()
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _trusted_cache_dir(self) -> bool:
+        """Only unpickle from a directory no other user can write to."""
+
+        try:
+            stat = self.cache_dir.stat()  # type: ignore[union-attr]
+        except OSError:
+            return False
+        return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+    def _cached_dataset(self, digest: str) -> Optional[ProvidersDataset]:
+        if self.cache_dir is None or not self._trusted_cache_dir():
+            return None
+        try:
+            with open(self.cache_dir / f"{digest}.pickle", "rb") as handle:
+                dataset = pickle.load(handle)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        return dataset if isinstance(dataset, ProvidersDataset) else None
+
+    def _store_cached_dataset(self, digest: str, dataset: ProvidersDataset) -> None:
+        if self.cache_dir is None:
+            return
+        tmp: Optional[str] = None
+        try:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                pickle.dump(dataset, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.cache_dir / f"{digest}.pickle")
+            tmp = None
+        except (OSError, pickle.PicklingError):
+            logger.warning("Could not cache dataset %s", digest, exc_info=True)
+        finally:
+            if tmp is not None:
+                # Do not leave a partial file behind in the cache directory.
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+    def _load(self, signature: tuple) -> None:
+        raw = self.path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        if digest != self.digest:
+            dataset = self._cached_dataset(digest)
+            if dataset is None:
+                dataset = _validate_dataset(raw, self.path.suffix.lower())
+                self._store_cached_dataset(digest, dataset)
+            catalog = ProviderCatalog(dataset)
+            # Single reference swap: readers see either snapshot, never a mix.
+            self._catalog, self.digest = catalog, digest
+            logger.info(
+                "Loaded providers dataset %s (%s)", dataset.version, digest[:12]
+            )
+        self._stat = signature
 
-from .schemas import ProvidersDataset
+    def _is_fresh(self, now: float) -> bool:
+        return (
+            self._catalog is not None
+            and now - self._checked_at < self.check_interval
+        )
 
+    def catalog(self) -> ProviderCatalog:
+        """Return the active catalog, reloading it if the artifact changed."""
 
-RAW_DATA: Dict = {
-    "api": "br.gd.providers",
-    "version": "2025-09-20",
-    "updated_at": "2025-09-20",
-    "global": {
-        "aneel_forms_page": "https://www.gov.br/aneel/pt-br/centrais-de-conteudos/formularios/geracao-distribuida",
-        "legal_refs": ["REN ANEEL 1000/2021", "REN ANEEL 1059/2023", "Lei 14.300/2022"],
-    },
-    "providers": [
-        {
-            "id": "enel-rj",
-            "name": "Enel Distribuição Rio",
-            "group": "Enel",
-            "states": ["RJ"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "portal": "https://www.eneldistribuicao.com.br/PortalGD/ENELRJ/Acessante/",
-                    "basic_form": "https://www.eneldistribuicao.com.br/PortalGD/ENELRJ/Acessante/pages/formularioBasico.jsf",
-                    "manual": "https://www.enel.com.br/content/dam/enel-br/one-hub-brasil---2018/corporativo-e-governo-/geracao_distribuida/AM037-20C-MANUAL-ACESSANTE-PORTAL-GERACAO-DISTRIBUIDA-20200923-FIM.pdf",
-                },
-                "requirements": {"login_required": False, "captcha": False},
-            },
-            "docs": {
-                "howto": [
-                    "https://www.enel.com.br/pt/Corporativo_e_Governo/Geracao_Distribuida.html"
-                ]
-            },
-        },
-        {
-            "id": "enel-ce",
-            "name": "Enel Distribuição Ceará",
-            "group": "Enel",
-            "states": ["CE"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "portal": "https://www.eneldistribuicao.com.br/PortalGD/ENELCE/Acessante/",
-                    "basic_form": "https://www.eneldistribuicao.com.br/PortalGD/ENELCE/Acessante/pages/formularioBasico.jsf",
-                },
-                "requirements": {"login_required": False, "captcha": False},
-            },
-        },
-        {
-            "id": "light-rj",
-            "name": "Light",
-            "group": "Light",
-            "states": ["RJ"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "gd_page": "https://www.light.com.br/SitePages/page-geracao-distribuida.aspx",
-                    "portal_login": "https://agenciavirtual.light.com.br/Portal/inicio.aspx",
-                    "downloads": "https://www.light.com.br/Documentos%20Compartilhados/Geracao-Distribuida-Arquivos-Relacionados/LIGHT_GERACAO_DISTRIBUIDA_site.pdf",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "neoenergia-elektro-sp",
-            "name": "Neoenergia Elektro",
-            "group": "Neoenergia",
-            "states": ["SP", "MS"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "portal": "https://gdneoenergiaelektro.neoenergia.com/",
-                    "help_flow": "https://www.neoenergia.com/web/sp/seu-negocio/geracao-distribuida",
-                },
-                "requirements": {
-                    "login_required": True,
-                    "captcha": True,
-                    "captcha_vendor_hint": "BotDetect",
-                },
-            },
-        },
-        {
-            "id": "neoenergia-coelba-ba",
-            "name": "Neoenergia Coelba",
-            "group": "Neoenergia",
-            "states": ["BA"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "portal": "https://gdneoenergiacoelba.neoenergia.com/",
-                    "signup": "https://gdneoenergiacoelba.neoenergia.com/cadastrarUsuario.jsf",
-                },
-                "requirements": {"login_required": True, "captcha": True},
-            },
-        },
-        {
-            "id": "neoenergia-cosern-rn",
-            "name": "Neoenergia Cosern",
-            "group": "Neoenergia",
-            "states": ["RN"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {"portal": "https://gdneoenergiacosern.neoenergia.com/"},
-                "requirements": {"login_required": True, "captcha": True},
-            },
-        },
-        {
-            "id": "neoenergia-pernambuco-pe",
-            "name": "Neoenergia Pernambuco (CELPE)",
-            "group": "Neoenergia",
-            "states": ["PE"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "portal": "https://gdneoenergiapernambuco.neoenergia.com/",
-                    "landing": "https://www.neoenergia.com/web/pernambuco/seu-negocio/geracao-distribuida",
-                },
-                "requirements": {"login_required": True, "captcha": True},
-            },
-        },
-        {
-            "id": "cpfl-sp",
-            "name": "CPFL (Paulista/Piratininga e outras)",
-            "group": "CPFL",
-            "states": ["SP", "RS"],
-            "submission": {
-                "type": "web_portal_docs",
-                "urls": {
-                    "service_page": "https://www.cpfl.com.br/mini-e-microgeracao",
-                    "norma_tecnica": "https://www.cpfl.com.br/sites/cpfl/files/2021-12/GED-15303.pdf",
-                    "form_anexo_e_docx": "https://www.cpfl.com.br/sites/cpfl/files/2024-08/Formul%C3%A1rio%20%28Anexo%20E%20-%20GED%2015303%29.docx",
-                    "form_anexo_f_xlsx": "https://www.cpfl.com.br/sites/cpfl/files/2025-01/Formul%C3%A1rio%20Anexo%20F%20-%20GED%2015303.xlsx",
-                    "cartilha": "https://www.cpfl.com.br/sites/cpfl/files/2024-10/CARTILHA%20GD%20CPFL.pdf",
-                },
-                "requirements": {"login_required": False, "captcha": False},
-            },
-        },
-        {
-            "id": "cemig-mg",
-            "name": "Cemig",
-            "group": "Cemig",
-            "states": ["MG"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "manual_gd": "https://www.cemig.com.br/manual-de-geracao-distribuida/",
-                    "portal_login": "https://atende.cemig.com.br/Login",
-                    "norma_nd530_pdf": "https://www.cemig.com.br/wp-content/uploads/2020/07/ND.5.30.pdf",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "celesc-sc",
-            "name": "Celesc",
-            "group": "Celesc",
-            "states": ["SC"],
-            "submission": {
-                "type": "web_portal_docs",
-                "urls": {
-                    "service_page": "https://www.celesc.com.br/conexao-de-micro-ou-minigerador",
-                    "instruicao_i4320004_pdf": "https://www.celesc.com.br/arquivos/normas-tecnicas/conexao-centrais-geradoras/conexao-micro-mini-geradores-out2020.pdf",
-                    "guia_portal_tecnico_pdf": "https://www.celesc.com.br/images/central-ajuda/micro-mini-geracao/Guia-cadastro-de-projetos-Portal-Tecnico.pdf",
-                },
-                "requirements": {"login_required": False, "captcha": False},
-            },
-        },
-        {
-            "id": "edp-es-sp",
-            "name": "EDP (ES e SP)",
-            "group": "EDP",
-            "states": ["ES", "SP"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://www.edp.com.br/micro-e-mini-geracao/",
-                    "form_mmgd": "https://www.edp.com.br/micro-e-mini-geracao/formulario-mmgd-solicitacao-de-acesso",
-                    "agencia_login": "https://www.edponline.com.br/para-sua-casa/login",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "equatorial-go",
-            "name": "Equatorial Goiás",
-            "group": "Equatorial",
-            "states": ["GO"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://go.equatorialenergia.com.br/sua-conta/geracao-distribuida/",
-                    "parecer_de_acesso": "https://go.equatorialenergia.com.br/sua-conta/geracao-distribuida/parecer-de-acesso/",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "equatorial-pi",
-            "name": "Equatorial Piauí",
-            "group": "Equatorial",
-            "states": ["PI"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://pi.equatorialenergia.com.br/sua-conta/mini-e-micro-geracao/",
-                    "parecer_de_acesso": "https://pi.equatorialenergia.com.br/sua-conta/mini-e-micro-geracao/parecer-de-acesso/",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "equatorial-ma",
-            "name": "Equatorial Maranhão",
-            "group": "Equatorial",
-            "states": ["MA"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://ma.equatorialenergia.com.br/sua-conta/mini-e-micro-geracao/",
-                    "parecer_de_acesso": "https://ma.equatorialenergia.com.br/sua-conta/mini-e-micro-geracao/parecer-de-acesso/",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "equatorial-pa",
-            "name": "Equatorial Pará",
-            "group": "Equatorial",
-            "states": ["PA"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://pa.equatorialenergia.com.br/sua-conta/mini-e-micro-geracao/"
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "equatorial-ap",
-            "name": "Equatorial Amapá (CEA)",
-            "group": "Equatorial",
-            "states": ["AP"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://ap.equatorialenergia.com.br/sua-conta/mini-e-micro-geracao/"
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "energisa-group",
-            "name": "Energisa (Grupo – múltiplos estados)",
-            "group": "Energisa",
-            "states": ["AC", "RO", "TO", "PB", "SE", "MT", "MS", "MG", "RJ", "SP", "PR"],
-            "submission": {
-                "type": "web_portal_docs",
-                "urls": {
-                    "landing": "https://www.energisa.com.br/para-sua-casa/servicos/outros-servicos/geracao-distribuida",
-                    "faq_docs": "https://ajuda.energisa.com.br/categoria/micro-minigeracao/",
-                    "ndu_015_pdf": "https://www.energisa.com.br/sites/energisa/files/media/documents/2025-02/NDU%20015%20-%20Crit%C3%A9rios%20para%20a%20Conex%C3%A3o%20em%20M%C3%A9dia%20Tens%C3%A3o%20de%20Acessantes%20de%20Gera%C3%A7%C3%A3o%20Distribu%C3%ADda%20ao%20Sistema%20de%20Distribui%C3%A7%C3%A3o_.pdf",
-                },
-                "requirements": {"login_required": "case", "captcha": False},
-                "notes": "Formulários oficiais ficam nos anexos das NDU-013/015; checar por distribuidora do grupo.",
-            },
-        },
-        {
-            "id": "copel-pr",
-            "name": "Copel",
-            "group": "Copel",
-            "states": ["PR"],
-            "submission": {
-                "type": "web_portal_docs",
-                "urls": {
-                    "vistoria_info": "https://www.copel.com/site/fornecedores-e-parceiros/geracao-distribuida/",
-                    "vistoria_news": "https://www.parana.pr.gov.br/aen/Noticia/Copel-oferece-vistoria-virtual-para-ligacoes-de-imoveis-novos",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "amazonas-energia",
-            "name": "Amazonas Energia",
-            "group": "Amazonas Energia",
-            "states": ["AM"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "landing": "https://website.amazonasenergia.com/informacoes/micro-minigeracao-distribuida/",
-                    "proger_login": "https://proger.amazonasenergia.com/",
-                    "manual_proger": "https://website.amazonasenergia.com/wp-content/uploads/2022/05/Manual-Sistema-Amazonas-Energia-vers-02.pdf",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-            },
-        },
-        {
-            "id": "roraima-energia",
-            "name": "Roraima Energia",
-            "group": "Roraima Energia",
-            "states": ["RR"],
-            "submission": {
-                "type": "web_portal",
-                "urls": {
-                    "conexao_facil": "https://conexaofacil.roraimaenergia.com.br/",
-                    "mmgd_page": "https://www.roraimaenergia.com.br/nossos-servicos/micro-minigeracao-distribuida/",
-                    "proger_login": "https://proger.roraimaenergia.com.br/",
-                },
-                "requirements": {"login_required": True, "captcha": False},
-                "notes": "Desde 11/11/2024, microgeração via Conexão Fácil (GDIS).",
-            },
-        },
-    ],
-}
+        now = time.monotonic()
+        if self._is_fresh(now):
+            return self._catalog
+        with self._lock:
+            if self._is_fresh(now):
+                return self._catalog
+            try:
+                signature = self._stat_signature()
+                if signature != self._stat:
+                    self._load(signature)
+            except Exception:
+                if self._catalog is None:
+                    raise
+                logger.exception(
+                    "Keeping dataset %s; reload of %s failed", self.digest, self.path
+                )
+            self._checked_at = now
+        return self._catalog
 
 
-def _validate_dataset(raw: Dict) -> ProvidersDataset:
-    """Validate the raw data using Pydantic, supporting multiple versions."""
+STORE = DatasetStore(
+    Path(os.getenv("GD_PROVIDERS_DATASET", str(DEFAULT_DATASET_PATH))),
+    check_interval=float(os.getenv("GD_PROVIDERS_RELOAD_SECONDS", "5")),
+    cache_dir=Path(os.getenv("GD_PROVIDERS_CACHE_DIR", str(DEFAULT_CACHE_DIR))),
+)
 
-    if hasattr(ProvidersDataset, "model_validate"):
-        return ProvidersDataset.model_validate(raw)  # type: ignore[attr-defined]
-    return ProvidersDataset.parse_obj(raw)  # pragma: no cover
 
+def __getattr__(name: str) -> Any:
+    """Backwards-compatible lazy access to the active snapshot."""
 
-DATASET: ProvidersDataset = _validate_dataset(RAW_DATA)
-PROVIDERS_BY_ID = {provider.id: provider for provider in DATASET.providers}
+    if name == "CATALOG":
+        return STORE.catalog()
+    if name == "DATASET":
+        return STORE.catalog().dataset
+    if name == "PROVIDERS_BY_ID":
+        providers: Dict[str, Provider] = {
+            provider.id: provider for provider in STORE.catalog().providers
+        }
+        return providers
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,42 +4,40 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 
-from .data import DATASET, PROVIDERS_BY_ID
+from . import __version__
+from .catalog import CachedBody
+from .data import STORE
 from .schemas import DatasetMetadata, GlobalInfo, Provider, SubmissionInfo
 
+CACHE_CONTROL = "public, max-age=300"
 
-def _filter_by_state(providers: List[Provider], state: str) -> List[Provider]:
-    state_upper = state.upper()
-    return [
-        provider
-        for provider in providers
-        if any(candidate.upper() == state_upper for candidate in provider.states)
-    ]
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison (RFC 9110 §13.1.2): ``W/"x"`` matches ``"x"``.
+    return "*" in candidates or etag in {
+        tag[2:] if tag.startswith("W/") else tag for tag in candidates
+    }
 
-def _filter_by_group(providers: List[Provider], group: str) -> List[Provider]:
-    group_lower = group.lower()
-    return [
-        provider for provider in providers if provider.group.lower() == group_lower
-    ]
 
+def _cached_response(request: Request, cached: CachedBody) -> Response:
+    """Serve a pre-serialised body, or ``304`` when the client copy is fresh."""
 
-def _filter_by_submission_type(
-    providers: List[Provider], submission_type: str
-) -> List[Provider]:
-    submission_type_lower = submission_type.lower()
-    return [
-        provider
-        for provider in providers
-        if provider.submission.type.lower() == submission_type_lower
-    ]
+    headers = {"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=cached.body, media_type="application/json", headers=headers
+    )
 
 
 app = FastAPI(
     title="MMGD Providers API",
-    version=DATASET.version,
+    version=__version__,
     description=(
         "Catálogo em FastAPI dos portais públicos de homologação MMGD por"
         " distribuidora, conforme bootstrap fornecido."
@@ -48,26 +46,22 @@ app = FastAPI(
 
 
 @app.get("/metadata", response_model=DatasetMetadata, tags=["dataset"])
-def get_metadata() -> DatasetMetadata:
+def get_metadata(request: Request) -> Response:
     """Return API metadata and simple statistics."""
 
-    return DatasetMetadata(
-        api=DATASET.api,
-        version=DATASET.version,
-        updated_at=DATASET.updated_at,
-        provider_count=len(DATASET.providers),
-    )
+    return _cached_response(request, STORE.catalog().metadata)
 
 
 @app.get("/global", response_model=GlobalInfo, tags=["dataset"])
-def get_global_info() -> GlobalInfo:
+def get_global_info(request: Request) -> Response:
     """Return dataset-wide ANEEL references and legal norms."""
 
-    return DATASET.global_
+    return _cached_response(request, STORE.catalog().global_info)
 
 
 @app.get("/providers", response_model=List[Provider], tags=["providers"])
 def list_providers(
+    request: Request,
     state: Optional[str] = Query(
         default=None,
         description="Filter providers by federative unit (sigla do estado).",
@@ -81,29 +75,22 @@ def list_providers(
         default=None,
         description="Filter by submission.type (ex.: web_portal, web_portal_docs).",
     ),
-) -> List[Provider]:
+) -> Response:
     """Return the list of providers, optionally filtered by query parameters."""
 
-    providers: List[Provider] = list(DATASET.providers)
-
-    if state:
-        providers = _filter_by_state(providers, state)
-    if group:
-        providers = _filter_by_group(providers, group)
-    if submission_type:
-        providers = _filter_by_submission_type(providers, submission_type)
-
-    return providers
+    return _cached_response(
+        request, STORE.catalog().list_body(state, group, submission_type)
+    )
 
 
 @app.get("/providers/{provider_id}", response_model=Provider, tags=["providers"])
-def get_provider(provider_id: str) -> Provider:
+def get_provider(provider_id: str, request: Request) -> Response:
     """Return a single provider by its identifier."""
 
-    provider = PROVIDERS_BY_ID.get(provider_id)
-    if not provider:
+    cached = STORE.catalog().provider_body(provider_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Provider not found")
-    return provider
+    return _cached_response(request, cached)
 
 
 @app.get(
@@ -111,10 +98,10 @@ def get_provider(provider_id: str) -> Provider:
     response_model=SubmissionInfo,
     tags=["providers"],
 )
-def get_provider_submission(provider_id: str) -> SubmissionInfo:
+def get_provider_submission(provider_id: str, request: Request) -> Response:
     """Return only the submission block for a provider."""
 
-    provider = PROVIDERS_BY_ID.get(provider_id)
-    if not provider:
+    cached = STORE.catalog().submission_body(provider_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail="Provider not found")
-    return provider.submission
+    return _cached_response(request, cached)
@@ -47,3 +47,30 @@ def test_provider_not_found_returns_404() -> None:
     response = client.get("/providers/unknown-provider")
     assert response.status_code == 404
     assert response.json()["detail"] == "Provider not found"
+
+
+def test_combined_filters_intersect_indexes() -> None:
+    response = client.get("/providers", params={"state": "ba", "group": "NEOENERGIA"})
+    assert response.status_code == 200
+    assert [provider["id"] for provider in response.json()] == ["neoenergia-coelba-ba"]
+
+    response = client.get("/providers", params={"state": "RJ", "group": "Neoenergia"})
+    assert response.json() == []
+
+
+def test_if_none_match_returns_304() -> None:
+    first = client.get("/providers", params={"state": "RJ"})
+    etag = first.headers["etag"]
+
+    cached = client.get(
+        "/providers", params={"state": "rj"}, headers={"If-None-Match": etag}
+    )
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    other = client.get(
+        "/providers", params={"state": "BA"}, headers={"If-None-Match": etag}
+    )
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from gd_providers_api import data
+from gd_providers_api.data import DEFAULT_DATASET_PATH, DatasetStore
+
+
+def _write_dataset(path: Path, version: str, drop_providers: int = 0) -> None:
+    payload = json.loads(DEFAULT_DATASET_PATH.read_text(encoding="utf-8"))
+    payload["version"] = version
+    payload["providers"] = payload["providers"][drop_providers:]
+    path.write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_store_reloads_changed_dataset(tmp_path: Path) -> None:
+    dataset = tmp_path / "providers.json"
+    _write_dataset(dataset, "2025-09-20")
+    store = DatasetStore(dataset, check_interval=0, cache_dir=tmp_path / "cache")
+
+    first = store.catalog()
+    assert first.dataset.version == "2025-09-20"
+    assert store.catalog() is first
+
+    _write_dataset(dataset, "2025-10-01", drop_providers=1)
+    second = store.catalog()
+    assert second is not first
+    assert second.dataset.version == "2025-10-01"
+    assert len(second.providers) == len(first.providers) - 1
+    assert json.loads(second.metadata.body)["version"] == "2025-10-01"
+
+
+def test_store_keeps_previous_snapshot_when_reload_fails(tmp_path: Path) -> None:
+    dataset = tmp_path / "providers.json"
+    _write_dataset(dataset, "2025-09-20")
+    store = DatasetStore(dataset, check_interval=0)
+    first = store.catalog()
+
+    dataset.write_text('{"api": "broken"}', encoding="utf-8")
+
+    assert store.catalog() is first
+
+
+def test_store_reuses_checksum_cache_across_processes(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dataset = tmp_path / "providers.json"
+    _write_dataset(dataset, "2025-09-20")
+    cache_dir = tmp_path / "cache"
+    DatasetStore(dataset, cache_dir=cache_dir).catalog()
+
+    def fail_validation(raw: bytes, suffix: str):
+        raise AssertionError("cached snapshot was validated again")
+
+    monkeypatch.setattr(data, "_validate_dataset", fail_validation)
+    store = DatasetStore(dataset, cache_dir=cache_dir)
+    assert [path.suffix for path in cache_dir.iterdir()] == [".pickle"]
+    assert store.catalog().dataset.version == "2025-09-20"
+
+
+def test_store_removes_temp_file_when_caching_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dataset = tmp_path / "providers.json"
+    _write_dataset(dataset, "2025-09-20")
+    cache_dir = tmp_path / "cache"
+
+    def fail_dump(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(data.pickle, "dump", fail_dump)
+    store = DatasetStore(dataset, cache_dir=cache_dir)
+
+    assert store.catalog().dataset.version == "2025-09-20"
+    assert list(cache_dir.iterdir()) == []
@@ -5,8 +5,21 @@ class Settings(BaseSettings):
     app_name: str = "YSH Origination API"
     api_prefix: str = "/v1"
     database_url: str
+    # Optional read replica for read-only endpoints (lists, searches, exports).
+    database_read_url: str | None = None
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = False
+    db_statement_cache_size: int = 500
     nats_url: str = "nats://localhost:4222"
     jwt_public_key_base64: str | None = None
+    # Provider namespace (bacen/epe/aneel/ibge/quod) -> KPI tool endpoint URL.
+    geo_kpi_provider_urls: dict[str, str] = {}
+    geo_kpi_provider_timeout_seconds: float = 10.0
+    geo_enrichment_concurrency: int = 32
+    geo_enrichment_batch_size: int = 200
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
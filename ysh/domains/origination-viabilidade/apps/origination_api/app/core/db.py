@@ -1,18 +1,194 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import contextlib
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from sqlalchemy import Connection, Table, bindparam, inspect, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.schema import CreateIndex
 
 from app.core.config import settings
 
-engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+
+def _engine_options(url: str) -> dict[str, Any]:
+    """Pool and driver options for ``url``; SQLite keeps SQLAlchemy defaults."""
+
+    backend = make_url(url)
+    if backend.get_backend_name() != "postgresql":
+        return {}
+    options: dict[str, Any] = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        # Pre-ping costs a round trip per checkout; recycle already bounds
+        # connection age, so it is opt-in.
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if backend.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        }
+    return options
+
+
+class PoolWaitMetrics:
+    """Time spent waiting for a pooled connection, per engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def snapshot(self) -> dict[str, float]:
+        mean = self.total_seconds / self.count if self.count else 0.0
+        return {
+            "checkouts": self.count,
+            "wait_mean_ms": round(mean * 1000, 3),
+            "wait_max_ms": round(self.max_seconds * 1000, 3),
+        }
+
+
+engine = create_async_engine(
+    settings.database_url, **_engine_options(settings.database_url)
+)
+read_engine: AsyncEngine = (
+    create_async_engine(
+        settings.database_read_url, **_engine_options(settings.database_read_url)
+    )
+    if settings.database_read_url
+    else engine
+)
 SessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+ReadSessionLocal = async_sessionmaker(
+    read_engine, expire_on_commit=False, class_=AsyncSession
+)
+
+pool_metrics = {"primary": PoolWaitMetrics(), "replica": PoolWaitMetrics()}
 
 
 class Base(DeclarativeBase):
     pass
 
 
+@contextlib.asynccontextmanager
+async def _session(
+    factory: async_sessionmaker, metrics: PoolWaitMetrics
+) -> AsyncIterator[AsyncSession]:
+    async with factory() as session:
+        # Check out the connection eagerly so the pool wait is measured on its
+        # own instead of being folded into the first query.
+        started = time.perf_counter()
+        await session.connection()
+        metrics.observe(time.perf_counter() - started)
+        yield session
+
+
+def read_session() -> contextlib.AbstractAsyncContextManager[AsyncSession]:
+    """Replica session for work outside a dependency, e.g. streamed bodies."""
+
+    return _session(ReadSessionLocal, pool_metrics["replica"])
+
+
+async def get_db():
+    async with _session(SessionLocal, pool_metrics["primary"]) as session:
+        yield session
+
+
+async def get_read_db():
+    """Session for read-only endpoints, routed to the replica when configured."""
+
+    async with read_session() as session:
+        yield session
+
+
+def pool_status() -> dict[str, Any]:
+    """Pool occupancy and checkout wait times for the primary and replica."""
+
+    replica_pool = (
+        read_engine.pool.status() if read_engine is not engine else "primary"
+    )
+    return {
+        "primary": {"pool": engine.pool.status(), **pool_metrics["primary"].snapshot()},
+        "replica": {"pool": replica_pool, **pool_metrics["replica"].snapshot()},
+    }
+
+
+def dialect_insert(session: AsyncSession):
+    """Return the ``insert`` construct supporting ``ON CONFLICT`` for ``session``."""
+
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
 async def init_db() -> None:
+    import app.models.kpis  # noqa: F401
     import app.models.leads  # noqa: F401
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
+
+
+def _upgrade_schema(conn: Connection) -> None:
+    """Bring tables created by older releases up to the current models.
+
+    ``create_all`` only creates missing tables, so columns and indexes added
+    to existing tables are applied here. Every step is idempotent.
+    """
+
+    from app.models.leads import Lead, LeadGeoKPIs
+
+    # Keyset listing indexes added to the existing leads table.
+    _create_indexes(conn, Lead.__table__)
+
+    geo_table = LeadGeoKPIs.__table__
+    columns = {column["name"] for column in inspect(conn).get_columns(geo_table.name)}
+    if "geohash" not in columns:
+        conn.execute(
+            text(f"ALTER TABLE {geo_table.name} ADD COLUMN geohash VARCHAR(12)")
+        )
+    _create_indexes(conn, geo_table)
+    _backfill_geohash(conn, geo_table)
+
+
+def _create_indexes(conn: Connection, table: Table) -> None:
+    for index in table.indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _backfill_geohash(conn: Connection, table: Table, batch_size: int = 1000) -> None:
+    """Compute the geohash of rows stored before the column existed."""
+
+    from app.services.geo_index import encode_geohash
+
+    pending = (
+        select(table.c.composite_key, table.c.latitude, table.c.longitude)
+        .where(table.c.geohash.is_(None))
+        .where(table.c.latitude.is_not(None), table.c.longitude.is_not(None))
+        .limit(batch_size)
+    )
+    while rows := conn.execute(pending).all():
+        conn.execute(
+            update(table)
+            .where(table.c.composite_key == bindparam("key"))
+            .values(geohash=bindparam("value")),
+            [
+                {"key": key, "value": encode_geohash(latitude, longitude)}
+                for key, latitude, longitude in rows
+            ],
+        )
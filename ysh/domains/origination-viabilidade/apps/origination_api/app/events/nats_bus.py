@@ -21,7 +21,12 @@ nc: nats.NATS | None = None
 @contextlib.asynccontextmanager
 async def nats_lifespan(app) -> AsyncIterator[None]:  # type: ignore[override]
     global nc
+    from app.services.kpi_rollups import KPI_QUEUE_GROUP, handle_message
+
     nc = await nats.connect(settings.nats_url)
+    # One queue group across replicas: each event is folded into the KPI
+    # rollups exactly once.
+    await nc.subscribe("ysh.origination.>", queue=KPI_QUEUE_GROUP, cb=handle_message)
     try:
         yield
     finally:
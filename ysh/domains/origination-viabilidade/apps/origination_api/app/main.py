@@ -1,22 +1,42 @@
+import contextlib
+from collections.abc import AsyncIterator
+
 from fastapi import FastAPI
 
 from app.core.config import settings
-from app.core.db import init_db
+from app.core.db import init_db, pool_status
 from app.events.nats_bus import nats_lifespan
-from app.routers import leads
-
-app = FastAPI(title=settings.app_name, version="0.1.0", openapi_url="/openapi.json")
-app.router.lifespan_context = nats_lifespan
+from app.routers import geo_kpis, kpis, leads
 
 
-@app.on_event("startup")
-async def on_startup() -> None:
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # on_event handlers do not run alongside a custom lifespan, so startup
+    # and shutdown work lives here.
     await init_db()
-
-
+    try:
+        async with nats_lifespan(app):
+            yield
+    finally:
+        await geo_kpis.close_enrichment_worker()
+
+
+app = FastAPI(
+    title=settings.app_name,
+    version="0.1.0",
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
+)
 app.include_router(leads.router, prefix=settings.api_prefix, tags=["leads"])
+app.include_router(geo_kpis.router, prefix=settings.api_prefix, tags=["geo-kpis"])
+app.include_router(kpis.router, prefix=settings.api_prefix, tags=["kpis"])
 
 
 @app.get("/health", tags=["health"])
 async def health() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/metrics/db", tags=["health"])
+async def db_metrics() -> dict:
+    return pool_status()
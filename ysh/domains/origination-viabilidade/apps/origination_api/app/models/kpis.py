@@ -0,0 +1,52 @@
+from datetime import datetime
+
+from sqlalchemy import Float, Integer, String, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.db import Base
+
+
+class KPILeadProgress(Base):
+    """Funnel milestones per lead, used to deduplicate events and derive TTFP."""
+
+    __tablename__ = "kpi_lead_progress"
+
+    lead_id: Mapped[str] = mapped_column(String, primary_key=True)
+    uf: Mapped[str] = mapped_column(String(2), default="")
+    tier: Mapped[str] = mapped_column(String(8), default="")
+    captured_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    sql_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+    proposed_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True))
+
+
+class KPIDailyRollup(Base):
+    """Funnel counters per day, UF and tier ("" when the dimension is unknown).
+
+    Capture and qualification counters land on the ``tier=""`` row because the
+    tier is only known once a recommendation is issued.
+    """
+
+    __tablename__ = "kpi_daily_rollups"
+
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    uf: Mapped[str] = mapped_column(String(2), primary_key=True, default="")
+    tier: Mapped[str] = mapped_column(String(8), primary_key=True, default="")
+    leads_captured: Mapped[int] = mapped_column(Integer, default=0)
+    mqls: Mapped[int] = mapped_column(Integer, default=0)
+    sqls: Mapped[int] = mapped_column(Integer, default=0)
+    proposals: Mapped[int] = mapped_column(Integer, default=0)
+    premium_proposals: Mapped[int] = mapped_column(Integer, default=0)
+    ttfp_count: Mapped[int] = mapped_column(Integer, default=0)
+    ttfp_sum_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+
+
+class KPITTFPHistogram(Base):
+    """Time-to-first-proposal histogram, one counter per upper bucket bound."""
+
+    __tablename__ = "kpi_ttfp_histogram"
+
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    uf: Mapped[str] = mapped_column(String(2), primary_key=True, default="")
+    tier: Mapped[str] = mapped_column(String(8), primary_key=True, default="")
+    le_seconds: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
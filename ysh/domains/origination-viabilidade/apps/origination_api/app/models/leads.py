@@ -1,6 +1,16 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Float, JSON, Boolean, ForeignKey, Numeric, String, TIMESTAMP, text
+from sqlalchemy import (
+    Float,
+    Index,
+    JSON,
+    Boolean,
+    ForeignKey,
+    Numeric,
+    String,
+    TIMESTAMP,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -10,11 +20,44 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+# Columns returned by ``GET /v1/leads``; carried in the listing indexes
+# (INCLUDE on PostgreSQL) so pages are served by index-only scans.
+LEAD_LIST_COLUMNS = (
+    "source",
+    "uf",
+    "municipio",
+    "consumer_class",
+    "uc_type",
+    "generation_modality",
+    "tier",
+    "status",
+)
+
+
+def _lead_list_index(name: str, *leading: str) -> Index:
+    return Index(
+        name,
+        *leading,
+        "created_at",
+        "lead_id",
+        postgresql_include=[
+            column for column in LEAD_LIST_COLUMNS if column not in leading
+        ],
+    )
+
+
 class Lead(Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        _lead_list_index("ix_leads_created_at_lead_id"),
+        _lead_list_index("ix_leads_status_created_at", "status"),
+        _lead_list_index("ix_leads_uf_created_at", "uf"),
+        _lead_list_index("ix_leads_tier_created_at", "tier"),
+        _lead_list_index("ix_leads_modality_created_at", "generation_modality"),
+    )
 
     lead_id: Mapped[str] = mapped_column(String, primary_key=True)
-    created_at: Mapped[str] = mapped_column(
+    created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=text("now()")
     )
     source: Mapped[str | None] = mapped_column(String(120))
@@ -38,7 +81,7 @@ class Lead(Base):
     region: Mapped[str | None] = mapped_column(String(64))
     status: Mapped[str | None] = mapped_column(String(32))
 
-    geo_kpis: Mapped["LeadGeoKPIs" | None] = relationship(
+    geo_kpis: Mapped["LeadGeoKPIs | None"] = relationship(
         back_populates="lead", uselist=False
     )
 
@@ -81,6 +124,9 @@ class LeadGeoKPIs(Base):
     cep: Mapped[str] = mapped_column(String(16))
     latitude: Mapped[float] = mapped_column(Float)
     longitude: Mapped[float] = mapped_column(Float)
+    # Geohash of (latitude, longitude); the B-tree index serves prefix range
+    # scans for radius/bbox/polygon searches (see app.services.geo_index).
+    geohash: Mapped[str | None] = mapped_column(String(12), index=True)
     properties: Mapped[dict] = mapped_column(JSON, default=dict)
     kpis: Mapped[dict] = mapped_column(JSON, default=dict)
     geojson: Mapped[dict] = mapped_column(JSON)
@@ -0,0 +1,253 @@
+from collections.abc import AsyncIterator, Callable
+from typing import Literal
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.db import get_db, get_read_db, read_session
+from app.models.leads import Lead, LeadGeoKPIs
+from app.schemas.leads import (
+    GeoEnrichBatchIn,
+    GeoEnrichBatchOut,
+    GeoFeatureCollectionOut,
+    GeoPolygonIn,
+)
+from app.services.geo_enrichment import (
+    kpis_match,
+    parse_kpi_threshold,
+    stream_feature_collection,
+)
+from app.services.geo_index import (
+    BBox,
+    cover_bbox,
+    haversine_km,
+    point_in_polygon,
+    polygon_bbox,
+    prefix_upper_bound,
+    radius_bbox,
+)
+from app.services.geo_pipeline import (
+    EnrichmentInput,
+    GeoEnrichmentWorker,
+    build_http_providers,
+)
+
+router = APIRouter()
+
+EXPORT_BATCH_SIZE = 1000
+
+_enrichment_worker: GeoEnrichmentWorker | None = None
+_enrichment_client: httpx.AsyncClient | None = None
+
+
+def get_enrichment_worker() -> GeoEnrichmentWorker:
+    """Process-wide worker so the provider cache is shared across requests."""
+
+    global _enrichment_worker, _enrichment_client
+    if _enrichment_worker is None:
+        _enrichment_client = httpx.AsyncClient(
+            timeout=settings.geo_kpi_provider_timeout_seconds
+        )
+        _enrichment_worker = GeoEnrichmentWorker(
+            build_http_providers(settings.geo_kpi_provider_urls, _enrichment_client),
+            concurrency=settings.geo_enrichment_concurrency,
+            batch_size=settings.geo_enrichment_batch_size,
+        )
+    return _enrichment_worker
+
+
+async def close_enrichment_worker() -> None:
+    """Close the providers' HTTP client; a later request builds a new worker."""
+
+    global _enrichment_worker, _enrichment_client
+    client, _enrichment_client, _enrichment_worker = _enrichment_client, None, None
+    if client is not None:
+        await client.aclose()
+
+
+async def _search_features(
+    db: AsyncSession,
+    bbox: BBox,
+    predicate: Callable[[LeadGeoKPIs], bool] | None,
+    limit: int,
+    cursor: str | None,
+) -> dict:
+    """Page through ``lead_geo_kpis`` rows inside ``bbox`` keyed by composite_key.
+
+    Candidates come from geohash prefix range scans plus an exact bbox filter;
+    ``predicate`` then refines them (radius, polygon) before they count
+    towards ``limit``.
+    """
+
+    min_lat, min_lon, max_lat, max_lon = bbox
+    ranges = []
+    for cell in cover_bbox(bbox):
+        upper = prefix_upper_bound(cell)
+        clause = LeadGeoKPIs.geohash >= cell
+        if upper is not None:
+            clause = and_(clause, LeadGeoKPIs.geohash < upper)
+        ranges.append(clause)
+    query = (
+        select(LeadGeoKPIs)
+        .where(
+            or_(*ranges),
+            LeadGeoKPIs.latitude.between(min_lat, max_lat),
+            LeadGeoKPIs.longitude.between(min_lon, max_lon),
+        )
+        .order_by(LeadGeoKPIs.composite_key)
+        .limit(limit)
+    )
+
+    features: list[dict] = []
+    last_key = cursor
+    exhausted = False
+    while len(features) < limit:
+        page = query
+        if last_key is not None:
+            page = page.where(LeadGeoKPIs.composite_key > last_key)
+        batch = (await db.execute(page)).scalars().all()
+        for position, record in enumerate(batch, start=1):
+            last_key = record.composite_key
+            if predicate is None or predicate(record):
+                features.append(record.geojson)
+                if len(features) == limit:
+                    exhausted = len(batch) < limit and position == len(batch)
+                    break
+        else:
+            exhausted = len(batch) < limit
+        if exhausted:
+            break
+    return {
+        "type": "FeatureCollection",
+        "features": features,
+        "next_cursor": None if exhausted else last_key,
+    }
+
+
+@router.get(
+    "/geo-kpis/search/radius",
+    response_model=GeoFeatureCollectionOut,
+    summary="Buscar leads enriquecidos num raio (km) a partir de um ponto",
+)
+async def search_radius(
+    latitude: float = Query(ge=-90, le=90),
+    longitude: float = Query(ge=-180, le=180),
+    radius_km: float = Query(gt=0, le=500),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    def within(record: LeadGeoKPIs) -> bool:
+        distance = haversine_km(latitude, longitude, record.latitude, record.longitude)
+        return distance <= radius_km
+
+    bbox = radius_bbox(latitude, longitude, radius_km)
+    return await _search_features(db, bbox, within, limit, cursor)
+
+
+@router.get(
+    "/geo-kpis/search/bbox",
+    response_model=GeoFeatureCollectionOut,
+    summary="Buscar leads enriquecidos dentro de um bounding box",
+)
+async def search_bbox(
+    min_lat: float = Query(ge=-90, le=90),
+    min_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    bbox = (
+        min(min_lat, max_lat),
+        min(min_lon, max_lon),
+        max(min_lat, max_lat),
+        max(min_lon, max_lon),
+    )
+    return await _search_features(db, bbox, None, limit, cursor)
+
+
+@router.post(
+    "/geo-kpis/search/polygon",
+    response_model=GeoFeatureCollectionOut,
+    summary="Buscar leads enriquecidos dentro de um polígono GeoJSON",
+)
+async def search_polygon(
+    body: GeoPolygonIn,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    def inside(record: LeadGeoKPIs) -> bool:
+        return point_in_polygon(body.coordinates, record.latitude, record.longitude)
+
+    bbox = polygon_bbox(body.coordinates)
+    return await _search_features(db, bbox, inside, limit, cursor)
+
+
+@router.get(
+    "/geo-kpis/export",
+    summary="Exportar leads enriquecidos como GeoJSON (FeatureCollection ou NDJSON)",
+    response_class=StreamingResponse,
+)
+async def export_geo_kpis(
+    uf: str | None = None,
+    municipio: str | None = None,
+    kpi: list[str] = Query(
+        default_factory=list,
+        description="Filtro namespace.chave:op:valor, ex.: aneel.dec:lte:12",
+    ),
+    format: Literal["geojson", "ndjson"] = "geojson",  # noqa: A002
+):
+    try:
+        thresholds = [parse_kpi_threshold(expression) for expression in kpi]
+    except ValueError as exc:
+        raise HTTPException(400, str(exc)) from exc
+
+    query = select(LeadGeoKPIs.geojson, LeadGeoKPIs.kpis).order_by(
+        LeadGeoKPIs.composite_key
+    )
+    if uf or municipio:
+        query = query.join(Lead, Lead.lead_id == LeadGeoKPIs.lead_id)
+        if uf:
+            query = query.where(Lead.uf == uf)
+        if municipio:
+            query = query.where(Lead.municipio == municipio)
+
+    async def features() -> AsyncIterator[dict]:
+        # The session is owned by the generator: request-scoped dependencies
+        # are closed before a streaming body starts being sent.
+        async with read_session() as session:
+            result = await session.stream(
+                query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            async for geojson, kpis in result:
+                if not thresholds or kpis_match(kpis, thresholds):
+                    yield geojson
+
+    ndjson = format == "ndjson"
+    return StreamingResponse(
+        stream_feature_collection(
+            features(), ndjson=ndjson, chunk_size=EXPORT_BATCH_SIZE
+        ),
+        media_type="application/x-ndjson" if ndjson else "application/geo+json",
+    )
+
+
+@router.post(
+    "/geo-kpis:enrich",
+    response_model=GeoEnrichBatchOut,
+    summary="Enriquecer leads em lote com KPIs BACEN/EPE/ANEEL/IBGE/QUOD",
+)
+async def enrich_geo_kpis(
+    body: GeoEnrichBatchIn,
+    db: AsyncSession = Depends(get_db),
+    worker: GeoEnrichmentWorker = Depends(get_enrichment_worker),
+):
+    items = [EnrichmentInput(**item.model_dump()) for item in body.items]
+    return await worker.run(db, items)
@@ -0,0 +1,43 @@
+from datetime import date, datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_read_db
+from app.schemas.leads import KPIReport
+from app.services.kpi_rollups import GROUP_BY_COLUMNS, query_kpis
+
+router = APIRouter()
+
+DEFAULT_WINDOW_DAYS = 30
+
+
+@router.get(
+    "/kpis",
+    response_model=KPIReport,
+    summary="KPIs do funil (MQL→SQL, SQL→Proposta, lead_premium_rate, TTFP p95)",
+)
+async def get_kpis(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    uf: str | None = None,
+    tier: str | None = None,
+    group_by: list[str] = Query(default_factory=list),
+    db: AsyncSession = Depends(get_read_db),
+):
+    unknown = sorted(set(group_by) - set(GROUP_BY_COLUMNS))
+    if unknown:
+        raise HTTPException(400, f"invalid group_by: {', '.join(unknown)}")
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_WINDOW_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(400, "date_from must not be after date_to")
+    rows = await query_kpis(
+        db, date_from, date_to, uf=uf, tier=tier, group_by=group_by
+    )
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "group_by": [name for name in GROUP_BY_COLUMNS if name in group_by],
+        "rows": rows,
+    }
@@ -1,33 +1,97 @@
+import asyncio
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.db import SessionLocal
+from app.core.db import get_db, get_read_db
 from app.events.nats_bus import SUBJECTS, publish
-from app.models.leads import Lead, LeadFeatures, LeadGeoKPIs, Recommendation
+from app.models.leads import (
+    LEAD_LIST_COLUMNS,
+    Lead,
+    LeadFeatures,
+    LeadGeoKPIs,
+    Recommendation,
+)
 from app.schemas.leads import (
     ClassifyIn,
     GeoKPIIn,
     GeoKPIOut,
     LeadCreate,
     LeadOut,
+    LeadPage,
     ModalityIn,
+    RecommendationBatchIn,
+    RecommendationBatchOut,
     RecommendationOut,
     SizingIn,
     SizingOut,
 )
-from app.services.geo_enrichment import build_geo_key, build_geojson_feature
-from app.services.recommendations import PROJECT_BANDS, TIERS, build_bundle
+from app.services.geo_pipeline import build_geo_kpi_row
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.recommendations import (
+    PROJECT_BANDS,
+    TIERS,
+    build_bundle,
+    build_bundles,
+)
 from app.services.sizing import choose_band, sizing_summary
 
 router = APIRouter()
 
 
-async def get_db():
-    async with SessionLocal() as session:
-        yield session
+def _chosen_tier(lead_tier: str | None, tier_codes: list[str]) -> str:
+    """Tier proposed to a lead in a batch: its own tier when requested."""
+    for code in (lead_tier, "T115"):
+        if code in tier_codes:
+            return code
+    return tier_codes[0]
+
+
+@router.get(
+    "/leads",
+    response_model=LeadPage,
+    summary="Listar leads (paginação por cursor, mais recentes primeiro)",
+)
+async def list_leads(
+    status_: str | None = Query(None, alias="status"),
+    uf: str | None = None,
+    tier: str | None = None,
+    generation_modality: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    columns = [Lead.lead_id, Lead.created_at] + [
+        getattr(Lead, name) for name in LEAD_LIST_COLUMNS
+    ]
+    query = select(*columns)
+    for column, value in (
+        (Lead.status, status_),
+        (Lead.uf, uf),
+        (Lead.tier, tier),
+        (Lead.generation_modality, generation_modality),
+    ):
+        if value is not None:
+            query = query.where(column == value)
+    if cursor:
+        try:
+            created_at, lead_id = decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(400, str(exc)) from exc
+        query = query.where(
+            tuple_(Lead.created_at, Lead.lead_id) < tuple_(created_at, lead_id)
+        )
+    query = query.order_by(Lead.created_at.desc(), Lead.lead_id.desc()).limit(
+        limit + 1
+    )
+    rows = (await db.execute(query)).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["lead_id"])
+    return {"items": [dict(row) for row in rows], "next_cursor": next_cursor}
 
 
 @router.post(
@@ -50,6 +114,7 @@ async def create_lead(body: LeadCreate, db: AsyncSession = Depends(get_db)):
             "ts": datetime.now(timezone.utc).isoformat(),
             "source": body.source or "unknown",
             "consent": body.consent,
+            "uf": body.uf,
         },
     )
     return {"lead_id": body.lead_id, "status": "created"}
@@ -110,8 +175,8 @@ async def upsert_geo_kpis(
     if not lead:
         raise HTTPException(404, "lead not found")
 
-    composite_key = build_geo_key(body.cpf, body.cep, body.latitude, body.longitude)
-    feature = build_geojson_feature(
+    row = build_geo_kpi_row(
+        lead_id=lead_id,
         cpf=body.cpf,
         cep=body.cep,
         latitude=body.latitude,
@@ -119,6 +184,7 @@ async def upsert_geo_kpis(
         kpis=body.kpis.model_dump(),
         properties=body.properties,
     )
+    composite_key = row["composite_key"]
 
     existing = await db.get(LeadGeoKPIs, composite_key)
     if existing and existing.lead_id != lead_id:
@@ -129,15 +195,8 @@ async def upsert_geo_kpis(
         target = LeadGeoKPIs(composite_key=composite_key, lead_id=lead_id)
         db.add(target)
 
-    props = feature["properties"]
-    target.lead_id = lead_id
-    target.cpf = props.get("cpf", "")
-    target.cep = props.get("cep", "")
-    target.latitude = feature["geometry"]["coordinates"][1]
-    target.longitude = feature["geometry"]["coordinates"][0]
-    target.properties = props
-    target.kpis = props.get("kpis", {})
-    target.geojson = feature
+    for column, value in row.items():
+        setattr(target, column, value)
 
     await db.commit()
     await db.refresh(target)
@@ -149,7 +208,7 @@ async def upsert_geo_kpis(
     response_model=GeoKPIOut,
     summary="Consultar KPIs geoespaciais do lead",
 )
-async def get_geo_kpis(lead_id: str, db: AsyncSession = Depends(get_db)):
+async def get_geo_kpis(lead_id: str, db: AsyncSession = Depends(get_read_db)):
     record = (
         await db.execute(
             select(LeadGeoKPIs).where(LeadGeoKPIs.lead_id == lead_id)
@@ -310,3 +369,103 @@ async def recommendations(
         "offers": bundle["offers"],
         "upsell": bundle["upsell"],
     }
+
+
+@router.post(
+    "/recommendations:batch",
+    response_model=RecommendationBatchOut,
+    summary="Gerar recomendações em lote (leads x tiers)",
+    status_code=status.HTTP_201_CREATED,
+)
+async def recommendations_batch(
+    body: RecommendationBatchIn, db: AsyncSession = Depends(get_db)
+):
+    if not (body.lead_ids or body.uf or body.region):
+        raise HTTPException(400, "lead_ids, uf or region required")
+    tier_codes = body.tiers or list(TIERS)
+    unknown = [code for code in tier_codes if code not in TIERS]
+    if unknown:
+        raise HTTPException(400, f"invalid tier: {', '.join(unknown)}")
+
+    query = select(Lead, LeadFeatures).outerjoin(
+        LeadFeatures, LeadFeatures.lead_id == Lead.lead_id
+    )
+    if body.lead_ids:
+        query = query.where(Lead.lead_id.in_(body.lead_ids))
+    if body.uf:
+        query = query.where(Lead.uf == body.uf)
+    if body.region:
+        query = query.where(Lead.region == body.region)
+    rows = (await db.execute(query.order_by(Lead.lead_id))).all()
+
+    frame: dict[str, list] = {
+        "lead_id": [],
+        "consumo_12m_kwh": [],
+        "hsp": [],
+        "load_profile": [],
+        "generation_modality": [],
+        "uc_type": [],
+    }
+    missing_features: list[str] = []
+    chosen_tiers: dict[str, str] = {}
+    for lead, features in rows:
+        if features is None:
+            missing_features.append(lead.lead_id)
+            continue
+        frame["lead_id"].append(lead.lead_id)
+        frame["consumo_12m_kwh"].append(float(features.consumo_12m_kwh or 6000))
+        frame["hsp"].append(float(features.hsp or 5.0))
+        frame["load_profile"].append(features.load_profile)
+        frame["generation_modality"].append(lead.generation_modality)
+        frame["uc_type"].append(lead.uc_type)
+        chosen_tiers[lead.lead_id] = _chosen_tier(lead.tier, tier_codes)
+
+    bundles = build_bundles(frame, tier_codes)
+    if bundles:
+        await db.execute(
+            insert(Recommendation),
+            [
+                {
+                    "id": bundle["id"],
+                    "lead_id": bundle["lead_id"],
+                    "tier_code": bundle["tier_code"],
+                    "band_code": bundle["band_code"],
+                    "kwp": bundle["kwp"],
+                    "expected_kwh_year": bundle["expected_kwh_year"],
+                    "upsell": {"suggested": bundle["upsell"]},
+                    "details": {
+                        **bundle["context"],
+                        "tier_factor": TIERS[bundle["tier_code"]]["factor"],
+                    },
+                }
+                for bundle in bundles
+            ],
+        )
+        await db.commit()
+
+    # Downstream consumers treat the first reco_bundle of a lead as its
+    # proposal, so only the bundle of the lead's chosen tier is published.
+    now = datetime.now(timezone.utc).isoformat()
+    await asyncio.gather(
+        *(
+            publish(SUBJECTS["reco_bundle"], {"ts": now, **bundle})
+            for bundle in bundles
+            if bundle["tier_code"] == chosen_tiers[bundle["lead_id"]]
+        )
+    )
+    return {
+        "items": [
+            {
+                "id": bundle["id"],
+                "lead_id": bundle["lead_id"],
+                "tier_code": bundle["tier_code"],
+                "band_code": bundle["band_code"],
+                "kwp": bundle["kwp"],
+                "expected_kwh_year": bundle["expected_kwh_year"],
+                "offers": bundle["offers"],
+                "upsell": bundle["upsell"],
+            }
+            for bundle in bundles
+        ],
+        "missing_features": missing_features,
+    }
@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
 
@@ -27,6 +27,26 @@ class LeadOut(BaseModel):
     status: Optional[str] = None
 
 
+class LeadSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    lead_id: str
+    created_at: datetime
+    source: Optional[str] = None
+    uf: Optional[str] = None
+    municipio: Optional[str] = None
+    consumer_class: Optional[str] = None
+    uc_type: Optional[str] = None
+    generation_modality: Optional[str] = None
+    tier: Optional[str] = None
+    status: Optional[str] = None
+
+
+class LeadPage(BaseModel):
+    items: List[LeadSummary] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
 class ClassifyIn(BaseModel):
     tariff_group: Optional[str] = None
     consumer_class: Optional[str] = None
@@ -62,6 +82,23 @@ class RecommendationOut(BaseModel):
     upsell: List[str] = Field(default_factory=list)
 
 
+class RecommendationBatchIn(BaseModel):
+    lead_ids: Optional[List[str]] = None
+    uf: Optional[str] = None
+    region: Optional[str] = None
+    tiers: Optional[List[str]] = None  # default: every configured tier
+
+
+class RecommendationBatchItem(RecommendationOut):
+    id: str
+    lead_id: str
+
+
+class RecommendationBatchOut(BaseModel):
+    items: List[RecommendationBatchItem] = Field(default_factory=list)
+    missing_features: List[str] = Field(default_factory=list)
+
+
 class KPIBundle(BaseModel):
     bacen: Dict[str, Any] = Field(default_factory=dict)
     epe: Dict[str, Any] = Field(default_factory=dict)
@@ -79,6 +116,30 @@ class GeoKPIIn(BaseModel):
     properties: Dict[str, Any] = Field(default_factory=dict)
 
 
+class GeoEnrichItem(BaseModel):
+    lead_id: str
+    cpf: str
+    cep: str
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    uf: Optional[str] = None
+    municipio: Optional[str] = None
+    properties: Dict[str, Any] = Field(default_factory=dict)
+
+
+class GeoEnrichBatchIn(BaseModel):
+    items: List[GeoEnrichItem] = Field(min_length=1)
+
+
+class GeoEnrichBatchOut(BaseModel):
+    upserted: int
+    missing_leads: List[str] = Field(default_factory=list)
+    conflicts: List[str] = Field(default_factory=list)
+    # Lead id -> namespaces whose provider failed; their stored KPIs are kept.
+    provider_failures: Dict[str, List[str]] = Field(default_factory=dict)
+    cache: Dict[str, int] = Field(default_factory=dict)
+
+
 class GeoKPIOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -100,3 +161,47 @@ class GeoKPIOut(BaseModel):
         if isinstance(value, KPIBundle):
             return value
         return KPIBundle(**value)
+
+
+class GeoPolygonIn(BaseModel):
+    type: Literal["Polygon"]
+    coordinates: List[List[List[float]]] = Field(min_length=1)
+
+    @field_validator("coordinates")
+    @classmethod
+    def _closed_rings(cls, value: List[List[List[float]]]) -> List[List[List[float]]]:
+        for ring in value:
+            if len(ring) < 4 or ring[0] != ring[-1]:
+                raise ValueError("polygon rings must be closed with >= 4 positions")
+        return value
+
+
+class GeoFeatureCollectionOut(BaseModel):
+    type: Literal["FeatureCollection"] = "FeatureCollection"
+    features: List[Dict[str, Any]] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+class KPIRow(BaseModel):
+    day: Optional[str] = None
+    uf: Optional[str] = None
+    tier: Optional[str] = None
+    leads_captured: int = 0
+    mqls: int = 0
+    sqls: int = 0
+    proposals: int = 0
+    premium_proposals: int = 0
+    ttfp_count: int = 0
+    ttfp_sum_seconds: float = 0.0
+    mql_to_sql: Optional[float] = None
+    sql_to_proposal: Optional[float] = None
+    lead_premium_rate: Optional[float] = None
+    ttfp_mean_seconds: Optional[float] = None
+    ttfp_p95_seconds: Optional[float] = None
+
+
+class KPIReport(BaseModel):
+    date_from: date
+    date_to: date
+    group_by: List[str] = Field(default_factory=list)
+    rows: List[KPIRow] = Field(default_factory=list)
@@ -9,9 +9,10 @@ normalisation behaviour without the need for a database.
 
 from __future__ import annotations
 
-from typing import Any, Mapping
-
+import json
+import operator
 import re
+from typing import Any, AsyncIterable, AsyncIterator, Mapping
 
 # The KPI providers we expect to receive for each enriched lead.  Keeping the
 # list centralised makes it easy to extend in the future and avoids scattering
@@ -20,6 +21,14 @@ EXPECTED_KPI_KEYS = ("bacen", "epe", "aneel", "ibge", "quod")
 
 _NUMERIC_PATTERN = re.compile(r"\D+")
 
+_THRESHOLD_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "eq": operator.eq,
+}
+
 
 def _sanitize_numeric(value: str | None) -> str:
     """Return only the numeric characters contained in ``value``."""
@@ -109,9 +118,83 @@ def build_geojson_feature(
     }
 
 
+def parse_kpi_threshold(expression: str) -> tuple[str, str, str, float]:
+    """Parse ``namespace.key:op:value`` into its components.
+
+    ``op`` is one of ``gt``, ``gte``, ``lt``, ``lte`` or ``eq`` and the
+    namespace must be one of :data:`EXPECTED_KPI_KEYS`, e.g.
+    ``aneel.dec:lte:12.5``.
+    """
+
+    try:
+        path, op, raw_value = expression.split(":")
+        namespace, key = path.split(".", 1)
+        value = float(raw_value)
+    except ValueError as exc:
+        raise ValueError(f"invalid KPI threshold: {expression!r}") from exc
+    if namespace not in EXPECTED_KPI_KEYS:
+        raise ValueError(f"unknown KPI namespace: {namespace!r}")
+    if op not in _THRESHOLD_OPERATORS:
+        raise ValueError(f"unknown KPI operator: {op!r}")
+    return namespace, key, op, value
+
+
+def kpis_match(
+    kpis: Mapping[str, Any] | None,
+    thresholds: list[tuple[str, str, str, float]],
+) -> bool:
+    """Return whether every threshold holds; missing or non-numeric KPIs fail."""
+
+    for namespace, key, op, expected in thresholds:
+        value = ((kpis or {}).get(namespace) or {}).get(key)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return False
+        if not _THRESHOLD_OPERATORS[op](number, expected):
+            return False
+    return True
+
+
+async def stream_feature_collection(
+    features: AsyncIterable[Mapping[str, Any]],
+    *,
+    ndjson: bool = False,
+    chunk_size: int = 500,
+) -> AsyncIterator[bytes]:
+    """Serialise features into byte chunks of at most ``chunk_size`` features.
+
+    With ``ndjson`` each feature is emitted on its own line (newline-delimited
+    GeoJSON); otherwise the chunks concatenate into a single
+    ``FeatureCollection`` document.  Only one chunk is held in memory.
+    """
+
+    buffer: list[str] = []
+    first = True
+    if not ndjson:
+        yield b'{"type":"FeatureCollection","features":['
+    async for feature in features:
+        encoded = json.dumps(feature, separators=(",", ":"), default=str)
+        if ndjson:
+            buffer.append(encoded + "\n")
+        else:
+            buffer.append(encoded if first else "," + encoded)
+        first = False
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+    if buffer:
+        yield "".join(buffer).encode()
+    if not ndjson:
+        yield b"]}"
+
+
 __all__ = [
     "EXPECTED_KPI_KEYS",
     "build_geo_key",
     "build_geojson_feature",
     "ensure_kpi_payload",
+    "kpis_match",
+    "parse_kpi_threshold",
+    "stream_feature_collection",
 ]
@@ -0,0 +1,210 @@
+"""Geohash based spatial indexing helpers for enriched lead locations.
+
+Each ``lead_geo_kpis`` row stores the geohash of its point in a B-tree indexed
+column.  Geohashes sharing a prefix fall inside the same grid cell, so a
+bounding box can be covered by a handful of prefixes and each prefix becomes a
+contiguous range scan on the index.  The cover is deliberately coarse: callers
+refine candidates with :func:`bbox_contains`, :func:`haversine_km` or
+:func:`point_in_polygon` to obtain exact results.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Sequence
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_BASE32_INDEX = {char: index for index, char in enumerate(_BASE32)}
+
+# Precision stored in the database column (~4.8 m x 4.8 m cells).
+GEOHASH_PRECISION = 9
+
+EARTH_RADIUS_KM = 6371.0088
+
+BBox = tuple[float, float, float, float]  # (min_lat, min_lon, max_lat, max_lon)
+
+
+def encode_geohash(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    """Encode a coordinate into a base32 geohash of ``precision`` characters."""
+
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars: list[str] = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def _cell_size(precision: int) -> tuple[float, float]:
+    """Return the ``(lat, lon)`` size in degrees of a cell at ``precision``."""
+
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _grid_span(bbox: BBox, precision: int) -> tuple[range, range]:
+    """Row and column indexes of the ``precision`` grid touched by ``bbox``."""
+
+    min_lat, min_lon, max_lat, max_lon = bbox
+    lat_step, lon_step = _cell_size(precision)
+    rows = range(
+        math.floor((min_lat + 90) / lat_step),
+        math.floor((max_lat + 90) / lat_step) + 1,
+    )
+    cols = range(
+        math.floor((min_lon + 180) / lon_step),
+        math.floor((max_lon + 180) / lon_step) + 1,
+    )
+    return rows, cols
+
+
+def cover_bbox(bbox: BBox, max_cells: int = 32) -> list[str]:
+    """Return geohash prefixes whose cells jointly cover ``bbox``.
+
+    The finest precision whose cover fits in ``max_cells`` is chosen so the
+    resulting range scans stay both few and selective.
+    """
+
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        rows, cols = _grid_span(bbox, candidate)
+        if len(rows) * len(cols) <= max_cells:
+            precision = candidate
+            break
+
+    lat_step, lon_step = _cell_size(precision)
+    rows, cols = _grid_span(bbox, precision)
+    cells: list[str] = []
+    for row in rows:
+        lat = min(-90 + (row + 0.5) * lat_step, 90.0)
+        for col in cols:
+            lon = min(-180 + (col + 0.5) * lon_step, 180.0)
+            cell = encode_geohash(lat, lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return sorted(cells)
+
+
+def prefix_upper_bound(prefix: str) -> str | None:
+    """Return the smallest geohash string greater than every ``prefix*`` value.
+
+    ``None`` means the range is unbounded (the prefix is all ``z``).
+    """
+
+    chars = list(prefix)
+    while chars:
+        index = _BASE32_INDEX[chars[-1]]
+        if index + 1 < len(_BASE32):
+            chars[-1] = _BASE32[index + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def bbox_contains(bbox: BBox, latitude: float, longitude: float) -> bool:
+    min_lat, min_lon, max_lat, max_lon = bbox
+    return min_lat <= latitude <= max_lat and min_lon <= longitude <= max_lon
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres between two coordinates."""
+
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    """Bounding box enclosing the circle of ``radius_km`` around a point."""
+
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    d_lon = 180.0 if cos_lat < 1e-9 else min(180.0, d_lat / cos_lat)
+    return (
+        max(-90.0, latitude - d_lat),
+        max(-180.0, longitude - d_lon),
+        min(90.0, latitude + d_lat),
+        min(180.0, longitude + d_lon),
+    )
+
+
+def _in_ring(
+    ring: Sequence[Sequence[float]], latitude: float, longitude: float
+) -> bool:
+    inside = False
+    count = len(ring)
+    j = count - 1
+    for i in range(count):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > latitude) != (yj > latitude):
+            cross = (xj - xi) * (latitude - yi) / (yj - yi) + xi
+            if longitude < cross:
+                inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(
+    rings: Sequence[Sequence[Sequence[float]]], latitude: float, longitude: float
+) -> bool:
+    """Ray-casting test against GeoJSON polygon rings (outer ring then holes)."""
+
+    if not rings or not _in_ring(rings[0], latitude, longitude):
+        return False
+    return not any(_in_ring(hole, latitude, longitude) for hole in rings[1:])
+
+
+def polygon_bbox(rings: Sequence[Sequence[Sequence[float]]]) -> BBox:
+    """Bounding box of a GeoJSON polygon's outer ring."""
+
+    lons = [point[0] for point in rings[0]]
+    lats = [point[1] for point in rings[0]]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+__all__ = [
+    "GEOHASH_PRECISION",
+    "bbox_contains",
+    "cover_bbox",
+    "encode_geohash",
+    "haversine_km",
+    "point_in_polygon",
+    "polygon_bbox",
+    "prefix_upper_bound",
+    "radius_bbox",
+]
@@ -0,0 +1,416 @@
+"""Batched geo-KPI enrichment: provider fan-out, response caching, bulk upsert.
+
+Each lead needs one payload per namespace in :data:`EXPECTED_KPI_KEYS`.  The
+providers are queried concurrently per lead and their responses are cached by
+the location attributes they actually depend on (e.g. IBGE indicators by
+municipality, ANEEL distributor data by CEP), so a batch of neighbouring leads
+costs a handful of upstream calls.  Concurrent lookups of the same cache key
+share a single in-flight request.  Results are written with one
+``INSERT .. ON CONFLICT`` statement per batch.
+
+A namespace whose provider fails is left out of the payload; the worker keeps
+the value already stored for it, so an upstream outage never erases KPIs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Mapping, Protocol, Sequence
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import dialect_insert
+from app.models.leads import Lead, LeadGeoKPIs
+from app.services.geo_enrichment import (
+    EXPECTED_KPI_KEYS,
+    build_geo_key,
+    build_geojson_feature,
+)
+from app.services.geo_index import encode_geohash
+
+logger = logging.getLogger(__name__)
+
+# Location attributes each provider's response depends on, and how long a
+# cached response stays valid.  QUOD scores are per person, the rest are
+# regional indicators that change slowly.
+PROVIDER_CACHE_KEYS: dict[str, tuple[str, ...]] = {
+    "bacen": ("uf",),
+    "epe": ("uf", "municipio"),
+    "aneel": ("cep",),
+    "ibge": ("uf", "municipio"),
+    "quod": ("cpf",),
+}
+PROVIDER_TTL_SECONDS: dict[str, float] = {
+    "bacen": 6 * 3600,
+    "epe": 24 * 3600,
+    "aneel": 24 * 3600,
+    "ibge": 7 * 24 * 3600,
+    "quod": 3600,
+}
+
+
+@dataclass(frozen=True)
+class EnrichmentInput:
+    lead_id: str
+    cpf: str
+    cep: str
+    latitude: float
+    longitude: float
+    uf: str | None = None
+    municipio: str | None = None
+    properties: Mapping[str, Any] = field(default_factory=dict)
+
+    def location(self) -> dict[str, Any]:
+        return {
+            "cpf": self.cpf,
+            "cep": self.cep,
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "uf": self.uf,
+            "municipio": self.municipio,
+        }
+
+
+class KPIProvider(Protocol):
+    name: str
+
+    async def fetch(self, location: Mapping[str, Any]) -> dict[str, Any]: ...
+
+
+class HttpKPIProvider:
+    """Provider backed by a ``POST {url}`` tool endpoint returning a JSON object."""
+
+    def __init__(self, name: str, url: str, client: httpx.AsyncClient) -> None:
+        self.name = name
+        self.url = url
+        self._client = client
+
+    async def fetch(self, location: Mapping[str, Any]) -> dict[str, Any]:
+        response = await self._client.post(self.url, json=dict(location))
+        response.raise_for_status()
+        return response.json()
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and request coalescing."""
+
+    def __init__(self, max_entries: int = 50_000) -> None:
+        self.max_entries = max_entries
+        self._entries: dict[tuple, tuple[float, Any]] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict(self, now: float) -> None:
+        expired = [key for key, (expiry, _) in self._entries.items() if expiry <= now]
+        for key in expired:
+            del self._entries[key]
+        overflow = len(self._entries) - self.max_entries + 1
+        # dicts keep insertion order, so the first keys are the oldest.
+        for key in list(self._entries)[: max(overflow, 0)]:
+            del self._entries[key]
+
+    async def get_or_fetch(
+        self, key: tuple, ttl: float, fetch: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            return entry[1]
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so waiter-less failures do not log warnings.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if len(self._entries) >= self.max_entries:
+                self._evict(time.monotonic())
+            self._entries[key] = (time.monotonic() + ttl, value)
+            return value
+        finally:
+            del self._inflight[key]
+
+
+class GeoEnrichmentWorker:
+    """Fans out KPI lookups per lead and bulk upserts the enriched features."""
+
+    def __init__(
+        self,
+        providers: Sequence[KPIProvider],
+        cache: TTLCache | None = None,
+        *,
+        concurrency: int = 32,
+        batch_size: int = 200,
+    ) -> None:
+        self.providers = list(providers)
+        self.cache = cache or TTLCache()
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch_namespace(
+        self, provider: KPIProvider, location: Mapping[str, Any]
+    ) -> dict[str, Any] | None:
+        """Return the provider's payload, or ``None`` if the provider failed."""
+
+        key_fields = PROVIDER_CACHE_KEYS.get(provider.name, ("cep",))
+        key = (provider.name, *(location.get(name) for name in key_fields))
+        ttl = PROVIDER_TTL_SECONDS.get(provider.name, 3600)
+
+        async def fetch() -> dict[str, Any]:
+            async with self._semaphore:
+                return await provider.fetch(location)
+
+        try:
+            return await self.cache.get_or_fetch(key, ttl, fetch)
+        except Exception:  # noqa: BLE001 - one provider must not sink the lead
+            logger.warning(
+                "KPI provider %s failed for %s", provider.name, key, exc_info=True
+            )
+            return None
+
+    async def _enrich(self, item: EnrichmentInput) -> tuple[dict[str, Any], list[str]]:
+        location = item.location()
+        results = await asyncio.gather(
+            *(self._fetch_namespace(provider, location) for provider in self.providers)
+        )
+        payload: dict[str, Any] = {}
+        failed: list[str] = []
+        for provider, result in zip(self.providers, results):
+            if provider.name not in EXPECTED_KPI_KEYS:
+                continue
+            if result is None:
+                failed.append(provider.name)
+            else:
+                payload[provider.name] = result
+        return payload, failed
+
+    async def enrich(self, item: EnrichmentInput) -> dict[str, Any]:
+        """Return the KPI payload of ``item`` with every provider queried at once.
+
+        Namespaces whose provider failed are omitted.
+        """
+
+        payload, _ = await self._enrich(item)
+        return payload
+
+    async def run(
+        self, session: AsyncSession, items: Sequence[EnrichmentInput]
+    ) -> dict[str, Any]:
+        """Enrich and persist ``items`` in batches of ``batch_size``."""
+
+        summary: dict[str, Any] = {
+            "upserted": 0,
+            "missing_leads": [],
+            "conflicts": [],
+            "provider_failures": {},
+        }
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start : start + self.batch_size]
+            results = await asyncio.gather(*(self._enrich(item) for item in batch))
+            failures = {
+                item.lead_id: failed
+                for item, (_, failed) in zip(batch, results)
+                if failed
+            }
+            stored = await _stored_kpis(session, list(failures))
+            kpis = [
+                {
+                    **{
+                        name: stored[item.lead_id][name]
+                        for name in failures.get(item.lead_id, ())
+                        if stored.get(item.lead_id, {}).get(name)
+                    },
+                    **payload,
+                }
+                for item, (payload, _) in zip(batch, results)
+            ]
+            summary["provider_failures"].update(failures)
+            rows = [
+                build_geo_kpi_row(
+                    lead_id=item.lead_id,
+                    cpf=item.cpf,
+                    cep=item.cep,
+                    latitude=item.latitude,
+                    longitude=item.longitude,
+                    kpis=payload,
+                    properties=item.properties,
+                )
+                for item, payload in zip(batch, kpis)
+            ]
+            result = await bulk_upsert_geo_kpis(session, rows)
+            summary["upserted"] += result["upserted"]
+            summary["missing_leads"].extend(result["missing_leads"])
+            summary["conflicts"].extend(result["conflicts"])
+        summary["cache"] = {
+            "entries": len(self.cache),
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+        }
+        return summary
+
+
+async def _stored_kpis(
+    session: AsyncSession, lead_ids: Sequence[str]
+) -> dict[str, dict[str, Any]]:
+    """Return the KPI payload currently stored for each of ``lead_ids``."""
+
+    if not lead_ids:
+        return {}
+    rows = await session.execute(
+        select(LeadGeoKPIs.lead_id, LeadGeoKPIs.kpis).where(
+            LeadGeoKPIs.lead_id.in_(list(lead_ids))
+        )
+    )
+    return {lead_id: kpis or {} for lead_id, kpis in rows.all()}
+
+
+def build_geo_kpi_row(
+    *,
+    lead_id: str,
+    cpf: str,
+    cep: str,
+    latitude: float,
+    longitude: float,
+    kpis: Mapping[str, Any] | None = None,
+    properties: Mapping[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Return the ``lead_geo_kpis`` column values for one enriched lead."""
+
+    feature = build_geojson_feature(
+        cpf=cpf,
+        cep=cep,
+        latitude=latitude,
+        longitude=longitude,
+        kpis=kpis,
+        properties=properties,
+    )
+    props = feature["properties"]
+    lon, lat = feature["geometry"]["coordinates"]
+    return {
+        "composite_key": build_geo_key(cpf, cep, latitude, longitude),
+        "lead_id": lead_id,
+        "cpf": props.get("cpf", ""),
+        "cep": props.get("cep", ""),
+        "latitude": lat,
+        "longitude": lon,
+        "geohash": encode_geohash(lat, lon),
+        "properties": props,
+        "kpis": props.get("kpis", {}),
+        "geojson": feature,
+    }
+
+
+async def bulk_upsert_geo_kpis(
+    session: AsyncSession, rows: Sequence[dict[str, Any]]
+) -> dict[str, Any]:
+    """Insert or update ``rows`` (one per lead) with a single statement.
+
+    Rows for unknown leads, and rows whose composite key already belongs to a
+    different lead (in the table or earlier in ``rows``), are skipped and
+    reported instead of failing the batch.
+    """
+
+    by_lead: dict[str, dict[str, Any]] = {}
+    claimed: dict[str, str] = {}
+    duplicates: list[str] = []
+    for row in rows:
+        owner = claimed.setdefault(row["composite_key"], row["lead_id"])
+        if owner != row["lead_id"]:
+            duplicates.append(row["lead_id"])
+            continue
+        by_lead[row["lead_id"]] = row
+    if not by_lead:
+        return {"upserted": 0, "missing_leads": [], "conflicts": duplicates}
+    known = set(
+        (
+            await session.execute(
+                select(Lead.lead_id).where(Lead.lead_id.in_(list(by_lead)))
+            )
+        ).scalars()
+    )
+    owners = dict(
+        (
+            await session.execute(
+                select(LeadGeoKPIs.composite_key, LeadGeoKPIs.lead_id).where(
+                    LeadGeoKPIs.composite_key.in_(
+                        [row["composite_key"] for row in by_lead.values()]
+                    )
+                )
+            )
+        ).all()
+    )
+    missing = [lead_id for lead_id in by_lead if lead_id not in known]
+    conflicts = duplicates + [
+        row["lead_id"]
+        for row in by_lead.values()
+        if owners.get(row["composite_key"], row["lead_id"]) != row["lead_id"]
+    ]
+    skipped = set(missing) | set(conflicts)
+    now = datetime.now(timezone.utc)
+    values = [
+        {**row, "created_at": now, "updated_at": now}
+        for lead_id, row in by_lead.items()
+        if lead_id not in skipped
+    ]
+    if values:
+        statement = dialect_insert(session)(LeadGeoKPIs).values(values)
+        updated = {
+            column: statement.excluded[column]
+            for column in values[0]
+            if column not in ("lead_id", "created_at")
+        }
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[LeadGeoKPIs.lead_id], set_=updated
+            )
+        )
+        await session.commit()
+    return {"upserted": len(values), "missing_leads": missing, "conflicts": conflicts}
+
+
+def build_http_providers(
+    urls: Mapping[str, str], client: httpx.AsyncClient
+) -> list[HttpKPIProvider]:
+    """Instantiate HTTP providers for the configured namespaces."""
+
+    return [
+        HttpKPIProvider(name, url, client)
+        for name, url in urls.items()
+        if name in EXPECTED_KPI_KEYS and url
+    ]
+
+
+__all__ = [
+    "EnrichmentInput",
+    "GeoEnrichmentWorker",
+    "HttpKPIProvider",
+    "KPIProvider",
+    "TTLCache",
+    "build_geo_kpi_row",
+    "build_http_providers",
+    "bulk_upsert_geo_kpis",
+]
@@ -0,0 +1,274 @@
+"""Incremental funnel KPI rollups fed by the ``ysh.origination.*`` events.
+
+The dashboards (``dashboards/kpis_*.yaml``) read pre-aggregated counters
+instead of scanning ``leads`` and ``recommendations``.  Funnel stages map to
+events as follows:
+
+* MQL: ``lead.captured`` with LGPD consent.
+* SQL: first ``consumption.profile.detected`` of the lead.
+* Proposal: first ``recommendation.bundle.created`` of the lead; premium when
+  its tier is in :data:`PREMIUM_TIERS`.
+* TTFP: time between capture and first proposal, kept as a histogram so p95
+  can be estimated from the summary tables alone.
+
+Counters are bumped with ``INSERT .. ON CONFLICT DO UPDATE SET c = c + n`` so
+several API replicas can consume the stream (as one NATS queue group)
+without lost updates.  ``kpi_lead_progress`` makes redelivered events no-ops.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+from datetime import date, datetime, timezone
+from typing import Any, Iterable, Mapping
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import SessionLocal, dialect_insert
+from app.events.nats_bus import SUBJECTS
+from app.models.kpis import KPIDailyRollup, KPILeadProgress, KPITTFPHistogram
+
+logger = logging.getLogger(__name__)
+
+KPI_QUEUE_GROUP = "origination-kpis"
+PREMIUM_TIERS = frozenset({"T145", "T160"})
+# Upper bounds (seconds) of the TTFP histogram buckets; the last one catches
+# everything slower than a week.
+TTFP_BUCKETS = (60, 120, 300, 600, 900, 1800, 3600, 7200, 21600, 86400, 604800)
+TTFP_OVERFLOW_BUCKET = 2**31 - 1
+GROUP_BY_COLUMNS = ("day", "uf", "tier")
+_COUNTERS = (
+    "leads_captured",
+    "mqls",
+    "sqls",
+    "proposals",
+    "premium_proposals",
+    "ttfp_count",
+    "ttfp_sum_seconds",
+)
+
+
+def _parse_ts(value: Any) -> datetime:
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            parsed = datetime.now(timezone.utc)
+    else:
+        parsed = datetime.now(timezone.utc)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def ttfp_bucket(seconds: float) -> int:
+    """Return the upper bound of the histogram bucket holding ``seconds``."""
+
+    index = bisect.bisect_left(TTFP_BUCKETS, seconds)
+    if index < len(TTFP_BUCKETS):
+        return TTFP_BUCKETS[index]
+    return TTFP_OVERFLOW_BUCKET
+
+
+def percentile_from_histogram(
+    histogram: Mapping[int, int], quantile: float
+) -> float | None:
+    """Upper bucket bound at which the cumulative count reaches ``quantile``."""
+
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = quantile * total
+    cumulative = 0
+    for bound in sorted(histogram):
+        cumulative += histogram[bound]
+        if cumulative >= threshold:
+            return float(bound)
+    return float(max(histogram))
+
+
+async def _increment(
+    session: AsyncSession,
+    model: type,
+    key: Mapping[str, Any],
+    counters: Mapping[str, float],
+) -> None:
+    table = model.__table__
+    statement = dialect_insert(session)(model).values({**key, **counters})
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + statement.excluded[name] for name in counters},
+        )
+    )
+
+
+async def _progress(session: AsyncSession, lead_id: str) -> KPILeadProgress:
+    # Insert first so the row exists to be locked: a SELECT .. FOR UPDATE on a
+    # missing row locks nothing, and two consumers would both insert it.
+    await session.execute(
+        dialect_insert(session)(KPILeadProgress)
+        .values(lead_id=lead_id, uf="", tier="")
+        .on_conflict_do_nothing(index_elements=[KPILeadProgress.lead_id])
+    )
+    return (
+        await session.execute(
+            select(KPILeadProgress)
+            .where(KPILeadProgress.lead_id == lead_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+
+
+async def apply_event(
+    session: AsyncSession, subject: str, payload: Mapping[str, Any]
+) -> bool:
+    """Fold one event into the rollups; returns ``False`` when it is ignored."""
+
+    lead_id = payload.get("lead_id")
+    if not lead_id:
+        return False
+    ts = _parse_ts(payload.get("ts"))
+    day = ts.date().isoformat()
+
+    if subject == SUBJECTS["lead_captured"]:
+        progress = await _progress(session, lead_id)
+        if progress.captured_at is not None:
+            return False
+        progress.captured_at = ts
+        progress.uf = (payload.get("uf") or progress.uf or "")[:2].upper()
+        counters = {"leads_captured": 1, "mqls": 1 if payload.get("consent") else 0}
+        key = {"day": day, "uf": progress.uf, "tier": ""}
+        await _increment(session, KPIDailyRollup, key, counters)
+        return True
+
+    if subject == SUBJECTS["profile_detected"]:
+        progress = await _progress(session, lead_id)
+        if progress.sql_at is not None:
+            return False
+        progress.sql_at = ts
+        key = {"day": day, "uf": progress.uf, "tier": ""}
+        await _increment(session, KPIDailyRollup, key, {"sqls": 1})
+        return True
+
+    if subject == SUBJECTS["reco_bundle"]:
+        progress = await _progress(session, lead_id)
+        if progress.proposed_at is not None:
+            return False
+        tier = payload.get("tier_code") or ""
+        progress.proposed_at = ts
+        progress.tier = tier
+        key = {"day": day, "uf": progress.uf, "tier": tier}
+        counters: dict[str, float] = {
+            "proposals": 1,
+            "premium_proposals": 1 if tier in PREMIUM_TIERS else 0,
+        }
+        if progress.captured_at is not None:
+            captured_at = progress.captured_at
+            if captured_at.tzinfo is None:
+                captured_at = captured_at.replace(tzinfo=timezone.utc)
+            seconds = max((ts - captured_at).total_seconds(), 0.0)
+            counters.update(ttfp_count=1, ttfp_sum_seconds=seconds)
+            await _increment(
+                session,
+                KPITTFPHistogram,
+                {**key, "le_seconds": ttfp_bucket(seconds)},
+                {"count": 1},
+            )
+        await _increment(session, KPIDailyRollup, key, counters)
+        return True
+
+    return False
+
+
+async def handle_message(msg: Any) -> None:
+    """NATS subscription callback; errors are logged so the stream keeps flowing."""
+
+    try:
+        payload = json.loads(msg.data)
+        async with SessionLocal() as session:
+            if await apply_event(session, msg.subject, payload):
+                await session.commit()
+    except Exception:  # noqa: BLE001
+        logger.exception("failed to apply KPI event from %s", msg.subject)
+
+
+def _rates(row: Mapping[str, Any], histogram: Mapping[int, int]) -> dict[str, Any]:
+    def ratio(numerator: float, denominator: float) -> float | None:
+        return round(numerator / denominator, 4) if denominator else None
+
+    return {
+        "mql_to_sql": ratio(row["sqls"], row["mqls"]),
+        "sql_to_proposal": ratio(row["proposals"], row["sqls"]),
+        "lead_premium_rate": ratio(row["premium_proposals"], row["proposals"]),
+        "ttfp_mean_seconds": ratio(row["ttfp_sum_seconds"], row["ttfp_count"]),
+        "ttfp_p95_seconds": percentile_from_histogram(histogram, 0.95),
+    }
+
+
+async def query_kpis(
+    session: AsyncSession,
+    date_from: date,
+    date_to: date,
+    *,
+    uf: str | None = None,
+    tier: str | None = None,
+    group_by: Iterable[str] = (),
+) -> list[dict[str, Any]]:
+    """Aggregate the rollups in ``[date_from, date_to]`` grouped by ``group_by``."""
+
+    dims = [name for name in GROUP_BY_COLUMNS if name in set(group_by)]
+
+    def scoped(model: type, *columns: Any):
+        query = select(*(getattr(model, name) for name in dims), *columns).where(
+            model.day >= date_from.isoformat(), model.day <= date_to.isoformat()
+        )
+        if uf:
+            query = query.where(model.uf == uf.upper())
+        if tier:
+            query = query.where(model.tier == tier)
+        return query.group_by(*(getattr(model, name) for name in dims))
+
+    sums = [
+        func.coalesce(func.sum(getattr(KPIDailyRollup, name)), 0).label(name)
+        for name in _COUNTERS
+    ]
+    totals = scoped(KPIDailyRollup, *sums)
+    buckets = scoped(
+        KPITTFPHistogram,
+        KPITTFPHistogram.le_seconds,
+        func.sum(KPITTFPHistogram.count).label("count"),
+    ).group_by(KPITTFPHistogram.le_seconds)
+
+    histograms: dict[tuple, dict[int, int]] = {}
+    for row in (await session.execute(buckets)).mappings():
+        group = tuple(row[name] for name in dims)
+        histograms.setdefault(group, {})[row["le_seconds"]] = row["count"]
+
+    results = []
+    for row in (await session.execute(totals)).mappings():
+        group = tuple(row[name] for name in dims)
+        results.append(
+            {
+                **{name: row[name] for name in dims},
+                **{name: row[name] for name in _COUNTERS},
+                **_rates(row, histograms.get(group, {})),
+            }
+        )
+    results.sort(key=lambda item: tuple(item[name] for name in dims))
+    return results
+
+
+__all__ = [
+    "KPI_QUEUE_GROUP",
+    "PREMIUM_TIERS",
+    "apply_event",
+    "handle_message",
+    "percentile_from_histogram",
+    "query_kpis",
+    "ttfp_bucket",
+]
@@ -0,0 +1,32 @@
+"""Opaque keyset cursors for ``(timestamp, id)`` ordered listings.
+
+Cursors encode the sort key of the last row of a page so the next page is a
+``WHERE (created_at, id) < (:ts, :id)`` index range scan whose cost does not
+grow with the page depth, unlike ``OFFSET``.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, key: str) -> str:
+    raw = f"{created_at.isoformat()}|{key}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Return the ``(created_at, key)`` pair; raises ``ValueError`` if malformed."""
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, key = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), key
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+__all__ = ["decode_cursor", "encode_cursor"]
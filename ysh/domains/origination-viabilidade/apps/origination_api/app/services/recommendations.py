@@ -1,10 +1,19 @@
 import uuid
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping, Sequence
 from pathlib import Path
 
+import numpy as np
 import yaml
 
-from app.services.sizing import choose_band, sizing_summary
+from app.services.sizing import (
+    DEFAULT_LOSSES,
+    DEFAULT_PR,
+    choose_band,
+    choose_band_indices,
+    compute_kwp_array,
+    expected_kwh_year_array,
+    sizing_summary,
+)
 
 CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs"
 
@@ -15,6 +24,12 @@ with open(CONFIG_DIR / "recommendation_tiers.yaml", "r", encoding="utf-8") as fp
 with open(CONFIG_DIR / "upsell_rules.yaml", "r", encoding="utf-8") as fp:
     UPSELL = yaml.safe_load(fp)["rules"]
 
+# Context keys referenced by the upsell rules; batch generation memoises rule
+# evaluation on these so it runs once per distinct combination, not per row.
+_RULE_CONTEXT_KEYS = tuple(
+    sorted({key for rule in UPSELL for key in rule.get("when", {}) if key != "band_in"})
+)
+
 
 def _matches(expected: Iterable, value: str | None) -> bool:
     return value is not None and value in expected
@@ -46,45 +61,49 @@ def _suggest_from_rules(band_code: str, context: dict) -> list[str]:
     return sorted(suggestions)
 
 
-def build_bundle(features: dict, preferred_tier: str | None) -> dict:
-    tier_code = preferred_tier or "T115"
-    tier = TIERS[tier_code]
-    summary = sizing_summary(features, tier["factor"])
-    kwp = summary["kwp"]
-    band_code, band = choose_band(kwp, PROJECT_BANDS)
-    context = {
-        "hsp": summary["hsp"],
-        "pr": summary["pr"],
-        "losses": summary["losses"],
-        "load_profile": features.get("load_profile"),
-        "generation_modality": features.get("generation_modality"),
-        "uc_type": features.get("uc_type"),
-    }
-    rule_suggestions = _suggest_from_rules(band_code, context)
-    combined_upsell = sorted(set(tier["upsell_triggers"]) | set(rule_suggestions))
-    offers = [
+def _build_offers(band_code: str, kwp: float, upsell: list[str]) -> list[dict]:
+    return [
         {
             "sku": f"{band_code}-BASE",
             "title": f"Kit {band_code} Base",
             "capex_estimate": 1000 * max(kwp, 1),
             "payback_estimate": 48,
-            "upsell": combined_upsell,
+            "upsell": upsell,
         },
         {
             "sku": f"{band_code}-PLUS",
             "title": f"Kit {band_code} Plus",
             "capex_estimate": 1100 * max(kwp, 1),
             "payback_estimate": 54,
-            "upsell": combined_upsell,
+            "upsell": upsell,
         },
         {
             "sku": f"{band_code}-PRO",
             "title": f"Kit {band_code} Pro",
             "capex_estimate": 1200 * max(kwp, 1),
             "payback_estimate": 60,
-            "upsell": combined_upsell,
+            "upsell": upsell,
         },
     ]
+
+
+def build_bundle(features: dict, preferred_tier: str | None) -> dict:
+    tier_code = preferred_tier or "T115"
+    tier = TIERS[tier_code]
+    summary = sizing_summary(features, tier["factor"])
+    kwp = summary["kwp"]
+    band_code, band = choose_band(kwp, PROJECT_BANDS)
+    context = {
+        "hsp": summary["hsp"],
+        "pr": summary["pr"],
+        "losses": summary["losses"],
+        "load_profile": features.get("load_profile"),
+        "generation_modality": features.get("generation_modality"),
+        "uc_type": features.get("uc_type"),
+    }
+    rule_suggestions = _suggest_from_rules(band_code, context)
+    combined_upsell = sorted(set(tier["upsell_triggers"]) | set(rule_suggestions))
+    offers = _build_offers(band_code, kwp, combined_upsell)
     return {
         "id": str(uuid.uuid4()),
         "tier_code": tier_code,
@@ -96,3 +115,95 @@ def build_bundle(features: dict, preferred_tier: str | None) -> dict:
         "upsell": combined_upsell,
         "sizing": summary,
     }
+
+
+def _numeric_column(frame: Mapping, name: str) -> np.ndarray:
+    """Return ``frame[name]`` as floats, mapping missing values to ``0.0``."""
+
+    return np.nan_to_num(np.asarray(frame[name], dtype=float), nan=0.0)
+
+
+def _object_column(frame: Mapping, name: str, size: int) -> Sequence:
+    if name not in frame:
+        return [None] * size
+    return list(frame[name])
+
+
+def build_bundles(frame: Mapping, tiers: Iterable[str] | None = None) -> list[dict]:
+    """Build recommendation bundles for every lead x tier combination.
+
+    ``frame`` is column oriented (a pandas ``DataFrame`` or a mapping of
+    equally sized sequences) with ``lead_id``, ``consumo_12m_kwh`` and ``hsp``
+    plus the optional ``load_profile``, ``generation_modality`` and
+    ``uc_type`` columns.  Sizing and band selection are computed as NumPy
+    arrays of shape ``(leads, tiers)``; upsell rules are evaluated once per
+    distinct context.  Each bundle matches :func:`build_bundle` output with an
+    extra ``lead_id`` key, ordered by lead then tier.
+    """
+
+    tier_codes = list(tiers) if tiers is not None else list(TIERS)
+    unknown = [code for code in tier_codes if code not in TIERS]
+    if unknown:
+        raise KeyError(f"unknown tiers: {', '.join(unknown)}")
+    lead_ids = list(frame["lead_id"])
+    size = len(lead_ids)
+    if not size or not tier_codes:
+        return []
+
+    consumo = _numeric_column(frame, "consumo_12m_kwh")[:, None]
+    hsp = _numeric_column(frame, "hsp")[:, None]
+    factors = np.array([TIERS[code]["factor"] for code in tier_codes])[None, :]
+    kwp = compute_kwp_array(consumo, hsp, factors)
+    kwh_year = expected_kwh_year_array(kwp, hsp)
+    band_idx = choose_band_indices(kwp, PROJECT_BANDS)
+    hsp_rounded = np.round(np.maximum(hsp[:, 0], 0.1), 2)
+
+    categorical = {
+        name: _object_column(frame, name, size)
+        for name in ("load_profile", "generation_modality", "uc_type")
+    }
+    rule_cache: dict[tuple, list[str]] = {}
+    bundles: list[dict] = []
+    for row, lead_id in enumerate(lead_ids):
+        context = {
+            "hsp": float(hsp_rounded[row]),
+            "pr": DEFAULT_PR,
+            "losses": DEFAULT_LOSSES,
+            **{name: values[row] for name, values in categorical.items()},
+        }
+        for col, tier_code in enumerate(tier_codes):
+            band_code = PROJECT_BANDS[band_idx[row, col]]["code"]
+            row_kwp = float(kwp[row, col])
+            cache_key = (
+                tier_code,
+                band_code,
+                *(context.get(key) for key in _RULE_CONTEXT_KEYS),
+            )
+            upsell = rule_cache.get(cache_key)
+            if upsell is None:
+                upsell = sorted(
+                    set(TIERS[tier_code]["upsell_triggers"])
+                    | set(_suggest_from_rules(band_code, context))
+                )
+                rule_cache[cache_key] = upsell
+            bundles.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "lead_id": lead_id,
+                    "tier_code": tier_code,
+                    "band_code": band_code,
+                    "kwp": row_kwp,
+                    "expected_kwh_year": float(kwh_year[row, col]),
+                    "offers": _build_offers(band_code, row_kwp, upsell),
+                    "context": dict(context),
+                    "upsell": upsell,
+                    "sizing": {
+                        "kwp": row_kwp,
+                        "expected_kwh_year": float(kwh_year[row, col]),
+                        "pr": DEFAULT_PR,
+                        "losses": DEFAULT_LOSSES,
+                        "hsp": context["hsp"],
+                    },
+                }
+            )
+    return bundles
@@ -1,5 +1,7 @@
 from typing import Any, Dict, Tuple
 
+import numpy as np
+
 DEFAULT_PR = 0.80
 DEFAULT_LOSSES = 0.14
 DAYS = 365
@@ -55,3 +57,42 @@ def choose_band(kwp: float, bands: list[dict]) -> Tuple[str, dict]:
         if kwp >= lo and kwp < hi:
             return band["code"], band
     return bands[-1]["code"], bands[-1]
+
+
+def compute_kwp_array(
+    consumo_anual_kwh: np.ndarray,
+    hsp: np.ndarray,
+    tier_factor: np.ndarray,
+    pr: float = DEFAULT_PR,
+    losses: float = DEFAULT_LOSSES,
+) -> np.ndarray:
+    """Vectorised :func:`compute_kwp` over broadcastable arrays."""
+
+    denom = np.maximum(hsp, 0.1) * DAYS * pr * (1 - losses)
+    return np.round((consumo_anual_kwh * tier_factor) / denom, 2)
+
+
+def expected_kwh_year_array(
+    kwp: np.ndarray,
+    hsp: np.ndarray,
+    pr: float = DEFAULT_PR,
+    losses: float = DEFAULT_LOSSES,
+) -> np.ndarray:
+    """Vectorised :func:`expected_kwh_year` over broadcastable arrays."""
+
+    return np.round(kwp * np.maximum(hsp, 0.1) * DAYS * pr * (1 - losses), 0)
+
+
+def choose_band_indices(kwp: np.ndarray, bands: list[dict]) -> np.ndarray:
+    """Return the index in ``bands`` that :func:`choose_band` picks per kWp.
+
+    Bands are expected sorted by range, as in ``project_size_bands.yaml``.
+    Values outside every ``[lo, hi)`` interval fall back to the last band.
+    """
+
+    lower = np.array([band["kwp_range"][0] for band in bands], dtype=float)
+    upper = np.array([band["kwp_range"][1] for band in bands], dtype=float)
+    last = len(bands) - 1
+    idx = np.minimum(np.searchsorted(upper, kwp, side="right"), last)
+    outside = (kwp < lower[idx]) | (kwp >= upper[idx])
+    return np.where(outside, last, idx)
@@ -1,7 +1,15 @@
+import asyncio
+import json
+
+import pytest
+
 from app.services.geo_enrichment import (
     build_geo_key,
     build_geojson_feature,
     ensure_kpi_payload,
+    kpis_match,
+    parse_kpi_threshold,
+    stream_feature_collection,
 )
 
 
@@ -37,3 +45,41 @@ def test_build_geojson_feature_embeds_kpis_and_properties() -> None:
     assert feature["properties"]["cep"] == "22071060"
     assert feature["properties"]["segment"] == "residential"
     assert feature["properties"]["kpis"]["aneel"] == {"distributor": "LIGHT"}
+
+
+def test_kpi_thresholds_parse_and_match() -> None:
+    thresholds = [
+        parse_kpi_threshold("aneel.dec:lte:12"),
+        parse_kpi_threshold("bacen.selic:gt:0.1"),
+    ]
+    assert kpis_match({"aneel": {"dec": 10}, "bacen": {"selic": "0.12"}}, thresholds)
+    assert not kpis_match({"aneel": {"dec": 13}, "bacen": {"selic": 0.12}}, thresholds)
+    assert not kpis_match({"aneel": {}}, thresholds)
+    with pytest.raises(ValueError):
+        parse_kpi_threshold("unknown.dec:lte:12")
+    with pytest.raises(ValueError):
+        parse_kpi_threshold("aneel.dec:between:12")
+
+
+async def _collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def _features(count: int):
+    for index in range(count):
+        yield {"type": "Feature", "id": str(index)}
+
+
+def test_stream_feature_collection_formats() -> None:
+    body = asyncio.run(_collect(stream_feature_collection(_features(5), chunk_size=2)))
+    collection = json.loads(body)
+    assert collection["type"] == "FeatureCollection"
+    assert [feature["id"] for feature in collection["features"]] == list("01234")
+
+    empty = asyncio.run(_collect(stream_feature_collection(_features(0))))
+    assert json.loads(empty)["features"] == []
+
+    lines = asyncio.run(
+        _collect(stream_feature_collection(_features(3), ndjson=True))
+    ).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["0", "1", "2"]
@@ -0,0 +1,89 @@
+import pytest
+
+from app.services.geo_index import (
+    cover_bbox,
+    encode_geohash,
+    haversine_km,
+    point_in_polygon,
+    prefix_upper_bound,
+    radius_bbox,
+)
+
+
+def test_encode_geohash_matches_reference_value() -> None:
+    assert encode_geohash(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+
+def test_cover_bbox_contains_points_inside_box() -> None:
+    bbox = radius_bbox(-23.5505, -46.6333, 5.0)
+    cells = cover_bbox(bbox)
+    assert 0 < len(cells) <= 32
+    for lat, lon in [(-23.5505, -46.6333), (bbox[0], bbox[1]), (bbox[2], bbox[3])]:
+        geohash = encode_geohash(lat, lon)
+        assert any(geohash.startswith(cell) for cell in cells)
+
+
+def test_prefix_upper_bound_orders_after_prefix() -> None:
+    assert prefix_upper_bound("6gy") == "6gz"
+    assert prefix_upper_bound("6gz") == "6h"
+    assert prefix_upper_bound("zz") is None
+    assert "6gyzzzzzz" < prefix_upper_bound("6gy")
+
+
+def test_haversine_km_sao_paulo_to_rio() -> None:
+    assert haversine_km(-23.5505, -46.6333, -22.9068, -43.1729) == pytest.approx(
+        361, abs=2
+    )
+
+
+def test_point_in_polygon_respects_holes() -> None:
+    outer = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+    hole = [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+    assert point_in_polygon([outer], 5, 5)
+    assert not point_in_polygon([outer, hole], 5, 5)
+    assert point_in_polygon([outer, hole], 2, 2)
+    assert not point_in_polygon([outer], 11, 5)
+
+
+def test_upgrade_schema_migrates_existing_tables(tmp_path) -> None:
+    from sqlalchemy import create_engine, inspect, text
+
+    from app.core.db import _upgrade_schema
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE leads (lead_id VARCHAR PRIMARY KEY,"
+                " created_at TIMESTAMP, source VARCHAR, uf VARCHAR,"
+                " municipio VARCHAR, consumer_class VARCHAR, uc_type VARCHAR,"
+                " generation_modality VARCHAR, tier VARCHAR, status VARCHAR)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE lead_geo_kpis (composite_key VARCHAR PRIMARY KEY,"
+                " lead_id VARCHAR, cpf VARCHAR, cep VARCHAR, latitude FLOAT,"
+                " longitude FLOAT, properties JSON, kpis JSON, geojson JSON,"
+                " created_at TIMESTAMP, updated_at TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO lead_geo_kpis (composite_key, lead_id, latitude,"
+                " longitude) VALUES ('k1', 'L1', -23.5505, -46.6333)"
+            )
+        )
+    for _ in range(2):  # idempotent
+        with engine.begin() as conn:
+            _upgrade_schema(conn)
+
+    with engine.connect() as conn:
+        geohash = conn.execute(text("SELECT geohash FROM lead_geo_kpis")).scalar()
+        indexes = {
+            index["name"] for index in inspect(conn).get_indexes("lead_geo_kpis")
+        }
+        lead_indexes = {index["name"] for index in inspect(conn).get_indexes("leads")}
+    assert geohash == encode_geohash(-23.5505, -46.6333)
+    assert "ix_lead_geo_kpis_geohash" in indexes
+    assert "ix_leads_status_created_at" in lead_indexes
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.db import Base
+from app.models.leads import Lead, LeadGeoKPIs
+from app.services.geo_pipeline import (
+    EnrichmentInput,
+    GeoEnrichmentWorker,
+    TTLCache,
+    build_geo_kpi_row,
+    bulk_upsert_geo_kpis,
+)
+
+
+class FakeProvider:
+    def __init__(self, name: str, fail: bool = False) -> None:
+        self.name = name
+        self.fail = fail
+        self.calls = 0
+
+    async def fetch(self, location):
+        self.calls += 1
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("provider down")
+        return {"source": self.name, "uf": location["uf"]}
+
+
+def _item(index: int, municipio: str = "Campinas") -> EnrichmentInput:
+    return EnrichmentInput(
+        lead_id=f"L{index}",
+        cpf=f"{index:011d}",
+        cep="13000000",
+        latitude=-22.9 + index / 1000,
+        longitude=-47.06,
+        uf="SP",
+        municipio=municipio,
+    )
+
+
+def test_ttl_cache_coalesces_concurrent_fetches() -> None:
+    cache = TTLCache()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        return await asyncio.gather(
+            *(cache.get_or_fetch(("k",), 60, fetch) for _ in range(10))
+        )
+
+    assert asyncio.run(run()) == [1] * 10
+    assert calls == 1
+    assert cache.misses == 1
+
+
+def test_worker_caches_by_region_and_tolerates_failures() -> None:
+    ibge = FakeProvider("ibge")
+    quod = FakeProvider("quod")
+    bacen = FakeProvider("bacen", fail=True)
+    worker = GeoEnrichmentWorker([ibge, quod, bacen])
+
+    async def run():
+        return await asyncio.gather(*(worker.enrich(_item(i)) for i in range(5)))
+
+    payloads = asyncio.run(run())
+    assert ibge.calls == 1  # shared by municipality
+    assert quod.calls == 5  # per CPF
+    for payload in payloads:
+        assert payload["ibge"] == {"source": "ibge", "uf": "SP"}
+        assert "bacen" not in payload
+
+
+def test_bulk_upsert_inserts_updates_and_reports_skips() -> None:
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with sessions() as session:
+            now = datetime.now(timezone.utc)
+            session.add_all([Lead(lead_id=f"L{i}", created_at=now) for i in range(3)])
+            await session.commit()
+
+            rows = [
+                build_geo_kpi_row(
+                    lead_id=item.lead_id,
+                    cpf=item.cpf,
+                    cep=item.cep,
+                    latitude=item.latitude,
+                    longitude=item.longitude,
+                    kpis={"aneel": {"dec": index}},
+                )
+                for index, item in enumerate(_item(i) for i in range(4))
+            ]
+            first = await bulk_upsert_geo_kpis(session, rows)
+            rows[0]["kpis"] = {"aneel": {"dec": 99}}
+            second = await bulk_upsert_geo_kpis(session, rows[:1])
+            stored = (
+                await session.execute(select(LeadGeoKPIs).order_by(LeadGeoKPIs.lead_id))
+            ).scalars().all()
+        await engine.dispose()
+        return first, second, stored
+
+    first, second, stored = asyncio.run(run())
+    assert first["upserted"] == 3
+    assert first["missing_leads"] == ["L3"]
+    assert second["upserted"] == 1
+    assert [record.lead_id for record in stored] == ["L0", "L1", "L2"]
+    assert stored[0].kpis == {"aneel": {"dec": 99}}
+    assert all(record.geohash for record in stored)
+
+
+def test_run_keeps_stored_kpis_when_a_provider_fails() -> None:
+    aneel = FakeProvider("aneel")
+    ibge = FakeProvider("ibge")
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with sessions() as session:
+            session.add(Lead(lead_id="L0", created_at=datetime.now(timezone.utc)))
+            await session.commit()
+
+            await GeoEnrichmentWorker([aneel, ibge]).run(session, [_item(0)])
+            aneel.fail = True
+            # A fresh worker, so the failing provider is not served from cache.
+            summary = await GeoEnrichmentWorker([aneel, ibge]).run(
+                session, [_item(0)]
+            )
+            stored = (await session.execute(select(LeadGeoKPIs))).scalar_one()
+        await engine.dispose()
+        return summary, stored
+
+    summary, stored = asyncio.run(run())
+    assert summary["upserted"] == 1
+    assert summary["provider_failures"] == {"L0": ["aneel"]}
+    assert stored.kpis["aneel"] == {"source": "aneel", "uf": "SP"}
+    assert stored.geojson["properties"]["kpis"]["aneel"] == stored.kpis["aneel"]
+    assert stored.kpis["ibge"] == {"source": "ibge", "uf": "SP"}
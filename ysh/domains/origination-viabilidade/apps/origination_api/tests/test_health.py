@@ -15,3 +15,33 @@ async def test_health() -> None:
         response = await client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_db_metrics_reports_pools() -> None:
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/metrics/db")
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body) == {"primary", "replica"}
+    assert "wait_mean_ms" in body["primary"]
+
+
+def test_engine_options_tune_postgres_only() -> None:
+    from app.core.db import _engine_options
+
+    assert _engine_options("sqlite+aiosqlite:///:memory:") == {}
+    options = _engine_options("postgresql+asyncpg://u:p@db/ysh")
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"]["prepared_statement_cache_size"] > 0
+
+
+@pytest.mark.asyncio
+async def test_read_session_records_replica_waits() -> None:
+    from app.core.db import pool_metrics, read_session
+
+    before = pool_metrics["replica"].count
+    async with read_session():
+        pass
+    assert pool_metrics["replica"].count == before + 1
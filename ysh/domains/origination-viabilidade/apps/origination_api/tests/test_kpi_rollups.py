@@ -0,0 +1,64 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models.kpis  # noqa: F401
+from app.core.db import Base
+from app.events.nats_bus import SUBJECTS
+from app.services.kpi_rollups import (
+    apply_event,
+    percentile_from_histogram,
+    query_kpis,
+    ttfp_bucket,
+)
+
+
+def test_ttfp_histogram_helpers() -> None:
+    assert ttfp_bucket(30) == 60
+    assert ttfp_bucket(60) == 60
+    assert ttfp_bucket(400) == 600
+    assert percentile_from_histogram({60: 90, 600: 10}, 0.95) == 600
+    assert percentile_from_histogram({}, 0.95) is None
+
+
+def test_events_roll_up_into_funnel_kpis() -> None:
+    events = [
+        ("lead_captured", {"lead_id": "A", "ts": "2026-05-01T10:00:00+00:00", "consent": True, "uf": "sp"}),
+        ("lead_captured", {"lead_id": "B", "ts": "2026-05-01T11:00:00+00:00", "consent": True, "uf": "SP"}),
+        ("lead_captured", {"lead_id": "C", "ts": "2026-05-01T12:00:00+00:00", "consent": False, "uf": "RJ"}),
+        ("profile_detected", {"lead_id": "A", "ts": "2026-05-01T10:01:00+00:00"}),
+        ("profile_detected", {"lead_id": "B", "ts": "2026-05-01T11:01:00+00:00"}),
+        ("reco_bundle", {"lead_id": "A", "ts": "2026-05-01T10:04:00+00:00", "tier_code": "T145"}),
+        # Redelivery and a second bundle for the same lead are ignored.
+        ("reco_bundle", {"lead_id": "A", "ts": "2026-05-01T10:05:00+00:00", "tier_code": "T115"}),
+        ("lead_captured", {"lead_id": "A", "ts": "2026-05-01T10:00:00+00:00", "consent": True, "uf": "SP"}),
+    ]
+
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        applied = []
+        async with sessions() as session:
+            for name, payload in events:
+                applied.append(await apply_event(session, SUBJECTS[name], payload))
+                await session.commit()
+            day = date(2026, 5, 1)
+            total = await query_kpis(session, day, day)
+            by_uf = await query_kpis(session, day, day, group_by=["uf"])
+        await engine.dispose()
+        return applied, total, by_uf
+
+    applied, total, by_uf = asyncio.run(run())
+    assert applied == [True] * 6 + [False, False]
+    [row] = total
+    assert row["leads_captured"] == 3
+    assert row["mqls"] == 2
+    assert row["mql_to_sql"] == 1.0
+    assert row["sql_to_proposal"] == 0.5
+    assert row["lead_premium_rate"] == 1.0
+    assert row["ttfp_mean_seconds"] == 240
+    assert row["ttfp_p95_seconds"] == 300
+    assert [(item["uf"], item["leads_captured"]) for item in by_uf] == [("RJ", 1), ("SP", 2)]
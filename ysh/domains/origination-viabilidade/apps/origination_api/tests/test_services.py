@@ -1,6 +1,9 @@
+from datetime import datetime, timezone
+
 import pytest
 
-from app.services.recommendations import build_bundle
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.recommendations import build_bundle, build_bundles
 from app.services.sizing import sizing_summary
 
 
@@ -31,3 +34,52 @@ def test_build_bundle_upsell_rules_applied() -> None:
     # Offers inherit combined upsell list
     for offer in bundle["offers"]:
         assert set(bundle["upsell"]).issuperset(set(offer["upsell"]))
+
+
+def test_build_bundles_matches_single_bundle_per_tier() -> None:
+    frame = {
+        "lead_id": ["L1", "L2", "L3"],
+        "consumo_12m_kwh": [6000, 1200, 250000],
+        "hsp": [5.0, 0.0, 4.6],
+        "load_profile": ["R-N", None, "C-D"],
+        "generation_modality": [None, None, "COMPARTILHADA"],
+        "uc_type": ["B1", None, "COND_MUC"],
+    }
+    tiers = ["T115", "T130", "T145", "T160"]
+    bundles = build_bundles(frame, tiers)
+
+    assert len(bundles) == 12
+    for index, bundle in enumerate(bundles):
+        row, tier = divmod(index, len(tiers))
+        expected = build_bundle(
+            {name: values[row] for name, values in frame.items()},
+            preferred_tier=tiers[tier],
+        )
+        assert bundle["lead_id"] == frame["lead_id"][row]
+        for key in ("tier_code", "band_code", "upsell", "offers", "context"):
+            assert bundle[key] == expected[key]
+        assert bundle["kwp"] == pytest.approx(expected["kwp"])
+        assert bundle["expected_kwh_year"] == pytest.approx(
+            expected["expected_kwh_year"]
+        )
+
+
+def test_build_bundles_rejects_unknown_tier() -> None:
+    with pytest.raises(KeyError):
+        build_bundles({"lead_id": ["L1"], "consumo_12m_kwh": [1], "hsp": [5]}, ["T999"])
+
+
+def test_batch_publishes_the_lead_tier_or_the_default() -> None:
+    from app.routers.leads import _chosen_tier
+
+    assert _chosen_tier("T145", ["T115", "T145"]) == "T145"
+    assert _chosen_tier("T145", ["T100", "T115"]) == "T115"
+    assert _chosen_tier(None, ["T100", "T145"]) == "T100"
+
+
+def test_keyset_cursor_round_trip() -> None:
+    created_at = datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(created_at, "lead|with|pipes")
+    assert decode_cursor(cursor) == (created_at, "lead|with|pipes")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -186,6 +186,37 @@ class PREOrchestratorAgent:
             logger.error(f'Erro ao calcular viabilidade: {e}')
             raise
 
+    async def resolve_distributor(
+        self,
+        cep: Optional[str],
+        uf: Optional[str] = None,
+        municipio: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Resolve a distribuidora (sig_agente) do lead a partir do CEP/município.
+
+        Args:
+            cep: CEP do lead.
+            uf: UF do lead, usada quando o CEP não resolve.
+            municipio: Município, que desempata UFs com várias distribuidoras.
+
+        Returns:
+            sig_agente da distribuidora, ou None se não for possível resolver.
+        """
+        url = f'{ANEEL_UTILITIES_URL}/tools/aneel.utilities.distributor.lookup'
+        query = {'cep': cep, 'uf': uf, 'municipio': municipio}
+        try:
+            response = await self.http_client.post(
+                url,
+                json={'items': [{k: v for k, v in query.items() if v}]},
+            )
+            response.raise_for_status()
+            results = response.json().get('results', [])
+            return results[0].get('sig_agente') if results else None
+        except httpx.HTTPError as e:
+            logger.warning(f'Erro ao resolver distribuidora: {e}')
+            return None
+
     async def get_tariff_profile(self, tariff_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Obtém o perfil tarifário.
@@ -196,22 +227,12 @@ class PREOrchestratorAgent:
         Returns:
             Perfil tarifário.
         """
-        # Primeiro, buscar componentes tarifários
-        url_components = f"{ANEEL_TARIFFS_URL}/tools/aneel.tariffs.components.fetch"
+        # Perfil pré-calculado pelo serviço: uma única chamada por lead
+        url_profile = f'{ANEEL_TARIFFS_URL}/tools/aneel.tariffs.profile.get'
         try:
-            response = await self.http_client.post(url_components, json=tariff_data)
+            response = await self.http_client.post(url_profile, json=tariff_data)
             response.raise_for_status()
-            components = response.json()
-
-            # Em seguida, construir o perfil tarifário
-            url_profile = (
-                f'{ANEEL_TARIFFS_URL}/tools/aneel.tariffs.profile.build'
-            )
-            profile_response = await self.http_client.post(
-                url_profile, json={'rows': components.get('rows', [])}
-            )
-            profile_response.raise_for_status()
-            return profile_response.json()
+            return response.json()
         except httpx.HTTPStatusError as e:
             logger.error(f'Erro ao obter perfil tarifário: {e}')
             # Usar valores default em caso de erro
@@ -627,8 +648,15 @@ class PREOrchestratorAgent:
             # 6. Tariffs → Economics
             tariffs_start = time.time()
 
+            sig_agente = preferences.get('sig_agente')
+            if not sig_agente:
+                sig_agente = await self.resolve_distributor(
+                    lead_data.get('cep'),
+                    lead_data.get('uf'),
+                    lead_data.get('municipio'),
+                )
             tariff_data = {
-                "sig_agente": preferences.get("sig_agente", ""),
+                "sig_agente": sig_agente or "",
                 "inicio_vigencia": preferences.get("inicio_vigencia", "")
             }
 